@@ -2,29 +2,31 @@ from flask import Flask
 from flask_cors import CORS
 from .config import Config
 from .utils.mongo import init_mongo
+from .utils.json_provider import MongoJSONProvider
+from .utils.metrics import init_metrics
+from .utils.query_budget import init_query_budget
+from .utils.auth import init_auth
 from flask_mail import Mail
 import os
-from apscheduler.schedulers.background import BackgroundScheduler
-import atexit
 
 mail = Mail()
-scheduler = None
-scheduler_started = False
 
 def create_app():
-    global scheduler, scheduler_started
-    
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = MongoJSONProvider(app)
     
     # Configure CORS
+    expose_headers = ["Content-Disposition", "X-Sync-Token"]
+    if app.config["QUERY_COUNT_HEADER"]:
+        expose_headers += ["X-Query-Count", "X-Query-Time"]
     CORS(app, resources={
         r"/api/*": {
             "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
             "supports_credentials": True,
-            "expose_headers": ["Content-Disposition"]  
+            "expose_headers": expose_headers
         }
     })
     
@@ -40,6 +42,11 @@ def create_app():
     # Initialize extensions
     mail.init_app(app)
     init_mongo(app)
+    init_metrics(app)
+    init_query_budget(app)
+    init_auth(app)
+    app.cli.command("ensure-indexes")(lambda: ensure_indexes(app))
+    app.cli.command("backfill-reminders")(lambda: backfill_reminders(app))
     
     # Register blueprints
     from .routes.invoice_routes import invoice_bp
@@ -51,6 +58,9 @@ def create_app():
     from .routes.archiving import archive_bp
     from .routes.todo_routes import todo_bp
     from .routes.test_mail import test_mail_bp
+    from .routes.dashboard_routes import dashboard_bp
+    from .routes.notification_routes import notification_bp
+    from .routes.health_routes import health_bp
 
     app.register_blueprint(invoice_bp)
     app.register_blueprint(vehicles_bp)
@@ -61,67 +71,37 @@ def create_app():
     app.register_blueprint(archive_bp)
     app.register_blueprint(todo_bp)
     app.register_blueprint(test_mail_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(notification_bp)
+    app.register_blueprint(health_bp)
     
-    # Start scheduler only once
-    if not scheduler_started:
-        start_scheduler(app)
-        scheduler_started = True
+    # One scheduler per process; jobs only run in the lease holder
+    if app.config.get("SCHEDULER_ENABLED", True):
+        from .utils.scheduler import init_scheduler
+        init_scheduler(app)
     
     return app
 
-def start_scheduler(app):
-    """Start the scheduler with all jobs"""
-    global scheduler
-    
-    scheduler = BackgroundScheduler()
-    
-    # Vehicle document expiration notifications
-    scheduler.add_job(
-        func=lambda: check_expiring_documents_with_context(app),
-        trigger='cron',
-        hour=12,
-        minute=28,
-        id="vehicle_docs_check"
-    )
-
-    # License expiry notifications
-    scheduler.add_job(
-        func=lambda: notify_admins_about_expiring_licenses_with_context(app),
-        trigger='cron',
-        hour=12,
-        minute=28,
-        id="license_check"
-    )
-
-    # Todo tasks expiry notifications (daily at 12:21 for testing)
-    scheduler.add_job(
-        func=lambda: notify_due_tasks_with_context(app),
-        trigger='cron',
-        hour=12,
-        minute=28,
-        id="todo_due_check"
-    )
-
-    scheduler.start()
-    print("✅ Scheduler started for vehicle, license, and todo notifications")
-    
-    # Shut down scheduler when app exits
-    atexit.register(lambda: scheduler.shutdown())
-
-# -------------------------------
-# Helper functions with app context
-# -------------------------------
-def check_expiring_documents_with_context(app):
-    from .utils.notifications import check_expiring_documents
-    with app.app_context():
-        check_expiring_documents(app)
+def backfill_reminders(app):
+    """Queue reminders for open tasks created before the reminder queue"""
+    from .services.reminder_service import backfill_task_reminders
+    app.logger.info(f"Queued reminders for {backfill_task_reminders()} task(s)")
 
-def notify_admins_about_expiring_licenses_with_context(app):
-    from .services.license_notifications import notify_admins_about_expiring_licenses
-    with app.app_context():
-        notify_admins_about_expiring_licenses(app)
 
-def notify_due_tasks_with_context(app):
-    from .utils.email_utils import check_due_tasks
-    with app.app_context():
-        check_due_tasks(app)
+def ensure_indexes(app):
+    """Create the indexes the routes, delta-sync, notification, reminder, alert and mail queries rely on"""
+    from .utils.mongo import get_db, ensure_query_indexes
+    from .utils.sync import ensure_sync_indexes
+    from .services.notification_service import ensure_notification_indexes
+    from .services.reminder_service import ensure_reminder_indexes
+    from .utils.alert_ledger import ensure_alert_indexes
+    from .utils.email_utils import ensure_mail_indexes
+    try:
+        ensure_query_indexes(get_db())
+        ensure_sync_indexes(get_db())
+        ensure_notification_indexes(get_db())
+        ensure_reminder_indexes(get_db())
+        ensure_alert_indexes(get_db())
+        ensure_mail_indexes(get_db())
+    except Exception as e:
+        app.logger.error(f"Failed to create indexes: {str(e)}")
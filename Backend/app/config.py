@@ -13,6 +13,88 @@ class Config:
     
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
     MONGO_DBNAME = os.getenv('MONGO_DBNAME', 'invoice_db')
+
+    # Mongo client: pool sizing, timeouts (ms), concerns and wire compression.
+    # Per process: a gunicorn worker can use up to MONGO_MAX_POOL_SIZE connections.
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 2))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    MONGO_RETRY_WRITES = os.getenv('MONGO_RETRY_WRITES', 'True').lower() in ['true', '1', 't']
+    MONGO_READ_CONCERN = os.getenv('MONGO_READ_CONCERN')  # e.g. local, majority
+    MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN')  # e.g. 1, majority
+    MONGO_JOURNAL = os.getenv('MONGO_JOURNAL', 'False').lower() in ['true', '1', 't']
+    # The driver negotiates the first compressor the server also supports.
+    # zstd comes with pymongo[zstd] and zlib with Python; snappy would need python-snappy.
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zstd,zlib')
+    MONGO_APPNAME = os.getenv('MONGO_APPNAME', 'erp-backend')
+
+    # Per-request query budget: warn above QUERY_BUDGET commands or when one
+    # query shape repeats QUERY_REPEAT_THRESHOLD times (likely an N+1).
+    # QUERY_COUNT_HEADER adds X-Query-Count/X-Query-Time to every response:
+    # for development only, it tells any caller how much work a request costs.
+    QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', 25))
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+    QUERY_COUNT_HEADER = os.getenv('QUERY_COUNT_HEADER', 'False').lower() in ['true', '1', 't']
+
+    # Verified JWTs and the caller's roles are cached per process. A role change
+    # drops the cache in the worker that handled it; other workers pick it up
+    # within AUTH_CACHE_TTL seconds.
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', 60))
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', 10000))
+
+    # Leave is counted in working days: LEAVE_WEEKEND days and public holidays
+    # (Tunisian table when LEAVE_HOLIDAY_COUNTRY=TN, LEAVE_EXTRA_HOLIDAYS as
+    # YYYY-MM-DD,... and the holidays collection) are not charged
+    LEAVE_WEEKEND = os.getenv('LEAVE_WEEKEND', 'Sat,Sun')
+    LEAVE_HOLIDAY_COUNTRY = os.getenv('LEAVE_HOLIDAY_COUNTRY', 'TN')
+    LEAVE_EXTRA_HOLIDAYS = os.getenv('LEAVE_EXTRA_HOLIDAYS', '')
+    HOLIDAY_CACHE_TTL = int(os.getenv('HOLIDAY_CACHE_TTL', 3600))
+
+    # Max employees of a department off on the same day, counting approved and
+    # pending requests: DEPARTMENT_ABSENCE_CAPS="it:2,hr:1", DEFAULT_ABSENCE_CAP
+    # for the others (0 = no limit). Each process rebuilds its index after
+    # ABSENCE_INDEX_TTL seconds or when another process changed leave requests.
+    # Submissions to a capped department are serialized across processes by a
+    # Mongo lease (held at most ABSENCE_LOCK_TTL s, waited for ABSENCE_LOCK_TIMEOUT s).
+    DEPARTMENT_ABSENCE_CAPS = os.getenv('DEPARTMENT_ABSENCE_CAPS', '')
+    DEFAULT_ABSENCE_CAP = int(os.getenv('DEFAULT_ABSENCE_CAP', 0))
+    ABSENCE_INDEX_TTL = int(os.getenv('ABSENCE_INDEX_TTL', 300))
+    ABSENCE_LOCK_TTL = int(os.getenv('ABSENCE_LOCK_TTL', 30))
+    ABSENCE_LOCK_TIMEOUT = float(os.getenv('ABSENCE_LOCK_TIMEOUT', 5))
+
+    # Open /api/notifications/stream connections per worker. Each one holds a
+    # gthread thread for its whole life, so the default leaves one of the
+    # worker's THREADS for other requests; gevent workers serve streams on
+    # greenlets and can take many more.
+    NOTIFICATION_MAX_STREAMS = int(os.getenv(
+        'NOTIFICATION_MAX_STREAMS',
+        500 if os.getenv('WORKER_CLASS') == 'gevent' else max(int(os.getenv('THREADS', 4)) - 1, 1)
+    ))
+
+    # Background SMTP sends (payment reminders, test mail), stored in the
+    # mail_outbox collection and retried every minute by the scheduler:
+    # MAIL_MAX_ATTEMPTS tries, waiting MAIL_RETRY_SECONDS x 1, 2, 4... in between
+    MAIL_SEND_WORKERS = int(os.getenv('MAIL_SEND_WORKERS', 4))
+    MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 5))
+    MAIL_RETRY_SECONDS = int(os.getenv('MAIL_RETRY_SECONDS', 60))
+
+    # Password hashing: werkzeug method string with its cost, e.g.
+    # 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'. Hashes made with other
+    # settings are upgraded on the next successful login. Hashing runs on
+    # PASSWORD_HASH_WORKERS threads; beyond PASSWORD_HASH_QUEUE waiting logins,
+    # requests get a 503 after PASSWORD_HASH_TIMEOUT seconds.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Delta sync (?since=<token>): revisions re-read below the client's token
+    # to catch writes that committed after a higher revision was served
+    SYNC_REVISION_WINDOW = int(os.getenv('SYNC_REVISION_WINDOW', 100))
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx'}
@@ -24,4 +106,15 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
-    ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
\ No newline at end of file
+    ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
+    MAIL_SUPPRESS_SEND = os.getenv('MAIL_SUPPRESS_SEND', 'False').lower() in ['true', '1', 't']
+
+    # Scheduled alerts: 'daily' sends each recipient one digest covering vehicle
+    # documents, licenses and tasks; 'source' sends one digest per check
+    ALERT_DIGEST_GROUPING = os.getenv('ALERT_DIGEST_GROUPING', 'daily')
+
+    # Scheduler: every process runs one, only the Mongo lease holder executes jobs
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'True').lower() in ['true', '1', 't']
+    SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', 30))
+    SCHEDULER_THREADS = int(os.getenv('SCHEDULER_THREADS', 4))
+    SCHEDULER_TIMEZONE = os.getenv('SCHEDULER_TIMEZONE', 'Africa/Tunis')
\ No newline at end of file
@@ -7,6 +7,10 @@ from werkzeug.utils import secure_filename
 import os
 import traceback
 from ..utils.mongo import get_db
+from ..services.dashboard_service import increment_counter, move_counter
+from ..utils.cache import cached
+from ..utils.versioning import bump_version, conditional
+from ..utils.projections import get_projection
 
 archive_bp = Blueprint("archive", __name__, url_prefix="/api/archive")
 
@@ -45,6 +49,8 @@ def upload_document():
             "meta": {}
         }
         result = db.documents.insert_one(doc)
+        increment_counter("archive", "archived")
+        bump_version("archive")
 
         return jsonify({
             "message": "Document archived successfully",
@@ -58,27 +64,17 @@ def upload_document():
         return jsonify({"error": str(e)}), 500
 
 @archive_bp.route("/documents/archived", methods=["GET"])
+@conditional("archive")
+@cached("archive", ttl=60)
 def list_archived():
     """List all archived documents"""
     try:
         db = get_db()
         query = {"status": "archived"}
         
-        docs = list(db.documents.find(query, {
-            "_id": 1,
-            "title": 1,
-            "original_filename": 1,
-            "archived_at": 1,
-            "content_type": 1,
-            "department": 1,
-            "tags": 1,
-            "description": 1
-        }).sort("archived_at", -1))
-        
+        docs = list(db.documents.find(query, get_projection("archive", "list")).sort("archived_at", -1))
         for doc in docs:
-            doc["id"] = str(doc.pop("_id"))
-            if isinstance(doc.get("archived_at"), datetime):
-                doc["archived_at"] = doc["archived_at"].isoformat()
+            doc["id"] = doc.pop("_id")
         
         return jsonify(docs), 200
         
@@ -103,6 +99,8 @@ def unarchive_document(doc_id):
         
         if result.modified_count == 0:
             return jsonify({"error": "Document not found or not archived"}), 404
+        move_counter("archive", "archived", "active")
+        bump_version("archive")
             
         return jsonify({"message": "Document restored successfully"}), 200
     except Exception as e:
@@ -127,7 +125,10 @@ def delete_document(doc_id):
                 }), 403
         
         fs.delete(ObjectId(doc["file_id"]))
-        db.documents.delete_one({"_id": ObjectId(doc_id)})
+        result = db.documents.delete_one({"_id": ObjectId(doc_id)})
+        if result.deleted_count:
+            increment_counter("archive", doc.get("status"), -1)
+            bump_version("archive")
         
         return jsonify({"message": "Document deleted permanently"}), 200
     except Exception as e:
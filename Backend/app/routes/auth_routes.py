@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import jwt
 from ..utils.mongo import get_user_collection
+from ..utils.versioning import bump_version
+from ..utils.projections import get_projection
+from ..utils.passwords import hash_password, verify_password, upgrade_hash, PasswordHasherBusy
 from ..config import Config
 from bson import ObjectId
 
@@ -28,13 +30,13 @@ def register():
             return jsonify({"error": "Invalid contract expiry date format"}), 400
         
         users = get_user_collection()
-        if users.find_one({"email": data['email']}):
+        if users.find_one({"email": data['email']}, {"_id": 1}):
             return jsonify({"error": "Email already registered"}), 409
         
         user = {
             "name": data['name'],
             "email": data['email'],
-            "password": generate_password_hash(data['password']),
+            "password": hash_password(data['password']),
             "contract_type": data['contract_type'],
             "contract_expiry": contract_expiry,
             "created_at": datetime.utcnow(),
@@ -42,6 +44,7 @@ def register():
         }
         
         result = users.insert_one(user)
+        bump_version("users")
         
         token = jwt.encode({
             'user_id': str(result.inserted_id),
@@ -56,10 +59,12 @@ def register():
                 "name": user['name'],
                 "email": user['email'],
                 "contract_type": user['contract_type'],
-                "contract_expiry": user['contract_expiry'].isoformat(),
+                "contract_expiry": user['contract_expiry'],
                 "roles": user['roles']
             }
         }), 201
+    except PasswordHasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -74,10 +79,11 @@ def login():
             return jsonify({"error": "Email and password required"}), 400
         
         users = get_user_collection()
-        user = users.find_one({"email": data['email']})
+        user = users.find_one({"email": data['email']}, get_projection("users", "auth"))
         
-        if not user or not check_password_hash(user['password'], data['password']):
+        if not user or not verify_password(user['password'], data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
+        upgrade_hash(users, user['_id'], user['password'], data['password'])
         
         token = jwt.encode({
             'user_id': str(user['_id']),
@@ -92,10 +98,12 @@ def login():
                 "name": user['name'],
                 "email": user['email'],
                 "contract_type": user.get('contract_type', ''),
-                "contract_expiry": user.get('contract_expiry', '').isoformat() if user.get('contract_expiry') else '',
+                "contract_expiry": user.get('contract_expiry') or '',
                 "roles": user.get('roles', [])
             }
         })
+    except PasswordHasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -121,7 +129,7 @@ def logout():
         users = get_user_collection()
         user = users.find_one({"email": data['email']})
         
-        if not user or not check_password_hash(user['password'], data['password']):
+        if not user or not verify_password(user['password'], data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
             
         # Generate JWT token
@@ -0,0 +1,33 @@
+from flask import Blueprint, jsonify
+from ..services.dashboard_service import get_dashboard_summary, reconcile_counters
+from ..utils.cache import cache_stats
+from ..utils.auth import roles_required
+import logging
+
+dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
+
+logger = logging.getLogger(__name__)
+
+@dashboard_bp.route("/summary", methods=["GET"])
+def get_summary():
+    try:
+        return jsonify(get_dashboard_summary()), 200
+    except Exception as e:
+        logger.error(f"Error fetching dashboard summary: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@dashboard_bp.route("/reconcile", methods=["POST"])
+@roles_required("admin")
+def reconcile_summary():
+    """Force a recount of all dashboard counters"""
+    try:
+        return jsonify(reconcile_counters()), 200
+    except Exception as e:
+        logger.error(f"Error reconciling dashboard counters: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@dashboard_bp.route("/cache", methods=["GET"])
+@roles_required("admin")
+def get_cache_stats():
+    """Hit/miss counters of the in-process response caches"""
+    return jsonify(cache_stats()), 200
@@ -0,0 +1,28 @@
+from flask import Blueprint, jsonify, current_app
+from ..utils.mongo import warmup_mongo
+from ..utils.mongo_monitoring import pool_stats
+import logging
+
+health_bp = Blueprint("health", __name__, url_prefix="/api/health")
+
+logger = logging.getLogger(__name__)
+
+@health_bp.route("/live", methods=["GET"])
+def liveness():
+    """The process is up and serving requests"""
+    return jsonify({"status": "ok"}), 200
+
+@health_bp.route("/ready", methods=["GET"])
+def readiness():
+    """Mongo is reachable; reports the round trip and connection pool stats"""
+    pool = {
+        "max_pool_size": current_app.config.get("MONGO_MAX_POOL_SIZE"),
+        "min_pool_size": current_app.config.get("MONGO_MIN_POOL_SIZE"),
+        "servers": pool_stats.snapshot()
+    }
+    try:
+        ping_ms = warmup_mongo()
+    except Exception as e:
+        logger.error(f"Readiness check failed: {str(e)}")
+        return jsonify({"status": "unavailable", "error": str(e), "pool": pool}), 503
+    return jsonify({"status": "ready", "mongo_ping_ms": round(ping_ms, 2), "pool": pool}), 200
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from ..utils.mongo import get_invoice_collection
+from ..services.dashboard_service import increment_counter, move_counter
+from ..utils.versioning import bump_version, conditional
+from ..utils.projections import get_projection
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 invoice_bp = Blueprint('invoice', __name__, url_prefix='/api/invoices')
 
@@ -31,6 +35,8 @@ def create_invoice():
         
         invoice_collection = get_invoice_collection()
         result = invoice_collection.insert_one(invoice_doc)
+        increment_counter("invoices", invoice_doc["status"])
+        bump_version("invoices")
         
         return jsonify({
             "success": True,
@@ -44,6 +50,7 @@ def create_invoice():
         }), 500
 
 @invoice_bp.route("/list", methods=["GET"])
+@conditional("invoices")
 def list_invoices():
     try:
         search_term = request.args.get('search', '')
@@ -58,22 +65,8 @@ def list_invoices():
         if status_filter and status_filter != "All":
             query["status"] = status_filter
 
-        invoices = list(get_invoice_collection().find(query).sort("invoice_date", -1))
+        invoices = list(get_invoice_collection().find(query, get_projection("invoices", "list")).sort("invoice_date", -1))
 
-        for invoice in invoices:
-            invoice['_id'] = str(invoice['_id'])
-
-            if 'invoice_date' in invoice and invoice['invoice_date']:
-                if isinstance(invoice['invoice_date'], datetime):
-                    invoice['invoice_date'] = invoice['invoice_date'].isoformat()
-                else:
-                    invoice['invoice_date'] = str(invoice['invoice_date'])
-
-            if 'payment_date' in invoice and invoice['payment_date']:
-                if isinstance(invoice['payment_date'], datetime):
-                    invoice['payment_date'] = invoice['payment_date'].isoformat()
-                else:
-                    invoice['payment_date'] = str(invoice['payment_date'])
         return jsonify({
             "success": True,
             "invoices": invoices,
@@ -101,14 +94,19 @@ def update_invoice_status(invoice_id):
         if new_status == "paid":
             update_data["payment_date"] = datetime.utcnow()
 
-        result = get_invoice_collection().update_one(
+        previous = get_invoice_collection().find_one_and_update(
             {"_id": ObjectId(invoice_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"status": 1},
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result.modified_count == 0:
+        if previous is None or (previous.get("status") == new_status and new_status != "paid"):
             return jsonify({"error": "Invoice not found or status unchanged"}), 404
 
+        move_counter("invoices", previous.get("status"), new_status)
+        bump_version("invoices")
+
         return jsonify({"success": True})
 
     except Exception as e:
@@ -127,6 +125,8 @@ def send_payment_reminder(invoice_id):
 
         if not all([client_email, invoice_number, total_amount]):
             return jsonify({"error": "Missing required fields"}), 400
+        if not ObjectId.is_valid(invoice_id):
+            return jsonify({"error": "Invalid invoice id"}), 400
 
         subject = f"Rappel de paiement - Facture #{invoice_number}"
         body = f"""
@@ -140,13 +140,16 @@ Cordialement,
 Dynamix Services
 """
         
-        from ..utils.email_utils import send_email
-        success = send_email(client_email, subject, body)
+        from ..utils.email_utils import queue_email
+        # The invoice's email_status follows the delivery (queued, sent, retrying, failed)
+        message_id = queue_email(client_email, subject, body, ref=("invoices", ObjectId(invoice_id)))
 
-        if not success:
-            return jsonify({"error": "Failed to send email reminder"}), 500
-
-        return jsonify({"success": True, "message": "Payment reminder sent successfully"})
+        return jsonify({
+            "success": True,
+            "queued": True,
+            "message_id": str(message_id),
+            "message": "Payment reminder queued"
+        }), 202
 
     except Exception as e:
         return jsonify({
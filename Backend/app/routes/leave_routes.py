@@ -2,7 +2,8 @@ from flask import Blueprint, request, current_app, jsonify
 from werkzeug.utils import secure_filename
 import os
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 from ..services.leave_service import (
     get_leave_balance,
     submit_leave_request,
@@ -12,25 +13,21 @@ from ..services.leave_service import (
     get_employee_collection,
 )
 
+from ..services.dashboard_service import move_counter
+from ..utils.versioning import bump_version, conditional
+from ..utils.sync import next_revision, changes_since, sync_projection, list_token
+from ..utils.projections import get_projection
 from ..utils.email_service import send_leave_status_email
+from ..utils.workdays import business_days
+from ..services.absence_index import absences
+from ..utils.auth import roles_required, current_user_id
+from ..utils.cache import cached
+from ..services.leave_calendar import build_calendar, CALENDAR_STATUSES
 
 leave_bp = Blueprint("leave", __name__, url_prefix="/api/leave")
 
-def serialize_leave_request(request):
-    """Helper to convert MongoDB document to JSON-serializable format"""
-    serialized = {}
-    for key, value in request.items():
-        if isinstance(value, ObjectId):
-            serialized[key] = str(value)
-        elif isinstance(value, datetime):
-            serialized[key] = value.isoformat()
-        else:
-            serialized[key] = value
-    return serialized
-
-
-
 @leave_bp.route("/balance/<employee_id>", methods=["GET"])
+@conditional("leave", "users")
 def get_balance(employee_id):
     try:
         balance = get_leave_balance(employee_id)
@@ -88,7 +85,7 @@ def create_leave_request():
         return jsonify({
             "success": True,
             "message": "Leave request submitted successfully",
-            "data": serialize_leave_request(leave_request)
+            "data": leave_request
         }), 201
         
     except Exception as e:
@@ -104,6 +101,7 @@ def create_leave_request():
         
 
 @leave_bp.route("/approve/<request_id>", methods=["POST"])
+@roles_required("admin")
 def approve_request(request_id):
     
     
@@ -134,7 +132,7 @@ def approve_request(request_id):
             }), 400
 
         # Get employee info
-        employee = employees.find_one({"_id": leave_request['employee_id']})
+        employee = employees.find_one({"_id": leave_request['employee_id']}, get_projection("users", "contact"))
         if not employee:
             return jsonify({
                 "success": False,
@@ -146,15 +144,17 @@ def approve_request(request_id):
         # Calculate leave days
         start_date = leave_request['start_date']
         end_date = leave_request['end_date']
-        leave_days = (end_date - start_date).days + 1
+        leave_days = business_days(start_date, end_date)
 
         # Update leave request
         result = leave_requests.update_one(
-            {"_id": request_obj_id},
+            {"_id": request_obj_id, "status": "pending"},
             {"$set": {
                 "status": "approved",
+                "leave_days": leave_days,
                 "updated_at": datetime.utcnow(),
-                "processed_by": ObjectId(request.headers.get('X-User-Id'))
+                "_rev": next_revision("leave"),
+                "processed_by": current_user_id()
             }}
         )
         
@@ -163,6 +163,9 @@ def approve_request(request_id):
                 "success": False,
                 "message": "No changes made to leave request"
             }), 400
+        move_counter("leave", "pending", "approved")
+        # Already counted against the department cap since submission
+        absences.sync(bump_version("users", "leave"))
 
         # Update employee's leave balance (only for paid leave types)
         if leave_request['leave_type'] == 'vacation':  # Add other paid leave types as needed
@@ -189,7 +192,7 @@ def approve_request(request_id):
         return jsonify({
             "success": True,
             "message": "Leave request approved successfully" + ("" if email_sent else " (but email failed to send)"),
-            "data": serialize_leave_request(updated_request)
+            "data": updated_request
         })
 
     except Exception as e:
@@ -204,13 +207,13 @@ def approve_request(request_id):
 
 
 @leave_bp.route("/employee/<employee_id>", methods=["GET"])
+@conditional("leave")
 def get_employee_requests(employee_id):
     try:
         requests = get_employee_leave_requests(employee_id)
-        serialized_requests = [serialize_leave_request(req) for req in requests]
         return jsonify({
             "success": True,
-            "data": serialized_requests
+            "data": requests
         })
     except Exception as e:
         return jsonify({
@@ -225,7 +228,7 @@ def cancel_request(request_id):
         return jsonify({
             "success": True,
             "message": "Leave request cancelled successfully",
-            "data": serialize_leave_request(leave_request)
+            "data": leave_request
         })
     except Exception as e:
         return jsonify({
@@ -233,16 +236,75 @@ def cancel_request(request_id):
             "message": str(e)
         }), 400
 
+@leave_bp.route("/calendar", methods=["GET"])
+@conditional("leave", "users")
+@cached("leave", ttl=60)
+def get_leave_calendar():
+    """
+    Team availability: ?month=YYYY-MM (default: current month), ?year=YYYY
+    or ?start=YYYY-MM-DD&end=YYYY-MM-DD; optional ?department= and
+    ?status=approved,pending
+    """
+    try:
+        args = request.args
+        if args.get("start") and args.get("end"):
+            start = datetime.strptime(args["start"], "%Y-%m-%d")
+            end = datetime.strptime(args["end"], "%Y-%m-%d")
+        elif args.get("year"):
+            start = datetime(int(args["year"]), 1, 1)
+            end = datetime(int(args["year"]), 12, 31)
+        else:
+            month = datetime.strptime(args["month"], "%Y-%m") if args.get("month") else datetime.utcnow()
+            start = datetime(month.year, month.month, 1)
+            end = start + relativedelta(months=1) - timedelta(days=1)
+
+        statuses = tuple(args["status"].split(",")) if args.get("status") else CALENDAR_STATUSES
+        calendar = build_calendar(start, end, statuses, args.get("department"))
+        return jsonify({"success": True, "data": calendar})
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "message": str(ve)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f"Error building leave calendar: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 500
+
 @leave_bp.route("/all", methods=["GET"])
+@conditional("leave")
 def get_all_leave_requests():
     try:
-        leave_requests = list(get_leave_collection().find().sort("created_at", -1))
-        serialized_requests = [serialize_leave_request(req) for req in leave_requests]
+        since = request.args.get("since")
+        if since is not None:
+            changed, deleted, token = changes_since(
+                "leave", get_leave_collection(), since, get_projection("leave", "list")
+            )
+            return jsonify({
+                "success": True,
+                "changes": changed,
+                "deleted": deleted,
+                "token": token
+            })
+
+        leave_requests = list(
+            get_leave_collection().find({}, sync_projection(get_projection("leave", "list"))).sort("created_at", -1)
+        )
+        token = list_token(leave_requests)
         
-        return jsonify({
+        response = jsonify({
             "success": True,
-            "data": serialized_requests
+            "data": leave_requests
         })
+        response.headers["X-Sync-Token"] = token
+        return response
+    except ValueError as ve:
+        return jsonify({
+            "success": False,
+            "message": str(ve)
+        }), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching leave requests: {str(e)}")
         return jsonify({
@@ -251,6 +313,7 @@ def get_all_leave_requests():
         }), 500
 
 @leave_bp.route("/reject/<request_id>", methods=["POST"])
+@roles_required("admin")
 def reject_request(request_id):
     try:
         leave_requests = get_leave_collection()
@@ -287,7 +350,7 @@ def reject_request(request_id):
         rejection_reason = data.get('rejection_reason', 'No reason provided')
 
         # Get employee info
-        employee = employees.find_one({"_id": leave_request['employee_id']})
+        employee = employees.find_one({"_id": leave_request['employee_id']}, get_projection("users", "contact"))
         if not employee:
             return jsonify({
                 "success": False,
@@ -298,12 +361,13 @@ def reject_request(request_id):
 
         # Update leave request
         result = leave_requests.update_one(
-            {"_id": request_obj_id},
+            {"_id": request_obj_id, "status": "pending"},
             {"$set": {
                 "status": "rejected",
                 "rejection_reason": rejection_reason,
                 "updated_at": datetime.utcnow(),
-                "processed_by": ObjectId(request.headers.get('X-User-Id'))
+                "_rev": next_revision("leave"),
+                "processed_by": current_user_id()
             }}
         )
         
@@ -312,6 +376,9 @@ def reject_request(request_id):
                 "success": False,
                 "message": "No changes made to leave request"
             }), 400
+        move_counter("leave", "pending", "rejected")
+        absences.release(request_obj_id)
+        absences.sync(bump_version("leave"))
 
         updated_request = leave_requests.find_one({"_id": request_obj_id})
         
@@ -331,7 +398,7 @@ def reject_request(request_id):
         return jsonify({
             "success": True,
             "message": "Leave request rejected successfully" + ("" if email_sent else " (but email failed to send)"),
-            "data": serialize_leave_request(updated_request)
+            "data": updated_request
         })
 
     except Exception as e:
@@ -340,48 +407,3 @@ def reject_request(request_id):
             "success": False,
             "message": str(e)
         }), 500
-    try:
-        leave_requests = get_leave_collection()
-        employees = get_employee_collection()
-        
-        try:
-            request_obj_id = ObjectId(request_id)
-        except:
-            raise Exception("Invalid leave request ID format")
-
-        leave_request = leave_requests.find_one({"_id": request_obj_id})
-        if not leave_request:
-            raise Exception("Leave request not found")
-
-        if leave_request['status'] != 'pending':
-            raise Exception(f"Leave request already {leave_request['status']}")
-
-        data = request.get_json()
-        rejection_reason = data.get('rejection_reason', 'No reason provided')
-
-        result = leave_requests.update_one(
-            {"_id": request_obj_id},
-            {"$set": {
-                "status": "rejected",
-                "rejection_reason": rejection_reason,
-                "updated_at": datetime.utcnow(),
-                "processed_by": ObjectId(request.headers.get('X-User-Id'))
-            }}
-        )
-        
-        if result.modified_count == 0:
-            raise Exception("No changes made to leave request")
-
-        updated_request = leave_requests.find_one({"_id": request_obj_id})
-        return jsonify({
-            "success": True,
-            "message": "Leave request rejected successfully",
-            "data": serialize_leave_request(updated_request)
-        })
-
-    except Exception as e:
-        current_app.logger.error(f"Error rejecting leave request: {str(e)}")
-        return jsonify({
-            "success": False,
-            "message": str(e)
-        }), 400
\ No newline at end of file
@@ -3,6 +3,11 @@ from datetime import datetime, timezone
 from bson import ObjectId
 from ..utils.mongo import get_license_collection
 from ..services.licence_service import calculate_license_status
+from ..services.dashboard_service import increment_counter, move_counter
+from ..utils.cache import cached
+from ..utils.versioning import bump_version, conditional
+from ..utils.sync import next_revision, changes_since, sync_projection, list_token
+from ..utils.projections import get_projection
 import logging
 
 license_bp = Blueprint("licenses", __name__, url_prefix="/api/licenses")
@@ -12,6 +17,8 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @license_bp.route("/alerts", methods=["GET"])
+@conditional("licenses")
+@cached("licenses", ttl=60)
 def get_expiring_licenses():
     try:
         collection = get_license_collection()
@@ -22,20 +29,7 @@ def get_expiring_licenses():
                 {"status": "about_to_expire"},
                 {"status": "expired"}
             ]
-        }).sort("expiry_date", 1))
-        
-        # Convert ObjectId and format dates
-        for lic in alerts:
-            lic["_id"] = str(lic["_id"])
-            if isinstance(lic["expiry_date"], datetime):
-                lic["expiry_date"] = lic["expiry_date"].isoformat()
-            elif isinstance(lic["expiry_date"], str):
-                try:
-                    # Ensure the string is properly formatted
-                    dt = datetime.fromisoformat(lic["expiry_date"])
-                    lic["expiry_date"] = dt.isoformat()
-                except ValueError:
-                    lic["expiry_date"] = "Invalid date format"
+        }, get_projection("licenses", "list")).sort("expiry_date", 1))
         
         return jsonify(alerts)
     
@@ -87,13 +81,16 @@ def create_license():
             "status": status,
             "days_until_expiry": days_left,
             "created_at": today,
-            "last_updated": today
+            "last_updated": today,
+            "_rev": next_revision("licenses")
         }
         
         # Remove None values
         new_license = {k: v for k, v in new_license.items() if v is not None}
         
         result = get_license_collection().insert_one(new_license)
+        increment_counter("licenses", status)
+        bump_version("licenses")
         return jsonify({
             "message": "License created successfully",
             "id": str(result.inserted_id),
@@ -113,43 +110,64 @@ def create_license():
 
 #####
 
+def refresh_license(collection, lic):
+    """Recalculate a license's status and persist it if it changed"""
+    # Recalculate status for each license
+    if isinstance(lic.get("expiry_date"), datetime):
+        expiry_date = lic["expiry_date"]
+        if expiry_date.tzinfo is None:
+            expiry_date = expiry_date.replace(tzinfo=timezone.utc)
+        
+        # Calculate current status
+        status, days_left = calculate_license_status(expiry_date)
+        
+        # Update the license status if it has changed
+        if lic.get("status") != status:
+            collection.update_one(
+                {"_id": lic["_id"]},
+                {"$set": {
+                    "status": status,
+                    "days_until_expiry": days_left,
+                    "last_updated": datetime.now(timezone.utc),
+                    "_rev": next_revision("licenses")
+                }}
+            )
+            move_counter("licenses", lic.get("status"), status)
+            bump_version("licenses")
+            lic["status"] = status
+            lic["days_until_expiry"] = days_left
+    return lic
+
 @license_bp.route("/", methods=["GET"])
+@conditional("licenses")
 def get_all_licenses():
     try:
         collection = get_license_collection()
-        all_licenses = list(collection.find().sort("expiry_date", 1))
         
-        # Convert ObjectId and format dates + update status
+        since = request.args.get("since")
+        if since is not None:
+            changed, deleted, token = changes_since(
+                "licenses", collection, since, get_projection("licenses", "list")
+            )
+            return jsonify({
+                "changes": [refresh_license(collection, lic) for lic in changed],
+                "deleted": deleted,
+                "token": token
+            })
+        
+        all_licenses = list(collection.find({}, sync_projection(get_projection("licenses", "list"))).sort("expiry_date", 1))
+        # Read before the status refresh below, whose writes get later revisions
+        token = list_token(all_licenses)
+        
+        # Update statuses that changed since the last read
         for lic in all_licenses:
-            lic["_id"] = str(lic["_id"])
-            
-            # Recalculate status for each license
-            if isinstance(lic["expiry_date"], datetime):
-                expiry_date = lic["expiry_date"]
-                if expiry_date.tzinfo is None:
-                    expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-                
-                # Calculate current status
-                status, days_left = calculate_license_status(expiry_date)
-                
-                # Update the license status if it has changed
-                if lic.get("status") != status:
-                    collection.update_one(
-                        {"_id": lic["_id"]},
-                        {"$set": {
-                            "status": status,
-                            "days_until_expiry": days_left,
-                            "last_updated": datetime.now(timezone.utc)
-                        }}
-                    )
-                    lic["status"] = status
-                    lic["days_until_expiry"] = days_left
-            
-            # Format date for response
-            if isinstance(lic["expiry_date"], datetime):
-                lic["expiry_date"] = lic["expiry_date"].isoformat()
-        
-        return jsonify(all_licenses)
+            refresh_license(collection, lic)
+        
+        response = jsonify(all_licenses)
+        response.headers["X-Sync-Token"] = token
+        return response
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         logger.error(f"Error fetching all licenses: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
@@ -162,6 +180,7 @@ def get_all_licenses():
 
 
 @license_bp.route("/expiring", methods=["GET"])
+@conditional("licenses")
 def get_expiring_count():
     try:
         collection = get_license_collection()
@@ -1,27 +1,88 @@
-from flask import Blueprint, jsonify
-from bson import ObjectId
-from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request, Response, current_app
+from queue import Empty
 from ..services.notification_service import NotificationService
+from ..services.notification_broker import broker, StreamLimitReached
+from ..utils.json_provider import dumps
 
 notification_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 notification_service = NotificationService()
 
+KEEPALIVE_SECONDS = 15
+
+def format_event(note):
+    return f"id: {note['seq']}\nevent: notification\ndata: {dumps(note)}\n\n"
+
 @notification_bp.route('/', methods=['GET'])
 def get_notifications():
     try:
         days = int(request.args.get('days', 7))
         limit = int(request.args.get('limit', 50))
         notifications = notification_service.get_recent_notifications(days, limit)
-        
-        # Convert ObjectId and datetime
-        for note in notifications:
-            note['_id'] = str(note['_id'])
-            note['created_at'] = note['created_at'].isoformat()
-            
         return jsonify(notifications)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@notification_bp.route('/unread-count', methods=['GET'])
+def get_unread_count():
+    try:
+        return jsonify({"unread": notification_service.get_unread_count()})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@notification_bp.route('/stream', methods=['GET'])
+def stream_notifications():
+    """
+    Server-Sent Events stream of notifications as they are created.
+
+    A stream holds its worker thread for as long as the client stays
+    connected: NOTIFICATION_MAX_STREAMS caps them per worker so that gthread
+    workers keep threads for other requests (run WORKER_CLASS=gevent for
+    many clients).
+
+    A reconnecting client is replayed what it missed up to the last sequence
+    number stored when it subscribed; later ones come from the broker, which
+    may also publish some of the replayed ones: those are not sent twice.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if last_event_id and not last_event_id.isdigit():
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+    try:
+        subscriber = broker.subscribe(current_app.config.get("NOTIFICATION_MAX_STREAMS"))
+    except StreamLimitReached as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(KEEPALIVE_SECONDS)}
+    try:
+        replay_until = notification_service.get_latest_seq() if last_event_id else None
+    except Exception:
+        broker.unsubscribe(subscriber)
+        raise
+
+    def events():
+        yield f"retry: {KEEPALIVE_SECONDS * 1000}\n\n"
+        # Replay what a reconnecting client missed
+        replayed = set()
+        if last_event_id:
+            for note in notification_service.get_notifications_after(int(last_event_id), until=replay_until):
+                replayed.add(note["seq"])
+                yield format_event(note)
+        while True:
+            try:
+                note = subscriber.get(timeout=KEEPALIVE_SECONDS)
+            except Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if note["seq"] in replayed:
+                continue
+            yield format_event(note)
+
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Also runs when the client leaves before the first event
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    return response
+
 @notification_bp.route('/<notification_id>/read', methods=['PUT'])
 def mark_notification_read(notification_id):
     try:
@@ -35,7 +96,10 @@ def mark_notification_read(notification_id):
 @notification_bp.route('/read-all', methods=['PUT'])
 def mark_all_read():
     try:
-        notification_service.mark_all_as_read()
-        return jsonify({"message": "All notifications marked as read"})
+        result = notification_service.mark_all_as_read()
+        return jsonify({
+            "message": "All notifications marked as read",
+            "updated": result.modified_count
+        })
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
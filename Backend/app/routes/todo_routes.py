@@ -2,19 +2,15 @@ from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from datetime import datetime, timezone
 from ..utils.mongo import get_todo_collection
+from ..services.dashboard_service import increment_counter, move_counter
+from ..utils.versioning import bump_version, conditional
+from ..utils.sync import next_revision, record_deletion, changes_since, sync_projection, list_token
+from ..utils.projections import get_projection
+from ..services.reminder_service import schedule_task_reminder, cancel_task_reminders
+from pymongo import ReturnDocument
 
 todo_bp = Blueprint("todo", __name__, url_prefix="/api/todos")
 
-def serialize_task(task):
-    return {
-        "_id": str(task["_id"]),
-        "title": task.get("title", ""),
-        "description": task.get("description", ""),
-        "due_date": task.get("due_date").strftime("%Y-%m-%d %H:%M") if task.get("due_date") else None,
-        "status": task.get("status", "pending"),
-        "created_at": task.get("created_at").strftime("%Y-%m-%d %H:%M:%S") if task.get("created_at") else None
-    }
-
 # -------------------------------
 # CREATE
 # -------------------------------
@@ -43,12 +39,16 @@ def create_task():
             "description": data.get("description", ""),
             "due_date": due_date.replace(tzinfo=timezone.utc),
             "status": data.get("status", "pending"),
-            "created_at": datetime.now(timezone.utc)
+            "created_at": datetime.now(timezone.utc),
+            "_rev": next_revision("todos")
         }
 
         result = get_todo_collection().insert_one(task)
         task["_id"] = result.inserted_id
-        return jsonify(serialize_task(task)), 201
+        increment_counter("todos", task["status"])
+        bump_version("todos")
+        schedule_task_reminder(task, task["_id"])
+        return jsonify(task), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -81,16 +81,26 @@ def update_task(task_id):
         if not updates:
             return jsonify({"error": "No valid fields to update"}), 400
 
-        result = get_todo_collection().update_one(
+        updates["_rev"] = next_revision("todos")
+        previous = get_todo_collection().find_one_and_update(
             {"_id": ObjectId(task_id)},
-            {"$set": updates}
+            {"$set": updates},
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result.matched_count == 0:
+        if previous is None:
             return jsonify({"error": "Task not found"}), 404
 
-        updated_task = get_todo_collection().find_one({"_id": ObjectId(task_id)})
-        return jsonify(serialize_task(updated_task)), 200
+        if "status" in updates:
+            move_counter("todos", previous.get("status", "pending"), updates["status"])
+        bump_version("todos")
+
+        updated_task = {**previous, **updates}
+        # Re-queue reminders only when the deadline moves or the task is (re)opened/closed
+        reopened_or_closed = "done" in (previous.get("status"), updates.get("status", previous.get("status")))
+        if "due_date" in updates or ("status" in updates and reopened_or_closed):
+            schedule_task_reminder(updated_task, task_id)
+        return jsonify(updated_task), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -99,10 +109,26 @@ def update_task(task_id):
 # READ
 # -------------------------------
 @todo_bp.route("/", methods=["GET"])
+@conditional("todos")
 def get_tasks():
     try:
-        tasks = list(get_todo_collection().find())
-        return jsonify([serialize_task(t) for t in tasks]), 200
+        since = request.args.get("since")
+        if since is not None:
+            changed, deleted, token = changes_since(
+                "todos", get_todo_collection(), since, get_projection("todos", "list")
+            )
+            return jsonify({
+                "changes": changed,
+                "deleted": deleted,
+                "token": token
+            }), 200
+
+        tasks = list(get_todo_collection().find({}, sync_projection(get_projection("todos", "list"))))
+        response = jsonify(tasks)
+        response.headers["X-Sync-Token"] = list_token(tasks)
+        return response, 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -112,9 +138,16 @@ def get_tasks():
 @todo_bp.route("/<task_id>", methods=["DELETE"])
 def delete_task(task_id):
     try:
-        result = get_todo_collection().delete_one({"_id": ObjectId(task_id)})
-        if result.deleted_count == 0:
+        deleted = get_todo_collection().find_one_and_delete(
+            {"_id": ObjectId(task_id)},
+            projection={"status": 1}
+        )
+        if deleted is None:
             return jsonify({"error": "Task not found"}), 404
+        increment_counter("todos", deleted.get("status", "pending"), -1)
+        record_deletion("todos", task_id)
+        cancel_task_reminders(task_id)
+        bump_version("todos")
         return jsonify({"message": "Task deleted successfully"}), 200
     except Exception as e: 
         return jsonify({"error": str(e)}), 500
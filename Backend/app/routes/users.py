@@ -3,14 +3,26 @@ from bson import ObjectId
 from flask import request
 from datetime import datetime
 from ..utils.mongo import get_user_collection, get_leave_collection
+from ..utils.cache import cached
+from ..utils.versioning import bump_version, conditional
+from ..utils.projections import get_projection
+from ..utils.auth import roles_required, forget_user
+from ..utils.workdays import leave_days_by_employee
 
 user_bp = Blueprint('user', __name__, url_prefix='/api/users')
 
-def calculate_leave_balance(user_id):
+def approved_leave_days(user_ids):
+    """Working days of approved leave per user, in one query for all of them"""
+    return leave_days_by_employee(get_leave_collection().find(
+        {"employee_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}, "status": "approved"},
+        {"employee_id": 1, "start_date": 1, "end_date": 1}
+    ))
+
+def calculate_leave_balance(user_id, user=None, total_taken=None):
     users = get_user_collection()
-    leaves = get_leave_collection()
 
-    user = users.find_one({"_id": ObjectId(user_id)})
+    if user is None:
+        user = users.find_one({"_id": ObjectId(user_id)}, get_projection("users", "balance"))
     if not user or not user.get("created_at"):
         return None
 
@@ -24,62 +36,42 @@ def calculate_leave_balance(user_id):
     # Congés acquis : 2.5 jours par mois travaillé
     entitled_leave_days = months_worked * 2.5
 
-    # Calcul des jours de congé déjà pris (statut "approved")
-    pipeline = [
-        {"$match": {
-            "employee_id": ObjectId(user_id),
-            "status": "approved"
-        }},
-        {"$project": {
-            "duration": {
-                "$add": [
-                    {"$divide": [
-                        {"$subtract": ["$end_date", "$start_date"]},
-                        86400000  # ms dans une journée
-                    ]},
-                    1  # inclusif
-                ]
-            }
-        }},
-        {"$group": {
-            "_id": None,
-            "total_days": {"$sum": "$duration"}
-        }}
-    ]
-    
-    result = list(leaves.aggregate(pipeline))
-    total_taken = result[0]["total_days"] if result else 0
+    # Jours ouvrés de congé déjà pris (statut "approved"), hors week-ends et jours fériés
+    if total_taken is None:
+        total_taken = approved_leave_days([user_id]).get(ObjectId(user_id), 0)
 
     # Solde = congés acquis - congés pris
     balance = entitled_leave_days - total_taken
     return max(round(balance, 1), 0)  # pas négatif
 #users list ##
 @user_bp.route('/', methods=['GET'])
+@conditional("users")
+@cached("users", ttl=30)
 def list_users():
     users = get_user_collection()
     user_list = []
     
-    for user in users.find():
-        leave_balance = calculate_leave_balance(user["_id"])
-        
-        # Handle contract_expiry properly
-        contract_expiry = user.get("contract_expiry")
-        contract_expiry_iso = contract_expiry.isoformat() if contract_expiry else None
+    all_users = list(users.find({}, get_projection("users", "list")))
+    taken = approved_leave_days([user["_id"] for user in all_users])
+    for user in all_users:
+        leave_balance = calculate_leave_balance(user["_id"], user, taken.get(user["_id"], 0))
         
         user_list.append({
-            "id": str(user["_id"]),
+            "id": user["_id"],
             "name": user.get("name", ""),
             "email": user.get("email", ""),
             "roles": user.get("roles", []),
-            "join_date": user.get("created_at").isoformat() if user.get("created_at") else None,
+            "join_date": user.get("created_at"),
             "leave_balance": leave_balance,
             "contract_type": user.get("contract_type", ""),
-            "contract_expiry": contract_expiry_iso  # Fixed this line
+            "contract_expiry": user.get("contract_expiry"),
+            "department": user.get("department")
         })
     
     return jsonify(user_list), 200
 #update user #
 @user_bp.route('/<user_id>', methods=['PATCH'])
+@roles_required("admin")
 def update_user(user_id):
     users = get_user_collection()
     data = request.get_json()
@@ -88,7 +80,7 @@ def update_user(user_id):
         return jsonify({"error": "No data provided"}), 400
 
     # List of all fields allowed to update
-    allowed_fields = ['name', 'roles', 'email', 'contract_type', 'contract_expiry', 'created_at']
+    allowed_fields = ['name', 'roles', 'email', 'contract_type', 'contract_expiry', 'created_at', 'department']
 
     update_fields = {}
     for field in allowed_fields:
@@ -112,20 +104,24 @@ def update_user(user_id):
 
     if result.matched_count == 0:
         return jsonify({"error": "User not found"}), 404
+    bump_version("users")
+    if "roles" in update_fields:
+        # Tokens already resolved for this user must pick up the new roles
+        forget_user(user_id)
 
     # Return updated user
-    user = users.find_one({"_id": ObjectId(user_id)})
+    user = users.find_one({"_id": ObjectId(user_id)}, get_projection("users", "list"))
     leave_balance = calculate_leave_balance(user_id)
-    contract_expiry = user.get("contract_expiry")
     user_data = {
-        "id": str(user["_id"]),
+        "id": user["_id"],
         "name": user.get("name", ""),
         "email": user.get("email", ""),
         "roles": user.get("roles", []),
-        "join_date": user.get("created_at").isoformat() if user.get("created_at") else None,
+        "join_date": user.get("created_at"),
         "leave_balance": leave_balance,
         "contract_type": user.get("contract_type", ""),
-        "contract_expiry": contract_expiry.isoformat() if contract_expiry else None
+        "contract_expiry": user.get("contract_expiry"),
+        "department": user.get("department")
     }
 
     return jsonify({"message": "User updated successfully", "user": user_data}), 200
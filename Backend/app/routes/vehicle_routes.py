@@ -4,6 +4,9 @@ from datetime import datetime, timedelta
 from bson import ObjectId
 from .. import mail   # ✅ import mail from __init__.py
 from ..utils.mongo import get_vehicle_collection
+from ..utils.cache import cached
+from ..utils.versioning import bump_version, conditional
+from ..utils.projections import get_projection
 from ..utils.notifications import (
     get_upcoming_expirations,
     check_expiring_documents,
@@ -97,21 +100,23 @@ def add_vehicle():
                 {"_id": ObjectId(data['_id'])},
                 {"$set": vehicle_doc}
             )
+            bump_version("vehicles")
             return jsonify({"message": "Vehicle updated successfully", "notification": True}), 200
         else:
             result = vehicle_collection.insert_one(vehicle_doc)
+            bump_version("vehicles")
             return jsonify({"message": "Vehicle added successfully", "id": str(result.inserted_id), "notification": True}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @vehicles_bp.route('/<vehicle_id>', methods=['GET'])
+@conditional("vehicles")
 def get_vehicle(vehicle_id):
     vehicle_collection = get_vehicle_collection()
     try:
-        vehicle = vehicle_collection.find_one({"_id": ObjectId(vehicle_id)})
+        vehicle = vehicle_collection.find_one({"_id": ObjectId(vehicle_id)}, get_projection("vehicles", "detail"))
         if vehicle:
-            vehicle['_id'] = str(vehicle['_id'])
             return jsonify(vehicle), 200
         return jsonify({"error": "Vehicle not found"}), 404
     except Exception as e:
@@ -131,6 +136,7 @@ def delete_vehicle(vehicle_id):
     try:
         result = vehicle_collection.delete_one({"_id": ObjectId(vehicle_id)})
         if result.deleted_count > 0:
+            bump_version("vehicles")
             return jsonify({"message": "Vehicle deleted successfully"}), 200
         return jsonify({"error": "Vehicle not found"}), 404
     except Exception as e:
@@ -150,7 +156,8 @@ def record_visit(vehicle_id):
             }
         )
         if result.modified_count > 0:
-            updated_vehicle = vehicle_collection.find_one({"_id": ObjectId(vehicle_id)})
+            bump_version("vehicles")
+            updated_vehicle = vehicle_collection.find_one({"_id": ObjectId(vehicle_id)}, {"visits.count": 1})
             return jsonify({
                 "message": "Visit recorded successfully",
                 "visit_count": updated_vehicle['visits']['count'],
@@ -162,6 +169,7 @@ def record_visit(vehicle_id):
 
 
 @vehicles_bp.route('/', methods=['GET'])
+@conditional("vehicles")
 def list_vehicles():
     vehicle_collection = get_vehicle_collection()
     try:
@@ -182,15 +190,9 @@ def list_vehicles():
         total = vehicle_collection.count_documents(query)
         vehicles = list(vehicle_collection.find(
             query,
-            {
-                'documents.insurance.file': 0,
-                'documents.vignette.file': 0,
-                'documents.vesite.file': 0
-            }
+            get_projection("vehicles", "list")
         ).sort('created_at', -1).skip(skip).limit(per_page))
 
-        for vehicle in vehicles:
-            vehicle['_id'] = str(vehicle['_id'])
         return jsonify({
             'data': vehicles,
             'total': total,
@@ -202,6 +204,8 @@ def list_vehicles():
 
 
 @vehicles_bp.route('/expirations/upcoming', methods=['GET'])
+@conditional("vehicles")
+@cached("vehicles", ttl=300)
 def get_upcoming_expirations_route():
     try:
         expirations = get_upcoming_expirations()
@@ -0,0 +1,243 @@
+"""
+Per-department concurrent-absence limits.
+
+Each department keeps a dynamic segment tree over day ordinals holding how
+many of its employees are off on each day (approved and pending requests
+from today on). A submission asks for the maximum over its range and
+reserves it in O(log days). The trees are rebuilt from one indexed query
+when this process first needs them, after ABSENCE_INDEX_TTL seconds, or
+when another process changed leave requests in between (detected through
+the "leave" version stamp).
+
+Submissions to a capped department hold a Mongo lease on that department
+from the check until their insert and version bump are done, so two
+processes can't both take the last free slot: the second one sees the
+first one's version bump and rebuilds before checking.
+"""
+from contextlib import contextmanager
+from datetime import datetime, date
+from threading import Lock
+import time
+from flask import current_app
+from ..utils.leader import LeaderLease
+from ..utils.mongo import get_employee_collection, get_leave_collection
+from ..utils.versioning import get_versions
+
+ABSENCE_STATUSES = ("approved", "pending")
+DEFAULT_DEPARTMENT = "general"
+HORIZON_DAYS = 3660
+
+
+class MaxAddTree:
+    """
+    Range add / range max over the integer days [lo, hi]. Nodes are created
+    on first write, so an empty tree costs nothing and a range update or
+    query touches O(log(hi - lo)) nodes.
+    """
+
+    def __init__(self, lo, hi):
+        self.lo = lo
+        self.hi = hi
+        # Node arrays: children (-1: none), max of the subtree including the
+        # node's own pending add, and the add applied to the whole node
+        self.left = [-1]
+        self.right = [-1]
+        self.top = [0]
+        self.add_all = [0]
+
+    def _new_node(self):
+        self.left.append(-1)
+        self.right.append(-1)
+        self.top.append(0)
+        self.add_all.append(0)
+        return len(self.top) - 1
+
+    def add(self, first, last, value):
+        first, last = max(first, self.lo), min(last, self.hi)
+        if first <= last:
+            self._add(0, self.lo, self.hi, first, last, value)
+
+    def _add(self, node, lo, hi, first, last, value):
+        if first <= lo and hi <= last:
+            self.top[node] += value
+            self.add_all[node] += value
+            return
+        mid = (lo + hi) // 2
+        if first <= mid:
+            if self.left[node] < 0:
+                self.left[node] = self._new_node()
+            self._add(self.left[node], lo, mid, first, last, value)
+        if last > mid:
+            if self.right[node] < 0:
+                self.right[node] = self._new_node()
+            self._add(self.right[node], mid + 1, hi, first, last, value)
+        left = self.top[self.left[node]] if self.left[node] >= 0 else 0
+        right = self.top[self.right[node]] if self.right[node] >= 0 else 0
+        self.top[node] = self.add_all[node] + max(left, right)
+
+    def max(self, first, last):
+        first, last = max(first, self.lo), min(last, self.hi)
+        if first > last:
+            return 0
+        return self._max(0, self.lo, self.hi, first, last)
+
+    def _max(self, node, lo, hi, first, last):
+        if node < 0:
+            return 0
+        if first <= lo and hi <= last:
+            return self.top[node]
+        mid = (lo + hi) // 2
+        best = None
+        if first <= mid:
+            best = self._max(self.left[node], lo, mid, first, last)
+        if last > mid:
+            right = self._max(self.right[node], mid + 1, hi, first, last)
+            best = right if best is None else max(best, right)
+        return self.add_all[node] + best
+
+
+class AbsenceLimitExceeded(Exception):
+    pass
+
+
+class AbsenceCheckBusy(Exception):
+    """Another submission held the department's lease for too long: retry later"""
+
+
+def department_caps(config):
+    """{department: cap} from DEPARTMENT_ABSENCE_CAPS ("it:2,hr:1"); 0 means no limit"""
+    caps = {}
+    for item in config.get("DEPARTMENT_ABSENCE_CAPS", "").split(","):
+        if ":" in item:
+            department, cap = item.split(":", 1)
+            caps[department.strip()] = int(cap)
+    return caps
+
+
+def department_cap(department):
+    config = current_app.config
+    return department_caps(config).get(department, config.get("DEFAULT_ABSENCE_CAP", 0))
+
+
+def _ordinal(value):
+    return value.toordinal() if isinstance(value, (datetime, date)) else int(value)
+
+
+class DepartmentAbsences:
+    def __init__(self):
+        self.trees = {}
+        self.entries = {}  # request id -> (department, first, last)
+        self.version = None
+        self.built_at = 0
+        self.horizon = None
+        self._lock = Lock()
+
+    def _fresh(self):
+        if self.version is None:
+            return False
+        if time.monotonic() - self.built_at > current_app.config.get("ABSENCE_INDEX_TTL", 300):
+            return False
+        return get_versions("leave")["leave"][0] == self.version
+
+    def _rebuild(self):
+        version = get_versions("leave")["leave"][0]
+        today = date.today().toordinal()
+        self.trees = {}
+        self.entries = {}
+        self.horizon = (today, today + HORIZON_DAYS)
+
+        # Served by the (status, end_date, start_date) index: only requests not over yet
+        requests = list(get_leave_collection().find({
+            "status": {"$in": list(ABSENCE_STATUSES)},
+            "end_date": {"$gte": datetime.combine(date.today(), datetime.min.time())},
+        }, {"employee_id": 1, "start_date": 1, "end_date": 1}))
+        departments = {
+            user["_id"]: user.get("department") or DEFAULT_DEPARTMENT
+            for user in get_employee_collection().find(
+                {"_id": {"$in": list({r["employee_id"] for r in requests})}}, {"department": 1}
+            )
+        }
+        for r in requests:
+            self._insert(r["_id"], departments.get(r["employee_id"], DEFAULT_DEPARTMENT),
+                         _ordinal(r["start_date"]), _ordinal(r["end_date"]))
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def _tree(self, department):
+        tree = self.trees.get(department)
+        if tree is None:
+            tree = self.trees[department] = MaxAddTree(*self.horizon)
+        return tree
+
+    def _insert(self, request_id, department, first, last):
+        if request_id in self.entries:
+            return
+        self.entries[request_id] = (department, first, last)
+        self._tree(department).add(first, last, 1)
+
+    def _check_and_insert(self, request_id, department, cap, first, last):
+        with self._lock:
+            if not self._fresh():
+                self._rebuild()
+            busiest = self._tree(department).max(first, last)
+            if busiest >= cap:
+                raise AbsenceLimitExceeded(
+                    f"Department '{department}' already has {busiest} employee(s) off during this period "
+                    f"(limit {cap})"
+                )
+            self._insert(request_id, department, first, last)
+
+    @contextmanager
+    def reserve(self, request_id, department, start, end):
+        """
+        Count a new request against its department's cap, or raise
+        AbsenceLimitExceeded naming the cap; a no-op for uncapped departments.
+
+        The body must insert the request and sync() the version it bumped:
+        it runs under the department's lease, and the reservation is dropped
+        if it raises.
+        """
+        cap = department_cap(department)
+        if not cap:
+            yield
+            return
+        config = current_app.config
+        lease = LeaderLease(f"absences:{department}", ttl=config.get("ABSENCE_LOCK_TTL", 30))
+        deadline = time.monotonic() + config.get("ABSENCE_LOCK_TIMEOUT", 5)
+        while not lease.try_acquire():
+            if time.monotonic() >= deadline:
+                raise AbsenceCheckBusy(f"Leave requests of department '{department}' are busy, try again")
+            time.sleep(0.05)
+        try:
+            self._check_and_insert(request_id, department, cap, _ordinal(start), _ordinal(end))
+            try:
+                yield
+            except Exception:
+                self.release(request_id)
+                with self._lock:
+                    self.version = None
+                raise
+        finally:
+            lease.release()
+
+    def release(self, request_id):
+        """Stop counting a rejected or cancelled request"""
+        with self._lock:
+            entry = self.entries.pop(request_id, None)
+            if entry is not None:
+                department, first, last = entry
+                self._tree(department).add(first, last, -1)
+
+    def sync(self, version):
+        """
+        Record the "leave" version produced by a change this process just
+        applied; any other jump means another process changed requests too.
+        """
+        with self._lock:
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+            else:
+                self.version = None
+
+
+absences = DepartmentAbsences()
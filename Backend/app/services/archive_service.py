@@ -2,6 +2,8 @@ from datetime import datetime
 from bson import ObjectId
 from gridfs import GridFS
 from ..utils.mongo import get_db
+from .dashboard_service import increment_counter, move_counter
+from ..utils.versioning import bump_version
 
 class ArchiveService:
     def __init__(self):
@@ -32,6 +34,8 @@ class ArchiveService:
         }
 
         result = self.db.documents.insert_one(doc)
+        increment_counter("archive", "archived")
+        bump_version("archive")
         return str(result.inserted_id)
 
     def get_archived_documents(self, filters=None):
@@ -52,7 +56,11 @@ class ArchiveService:
                 "restored_by": user_id
             }}
         )
-        return result.modified_count > 0
+        if result.modified_count == 0:
+            return False
+        move_counter("archive", "archived", "active")
+        bump_version("archive")
+        return True
 
     def delete_document(self, doc_id, force=False):
         """Permanently delete a document"""
@@ -71,5 +79,8 @@ class ArchiveService:
             pass  # File might already be gone
 
         # Delete metadata
-        self.db.documents.delete_one({"_id": ObjectId(doc_id)})
+        result = self.db.documents.delete_one({"_id": ObjectId(doc_id)})
+        if result.deleted_count:
+            increment_counter("archive", doc.get("status"), -1)
+            bump_version("archive")
         return True
\ No newline at end of file
@@ -0,0 +1,121 @@
+from datetime import datetime
+import logging
+from pymongo.errors import DuplicateKeyError
+from ..utils.mongo import (
+    get_counters_collection,
+    get_license_collection,
+    get_invoice_collection,
+    get_leave_collection,
+    get_todo_collection,
+    get_vehicle_collection,
+    get_db,
+)
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_ID = "dashboard"
+RECONCILE_ATTEMPTS = 3
+
+
+def _counter_key(section, state):
+    # Mongo field names cannot contain dots or start with "$"
+    state = str(state or "unknown").replace(".", "_").lstrip("$")
+    return f"{section}.{state}"
+
+
+def increment_counter(section, state, amount=1):
+    """Atomically add `amount` to a single dashboard counter"""
+    get_counters_collection().update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": {_counter_key(section, state): amount, f"{section}.total": amount, "seq": 1},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+
+def move_counter(section, old_state, new_state):
+    """Move one item from `old_state` to `new_state` in a single $inc"""
+    if old_state == new_state:
+        return
+    get_counters_collection().update_one(
+        {"_id": DASHBOARD_ID},
+        {
+            "$inc": {
+                _counter_key(section, old_state): -1,
+                _counter_key(section, new_state): 1,
+                "seq": 1
+            },
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+
+def get_dashboard_summary():
+    """Return the counters document (single _id lookup)"""
+    summary = get_counters_collection().find_one({"_id": DASHBOARD_ID}, {"_id": 0, "seq": 0})
+    if summary is None:
+        summary = reconcile_counters()
+    return summary
+
+
+def _count_by_state(collection, field):
+    pipeline = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+    counts = {}
+    total = 0
+    for row in collection.aggregate(pipeline):
+        state = str(row["_id"] or "unknown").replace(".", "_").lstrip("$")
+        counts[state] = counts.get(state, 0) + row["count"]
+        total += row["count"]
+    counts["total"] = total
+    return counts
+
+
+def _recount():
+    from ..utils.notifications import get_upcoming_expirations
+
+    db = get_db()
+    return {
+        "licenses": _count_by_state(get_license_collection(), "status"),
+        "invoices": _count_by_state(get_invoice_collection(), "status"),
+        "leave": _count_by_state(get_leave_collection(), "status"),
+        "todos": _count_by_state(get_todo_collection(), "status"),
+        "archive": _count_by_state(db.documents, "status"),
+        "vehicles": {
+            "total": get_vehicle_collection().estimated_document_count(),
+            "expiring_soon": len(get_upcoming_expirations())
+        },
+        "updated_at": datetime.utcnow(),
+        "reconciled_at": datetime.utcnow()
+    }
+
+
+def reconcile_counters():
+    """
+    Recompute every counter from the source collections. Corrects any drift
+    from failed writes and picks up time-based changes (e.g. vehicle
+    documents entering the warning window).
+
+    Every counter update also increments `seq`. The recount is written with
+    a $set guarded on the seq read before counting, so an $inc landing
+    during the recount is never overwritten: the recount is retried instead.
+    """
+    counters = get_counters_collection()
+    for _ in range(RECONCILE_ATTEMPTS):
+        current = counters.find_one({"_id": DASHBOARD_ID}, {"seq": 1}) or {}
+        seq = current.get("seq", {"$exists": False})
+        summary = _recount()
+        try:
+            result = counters.update_one(
+                {"_id": DASHBOARD_ID, "seq": seq},
+                {"$set": summary},
+                upsert=not current
+            )
+        except DuplicateKeyError:
+            continue  # created by a concurrent $inc since we looked
+        if result.matched_count or result.upserted_id is not None:
+            return summary
+    logger.warning("Dashboard counters changed during each recount; leaving them to the next reconcile")
+    return summary
@@ -0,0 +1,125 @@
+# numpy is imported on use: the leave routes import this module at app load
+from datetime import datetime, timedelta
+from ..utils.mongo import get_employee_collection, get_leave_collection
+
+CALENDAR_STATUSES = ("approved", "pending")
+MAX_CALENDAR_DAYS = 366
+DEFAULT_DEPARTMENT = "general"
+
+
+def _day(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def load_window(start, end, statuses=CALENDAR_STATUSES):
+    """
+    Leave requests overlapping [start, end] in one query, served by the
+    (status, end_date, start_date) index: requests that ended before the
+    window are never read.
+    """
+    return list(get_leave_collection().find({
+        "status": {"$in": list(statuses)},
+        "end_date": {"$gte": start},
+        "start_date": {"$lte": end},
+    }, {"employee_id": 1, "start_date": 1, "end_date": 1, "status": 1}))
+
+
+def occupancy(rows, first_days, last_days, n_rows, n_days):
+    """
+    Boolean rows x days matrix, True where a range covers the day.
+    Ranges are given as day offsets (inclusive) and painted with a
+    difference array + cumulative sum instead of a loop per day.
+    """
+    import numpy as np
+
+    diff = np.zeros((n_rows, n_days + 1), dtype=np.int32)
+    np.add.at(diff, (rows, first_days), 1)
+    np.add.at(diff, (rows, last_days + 1), -1)
+    return np.cumsum(diff[:, :-1], axis=1) > 0
+
+
+def runs(matrix):
+    """(row, first day, last day) of each run of True, row by row"""
+    import numpy as np
+
+    padded = np.zeros((matrix.shape[0], matrix.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = matrix
+    edges = np.diff(padded, axis=1)
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)
+    # argwhere is row-major, so the n-th start and the n-th end share a row
+    return zip(starts[:, 0], starts[:, 1], ends[:, 1] - 1)
+
+
+def build_calendar(start, end, statuses=CALENDAR_STATUSES, department=None):
+    """
+    Who is off on each day of [start, end]: daily absence counts (overall,
+    per status and per department) and each employee's merged ranges.
+    """
+    import numpy as np
+
+    start, end = _day(start), _day(end)
+    n_days = (end - start).days + 1
+    if n_days < 1:
+        raise ValueError("end must not be before start")
+    if n_days > MAX_CALENDAR_DAYS:
+        raise ValueError(f"The calendar covers at most {MAX_CALENDAR_DAYS} days")
+
+    requests = load_window(start, end + timedelta(days=1) - timedelta(microseconds=1), statuses)
+    employee_ids = sorted({r["employee_id"] for r in requests})
+    employees = {
+        e["_id"]: e for e in get_employee_collection().find(
+            {"_id": {"$in": employee_ids}}, {"name": 1, "department": 1}
+        )
+    }
+    if department:
+        employee_ids = [i for i in employee_ids if (employees.get(i, {}).get("department") or DEFAULT_DEPARTMENT) == department]
+    row_of = {employee_id: row for row, employee_id in enumerate(employee_ids)}
+    requests = [r for r in requests if r["employee_id"] in row_of]
+
+    # One vector per field, offsets clipped to the window
+    rows = np.fromiter((row_of[r["employee_id"]] for r in requests), dtype=np.int64, count=len(requests))
+    first = np.fromiter(((r["start_date"] - start).days for r in requests), dtype=np.int64, count=len(requests))
+    last = np.fromiter(((r["end_date"] - start).days for r in requests), dtype=np.int64, count=len(requests))
+    first, last = np.clip(first, 0, n_days - 1), np.clip(last, 0, n_days - 1)
+    status = np.array([r["status"] for r in requests], dtype=object)
+
+    n_rows = len(employee_ids)
+    counts = {}
+    absent = np.zeros((n_rows, n_days), dtype=bool)
+    for name in statuses:
+        selected = status == name
+        by_status = occupancy(rows[selected], first[selected], last[selected], n_rows, n_days)
+        counts[name] = by_status.sum(axis=0).tolist()
+        absent |= by_status
+    counts["total"] = absent.sum(axis=0).tolist()
+
+    departments = [employees.get(i, {}).get("department") or DEFAULT_DEPARTMENT for i in employee_ids]
+    names = sorted(set(departments))
+    membership = np.zeros((len(names), n_rows), dtype=np.int32)
+    membership[[names.index(d) for d in departments], np.arange(n_rows)] = 1
+    by_department = membership @ absent.astype(np.int32)
+
+    ranges = {}
+    for row, first_day, last_day in runs(absent):
+        ranges.setdefault(row, []).append([
+            (start + timedelta(days=int(first_day))).strftime("%Y-%m-%d"),
+            (start + timedelta(days=int(last_day))).strftime("%Y-%m-%d"),
+        ])
+
+    return {
+        "start": start.strftime("%Y-%m-%d"),
+        "end": end.strftime("%Y-%m-%d"),
+        "days": [(start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(n_days)],
+        "counts": counts,
+        "departments": {name: by_department[k].tolist() for k, name in enumerate(names)},
+        "employees": [
+            {
+                "id": employee_id,
+                "name": employees.get(employee_id, {}).get("name", ""),
+                "department": departments[row],
+                "ranges": ranges.get(row, []),
+            }
+            for row, employee_id in enumerate(employee_ids)
+        ],
+    }
@@ -3,6 +3,12 @@ from dateutil.relativedelta import relativedelta
 from bson import ObjectId
 import os
 from ..utils.mongo import get_employee_collection, get_leave_collection
+from .dashboard_service import increment_counter, move_counter
+from ..utils.versioning import bump_version
+from ..utils.sync import next_revision
+from ..utils.projections import get_projection
+from ..utils.workdays import business_days, business_days_many
+from .absence_index import absences, DEFAULT_DEPARTMENT
 
 LEAVE_PER_MONTH = 1.5  # Tunisia standard
 
@@ -19,7 +25,7 @@ def get_leave_balance(employee_id):
     except:
         raise Exception("Invalid employee ID format")
     
-    employee = employees.find_one({"_id": employee_id_obj})
+    employee = employees.find_one({"_id": employee_id_obj}, get_projection("users", "balance"))
     if not employee:
         raise Exception("Employee not found")
     
@@ -34,15 +40,15 @@ def get_leave_balance(employee_id):
     if delta.days > 0:
         months_worked += 1
     
-    # Get all approved paid leave days
-    leave_taken = sum(
-        (req['end_date'] - req['start_date']).days + 1
-        for req in leave_requests.find({
-            'employee_id': employee_id_obj,
-            'status': 'approved',
-            'leave_type': 'paid'
-        })
-    )
+    # Get all approved paid leave days (weekends and holidays excluded)
+    taken = list(leave_requests.find({
+        'employee_id': employee_id_obj,
+        'status': 'approved',
+        'leave_type': 'paid'
+    }, {'start_date': 1, 'end_date': 1}))
+    leave_taken = int(business_days_many(
+        [req['start_date'] for req in taken], [req['end_date'] for req in taken]
+    ).sum())
     
     accrued_leave = months_worked * LEAVE_PER_MONTH
     balance = accrued_leave - leave_taken
@@ -66,10 +72,13 @@ def submit_leave_request(employee_id, start_date, end_date, leave_type, reason=N
     if end_date < start_date:
         raise Exception("End date cannot be before start date")
     
-    leave_days = (end_date - start_date).days + 1
+    leave_days = business_days(start_date, end_date)
+    if leave_days == 0:
+        raise Exception("The requested period only covers weekends or public holidays")
     
-    # Check if employee exists
-    if not employees.find_one({"_id": employee_id_obj}):
+    # Check if employee exists (and keep what the admin notification needs)
+    employee_info = employees.find_one({"_id": employee_id_obj}, get_projection("users", "contact"))
+    if not employee_info:
         raise Exception("Employee not found")
     
     # Check for overlapping leave requests
@@ -79,15 +88,14 @@ def submit_leave_request(employee_id, start_date, end_date, leave_type, reason=N
         "$or": [
             {"start_date": {"$lte": end_date}, "end_date": {"$gte": start_date}},
         ]
-    })
+    }, {"_id": 1})
     
     if existing_leave:
         raise Exception("Existing leave request overlaps with this period")
     
-    # Get employee information for the notification
-    employee_info = employees.find_one({"_id": employee_id_obj})
-    
+    request_id = ObjectId()
     leave_request = {
+        "_id": request_id,
         "employee_id": employee_id_obj,
         "start_date": start_date,
         "end_date": end_date,
@@ -97,12 +105,17 @@ def submit_leave_request(employee_id, start_date, end_date, leave_type, reason=N
         "status": "pending",
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
+        "_rev": next_revision("leave"),
         "leave_days": leave_days
     }
     
-    result = leave_requests.insert_one(leave_request)
-    leave_request['_id'] = str(result.inserted_id)
-    leave_request['employee_id'] = employee_id  # Return string version
+    # Department cap on concurrent absences: checked and counted under a
+    # per-department Mongo lease, so submissions from every process are serialized
+    department = employee_info.get("department") or DEFAULT_DEPARTMENT
+    with absences.reserve(request_id, department, start_date, end_date):
+        leave_requests.insert_one(leave_request)
+        absences.sync(bump_version("leave"))
+    increment_counter("leave", "pending")
     
     # Send notification to admin
     try:
@@ -130,7 +143,7 @@ def approve_leave_request(request_id):
         raise Exception(f"Leave request already {leave_request['status']}")
 
     # Get employee email
-    employee = employees.find_one({"_id": leave_request['employee_id']})
+    employee = employees.find_one({"_id": leave_request['employee_id']}, get_projection("users", "contact"))
     if not employee:
         raise Exception("Employee not found")
     employee_email = employee.get('email')
@@ -140,12 +153,17 @@ def approve_leave_request(request_id):
         {
             "$set": {
                 "status": "approved",
+                # Recounted with the calendar in force at approval
+                "leave_days": business_days(leave_request['start_date'], leave_request['end_date']),
                 "updated_at": datetime.utcnow(),
+                "_rev": next_revision("leave"),
             }
         }
     )
     if update_result.modified_count == 0:
         raise Exception("Failed to approve leave request")
+    move_counter("leave", "pending", "approved")
+    absences.sync(bump_version("users", "leave"))
 
     # Return the updated leave request document
     updated_request = leave_requests.find_one({"_id": obj_id})
@@ -166,13 +184,7 @@ def approve_leave_request(request_id):
 def get_employee_leave_requests(employee_id):
     """Get all leave requests for an employee"""
     leave_requests = get_leave_collection()
-    requests = list(leave_requests.find({"employee_id": ObjectId(employee_id)}).sort("created_at", -1))
-    
-    for req in requests:
-        req['_id'] = str(req['_id'])
-        req['employee_id'] = str(req['employee_id'])
-    
-    return requests
+    return list(leave_requests.find({"employee_id": ObjectId(employee_id)}).sort("created_at", -1))
 
 def cancel_leave_request(request_id):
     """Cancel a pending leave request"""
@@ -182,16 +194,18 @@ def cancel_leave_request(request_id):
         {"_id": ObjectId(request_id), "status": "pending"},
         {"$set": {
             "status": "cancelled",
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            "_rev": next_revision("leave")
         }}
     )
     
     if result.modified_count == 0:
         raise Exception("Leave request not found or cannot be cancelled")
+    move_counter("leave", "pending", "cancelled")
+    absences.release(ObjectId(request_id))
+    absences.sync(bump_version("leave"))
     
-    updated_request = leave_requests.find_one({"_id": ObjectId(request_id)})
-    updated_request['_id'] = str(updated_request['_id'])
-    return updated_request
+    return leave_requests.find_one({"_id": ObjectId(request_id)})
 
 
 #####
@@ -252,13 +266,15 @@ def cancel_leave_request(request_id):
         {"_id": ObjectId(request_id), "status": "pending"},
         {"$set": {
             "status": "cancelled",
-            "updated_at": datetime.utcnow()
+            "updated_at": datetime.utcnow(),
+            "_rev": next_revision("leave")
         }}
     )
     
     if result.modified_count == 0:
         raise Exception("Leave request not found or cannot be cancelled")
+    move_counter("leave", "pending", "cancelled")
+    absences.release(ObjectId(request_id))
+    absences.sync(bump_version("leave"))
     
-    updated_request = leave_requests.find_one({"_id": ObjectId(request_id)})
-    updated_request['_id'] = str(updated_request['_id'])
-    return updated_request
\ No newline at end of file
+    return leave_requests.find_one({"_id": ObjectId(request_id)})
\ No newline at end of file
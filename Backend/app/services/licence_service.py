@@ -1,5 +1,4 @@
 from datetime import datetime, timezone
-from apscheduler.schedulers.background import BackgroundScheduler
 from ..utils.mongo import get_license_collection, get_user_collection
 
 # Core license functions
@@ -24,24 +23,55 @@ def calculate_license_status(expiry_date):
     
     return status, days_left
 
+def parse_expiry_date(expiry_date):
+    """Expiry dates are stored as datetimes; older documents may hold strings"""
+    if isinstance(expiry_date, datetime):
+        return expiry_date
+    if isinstance(expiry_date, str):
+        try:
+            return datetime.fromisoformat(expiry_date)
+        except ValueError:
+            return datetime.strptime(expiry_date, "%Y-%m-%d")
+    return None
+
 def update_license_status():
+    """Daily refresh of status and days_until_expiry for every license"""
+    from .dashboard_service import move_counter
+    from ..utils.versioning import bump_version
+    from ..utils.sync import next_revision
+
     collection = get_license_collection()
-    today = datetime.now().date()
+    changed = False
     
-    for license in collection.find():
-        expiry_date = datetime.strptime(license["expiry_date"], "%Y-%m-%d")
+    for license in collection.find({}, {"expiry_date": 1, "status": 1, "days_until_expiry": 1}):
+        try:
+            expiry_date = parse_expiry_date(license.get("expiry_date"))
+        except ValueError:
+            print(f"Invalid expiry date for license {license['_id']}: {license.get('expiry_date')}")
+            continue
+        if expiry_date is None:
+            continue
+
         status, days_left = calculate_license_status(expiry_date)
+        if status == license.get("status") and days_left == license.get("days_until_expiry"):
+            continue
         
         update_data = {
             "status": status,
             "days_until_expiry": days_left,
-            "last_updated": datetime.utcnow()
+            "last_updated": datetime.now(timezone.utc),
+            "_rev": next_revision("licenses")
         }
         
         collection.update_one(
             {"_id": license["_id"]},
             {"$set": update_data}
         )
+        move_counter("licenses", license.get("status"), status)
+        changed = True
+
+    if changed:
+        bump_version("licenses")
 
 def get_admin_emails():
     user_collection = get_user_collection()
@@ -103,12 +133,3 @@ def notify_admins_about_expiring_licenses(app=None):
             else:
                 send_email(email, subject, body)
 
-
-
-def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(update_license_status, "interval", hours=24)
-    scheduler.start()
-
-# Initialize scheduler when module is imported
-start_scheduler()
\ No newline at end of file
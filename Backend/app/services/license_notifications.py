@@ -1,109 +1,59 @@
-from datetime import datetime, timezone
-from ..utils.mongo import get_license_collection, get_user_collection
-from ..utils.mail import send_email
+from datetime import datetime
+from ..utils.mongo import get_license_collection
+from ..utils.alert_ledger import claim_alert, expiry_threshold
+from ..utils.digest import AlertDigest, get_alert_recipients
 
-def get_admin_emails():
-    user_collection = get_user_collection()
-    admins = user_collection.find({"roles": "admin"})
-    return [admin["email"] for admin in admins if admin.get("email")]
-
-def notify_admins_about_expiring_licenses(app=None):
+def notify_admins_about_expiring_licenses(app=None, digest=None):
     """
-    Vérifie les licences sur le point d'expirer (≤10 jours restants) et
-    envoie des notifications par email à tous les administrateurs.
+    Vérifie les licences sur le point d'expirer (≤10 jours restants) et les
+    ajoute au digest des administrateurs (ou à un digest envoyé à la fin).
+    Chaque alerte (licence, seuil, administrateur) n'est envoyée qu'une fois.
     Accepte un paramètre app optionnel pour une utilisation en dehors du contexte Flask.
     """
+    if app is not None:
+        with app.app_context():
+            return notify_admins_about_expiring_licenses(digest=digest)
+
     collection = get_license_collection()
-    today = datetime.now(timezone.utc)
 
     # Licences expirant dans moins de 10 jours mais pas encore expirées
     expiring_licenses = list(collection.find({
         "status": "about_to_expire",
         "days_until_expiry": {"$lte": 10, "$gte": 0}
-    }))
+    }, {"license_name": 1, "license_key": 1, "expiry_date": 1, "days_until_expiry": 1}))
 
     if not expiring_licenses:
         print("Aucune licence sur le point d'expirer trouvée pour notification")
         return
 
-    admin_emails = get_admin_emails()
+    admin_emails = get_alert_recipients()
     
     if not admin_emails:
         print("Aucun email administrateur trouvé pour notification")
         return
 
-    for lic in expiring_licenses:
-        subject = f"⚠️ Alerte d'Expiration de Licence: {lic.get('license_name', 'Inconnue')}"
-        expiry_date = lic["expiry_date"]
-
-        if isinstance(expiry_date, datetime):
-            expiry_date = expiry_date.strftime("%d/%m/%Y")
-
-        body = f"""
-        Cher Administrateur,
-
-        La licence "{lic.get('license_name', 'Inconnue')}" avec la clé {lic.get('license_key')} 
-        expirera le {expiry_date} (dans {lic.get('days_until_expiry')} jours).
-
-        Veuillez prendre les mesures nécessaires.
-
-        Cordialement,
-        Dynamix services
-        """
-
-        for email in admin_emails:
-            # Passe le paramètre app s'il est fourni
-            if app:
-                send_email(email, subject, body, app)
-            else:
-                send_email(email, subject, body)
-    """
-    Check for licenses that are about to expire (≤10 days left) and
-    send email notifications to all admin users.
-    Accepts optional app parameter for use outside Flask context.
-    """
-    collection = get_license_collection()
-    today = datetime.now(timezone.utc)
-
-    # Licenses expiring within 10 days but not expired
-    expiring_licenses = list(collection.find({
-        "status": "about_to_expire",
-        "days_until_expiry": {"$lte": 10, "$gte": 0}
-    }))
-
-    if not expiring_licenses:
-        print("No expiring licenses found for notification")
-        return
-
-    admin_emails = get_admin_emails()
-    
-    if not admin_emails:
-        print("No admin emails found for notification")
-        return
-
-    for lic in expiring_licenses:
-        subject = f"⚠️ License Expiry Alert: {lic.get('license_name', 'Unknown')}"
-        expiry_date = lic["expiry_date"]
-
-        if isinstance(expiry_date, datetime):
-            expiry_date = expiry_date.strftime("%Y-%m-%d")
-
-        body = f"""
-        Cher Administrateur,
-
-        La licence "{lic.get('license_name', 'Inconnue')}" avec la clé {lic.get('license_key')}
-        expirera le {expiry_date} (dans {lic.get('days_until_expiry')} jours).
-
-        Veuillez prendre les mesures nécessaires.
-
-        Cordialement,
-        Dynamix Services
-        """
-
-
-        for email in admin_emails:
-            # Pass the app parameter if provided
-            if app:
-                send_email(email, subject, body, app)
-            else:
-                send_email(email, subject, body)
\ No newline at end of file
+    own_digest = digest is None
+    if own_digest:
+        digest = AlertDigest("Alerte d'Expiration de Licences")
+
+    try:
+        for lic in expiring_licenses:
+            expiry_date = lic["expiry_date"]
+
+            if isinstance(expiry_date, datetime):
+                expiry_date = expiry_date.strftime("%d/%m/%Y")
+
+            line = (
+                f"\"{lic.get('license_name', 'Inconnue')}\" (clé {lic.get('license_key')}) "
+                f"expire le {expiry_date} (dans {lic.get('days_until_expiry')} jours)"
+            )
+
+            threshold = expiry_threshold(lic.get("days_until_expiry"), lic["expiry_date"])
+            for email in admin_emails:
+                alert = (f"licenses:{lic['_id']}", "license_expiry", threshold, email)
+                if claim_alert(*alert):
+                    digest.add(email, "Licences", line, alert)
+    finally:
+        # Alerts claimed before a failure still go out (or are released)
+        if own_digest:
+            digest.send()
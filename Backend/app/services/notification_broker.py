@@ -0,0 +1,100 @@
+from queue import Queue, Full
+from threading import Thread, Event, Lock
+import logging
+from ..utils.mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class StreamLimitReached(Exception):
+    """This worker already serves its maximum number of notification streams"""
+
+
+class NotificationBroker:
+    """
+    Fans out newly created notifications to the SSE streams of this process.
+
+    One daemon thread per worker tails the notifications collection by
+    `seq`, a sequence number allocated with $inc on insert (ObjectIds are
+    not ordered across processes), so a notification inserted by any worker
+    (or the scheduler) reaches every connected client with a single query per
+    poll, whatever the number of open streams. A sequence number is taken
+    before its insert commits, so each poll re-reads the `window` numbers
+    below the last one seen and skips those already delivered.
+    `wake()` lets the inserting process deliver immediately.
+    """
+
+    def __init__(self, poll_interval=2.0, queue_size=100, window=100):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.window = window
+        self._subscribers = set()
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._thread = None
+        self._last_seq = 0
+        self._delivered = set()
+
+    def subscribe(self, limit=None):
+        """A queue receiving new notifications; raises StreamLimitReached past `limit` streams"""
+        subscriber = Queue(maxsize=self.queue_size)
+        with self._lock:
+            if limit and len(self._subscribers) >= limit:
+                raise StreamLimitReached(f"At most {limit} notification streams per worker")
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="notification-broker", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def publish(self, notification):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(notification)
+            except Full:
+                # Slow client: drop the event, it can catch up with Last-Event-ID
+                logger.warning("Dropping notification for a slow SSE subscriber")
+
+    def _poll(self, notifications):
+        floor = max(self._last_seq - self.window, 0)
+        for notification in notifications.find({"seq": {"$gt": floor}}).sort("seq", 1):
+            seq = notification["seq"]
+            if seq in self._delivered:
+                continue
+            self._delivered.add(seq)
+            self._last_seq = max(self._last_seq, seq)
+            self.publish(notification)
+        self._delivered = {seq for seq in self._delivered if seq > self._last_seq - self.window}
+
+    def _run(self):
+        notifications = get_db().notifications
+        latest = notifications.find_one({"seq": {"$exists": True}}, {"seq": 1}, sort=[("seq", -1)])
+        self._last_seq = latest["seq"] if latest else 0
+        # Everything in the window was there before the first subscriber
+        self._delivered = {
+            n["seq"] for n in notifications.find({"seq": {"$gt": max(self._last_seq - self.window, 0)}}, {"seq": 1})
+        }
+
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self._poll(notifications)
+            except Exception as e:
+                logger.error(f"Notification broker poll failed: {str(e)}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+
+broker = NotificationBroker()
@@ -1,14 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
 from ..utils.mongo import get_db
+from ..utils.sync import next_revision
 from bson import ObjectId
 
 class NotificationService:
-    def __init__(self):
-        self.db = get_db()
-        self.notifications = self.db.notifications
+    @property
+    def notifications(self):
+        # Resolved on use so the routes module can be imported before Mongo is initialized
+        return get_db().notifications
         
     def create_notification(self, notification_type, entity_type, entity_id, message, metadata=None):
         """Create a new notification"""
+        from .notification_broker import broker
+
         notification = {
             "type": notification_type,  # 'update', 'expiry', 'creation', 'deletion'
             "entity_type": entity_type,  # 'license' or 'vehicle'
@@ -16,19 +21,34 @@ class NotificationService:
             "message": message,
             "metadata": metadata or {},
             "created_at": datetime.utcnow(),
-            "read": False
+            "read": False,
+            # Stream order: ObjectIds from different processes are not ordered
+            "seq": next_revision("notifications")
         }
-        return self.notifications.insert_one(notification).inserted_id
+        inserted_id = self.notifications.insert_one(notification).inserted_id
+        broker.wake()
+        return inserted_id
     
     def get_unread_notifications(self, limit=10):
         """Get unread notifications"""
         return list(self.notifications.find({"read": False}).sort("created_at", -1).limit(limit))
+
+    def get_unread_count(self):
+        """Count unread notifications (COUNT_SCAN on the read/created_at index)"""
+        return self.notifications.count_documents({"read": False})
     
     def mark_as_read(self, notification_id):
         """Mark notification as read"""
         return self.notifications.update_one(
             {"_id": ObjectId(notification_id)},
-            {"$set": {"read": True}}
+            {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+
+    def mark_all_as_read(self):
+        """Mark every unread notification as read in a single update_many"""
+        return self.notifications.update_many(
+            {"read": False},
+            {"$set": {"read": True, "read_at": datetime.utcnow()}}
         )
     
     def get_recent_notifications(self, days=7, limit=50):
@@ -36,4 +56,22 @@ class NotificationService:
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         return list(self.notifications.find({
             "created_at": {"$gte": cutoff_date}
-        }).sort("created_at", -1).limit(limit))
\ No newline at end of file
+        }).sort("created_at", -1).limit(limit))
+
+    def get_notifications_after(self, seq, until=None, limit=100):
+        """Notifications with a sequence number above `seq` (up to `until`), oldest first"""
+        query = {"$gt": seq}
+        if until is not None:
+            query["$lte"] = until
+        return list(self.notifications.find({"seq": query}).sort("seq", 1).limit(limit))
+
+    def get_latest_seq(self):
+        """Highest sequence number stored so far (0 when there is none)"""
+        latest = self.notifications.find_one({"seq": {"$exists": True}}, {"seq": 1}, sort=[("seq", -1)])
+        return latest["seq"] if latest else 0
+
+
+def ensure_notification_indexes(db):
+    db.notifications.create_index([("created_at", DESCENDING)])
+    db.notifications.create_index([("read", ASCENDING), ("created_at", DESCENDING)])
+    db.notifications.create_index([("seq", ASCENDING)])
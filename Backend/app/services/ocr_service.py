@@ -1,20 +1,25 @@
 from ..shared import extract_all_text
-from PIL import Image
+from ..utils.metrics import timed, OCR_STAGE_LATENCY
 
 def process_ocr(image):
     try:
         # Ensure RGB mode
         if image.mode != 'RGB':
-            image = image.convert('RGB')
+            with timed(OCR_STAGE_LATENCY, stage="convert"):
+                image = image.convert('RGB')
         
         # Extract all text
-        result = extract_all_text(image)
+        with timed(OCR_STAGE_LATENCY, stage="extract"):
+            result = extract_all_text(image)
+        
+        with timed(OCR_STAGE_LATENCY, stage="markdown"):
+            markdown = convert_to_markdown(result['cleaned_text'])
         
         return {
             "success": True,
             "raw_text": result['raw_text'],
             "cleaned_text": result['cleaned_text'],
-            "markdown": convert_to_markdown(result['cleaned_text'])
+            "markdown": markdown
         }
         
     except Exception as e:
@@ -1,71 +1,139 @@
-from datetime import timedelta,timedelta  
-from app.utils.scheduler import scheduler
-from app.utils.email_service import send_email
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from flask import current_app
+from pymongo import ASCENDING
+from app.utils.mongo import get_db, get_todo_collection, get_reminder_collection
+from app.utils.digest import AlertDigest
+
+# Reminder kind -> how long before the due date it fires
+REMINDER_OFFSETS = {
+    "48h": timedelta(hours=48),
+    "30m": timedelta(minutes=30),
+    "due": timedelta(0),
+}
+
+# How long a run may hold a reminder before another run takes it over
+CLAIM_LEASE = timedelta(minutes=10)
+
+def _as_utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
 
 def schedule_task_reminder(task, task_id):
-    """Schedule all reminders for a task"""
-    if task["status"] == "done":
+    """
+    (Re)build the queue entries for a task: one (fire_at, task_id, kind)
+    document per reminder still in the future. The deadline reminder is
+    always queued so an overdue task is reported once.
+    """
+    reminders = get_reminder_collection()
+    task_id = ObjectId(task_id)
+    reminders.delete_many({"task_id": task_id})
+
+    if task.get("status", "pending") == "done" or not task.get("due_date"):
         return  # No reminders for completed tasks
 
-    # 48-hour reminder
-    remind_time_48h = task["due_date"] - timedelta(hours=48)
-    if remind_time_48h > datetime.now():
-        scheduler.add_job(
-            func=send_reminder_email,
-            trigger="date",
-            run_date=remind_time_48h,
-            args=[task, task_id, "48h"],
-            id=f"reminder_48h_{task_id}",
-            replace_existing=True
-        )
+    now = datetime.now(timezone.utc)
+    due_date = _as_utc(task["due_date"])
+    entries = []
+    for kind, offset in REMINDER_OFFSETS.items():
+        fire_at = due_date - offset
+        if fire_at > now or kind == "due":
+            entries.append({
+                "fire_at": fire_at,
+                "task_id": task_id,
+                "kind": kind,
+                "created_at": now
+            })
+    if entries:
+        reminders.insert_many(entries)
 
-    # 30-minute reminder
-    remind_time_30m = task["due_date"] - timedelta(minutes=30)
-    scheduler.add_job(
-        func=send_reminder_email,
-        trigger="date",
-        run_date=remind_time_30m,
-        args=[task, task_id, "30m"],
-        id=f"reminder_30m_{task_id}",
-        replace_existing=True
-    )
+def cancel_task_reminders(task_id):
+    get_reminder_collection().delete_many({"task_id": ObjectId(task_id)})
 
-    # Admin notification at deadline
-    scheduler.add_job(
-        func=send_admin_notification,
-        trigger="date",
-        run_date=task["due_date"],
-        args=[task, task_id],
-        id=f"admin_notification_{task_id}",
-        replace_existing=True
+def claim_due_reminder(now=None, lease=CLAIM_LEASE):
+    """
+    Atomically claim the earliest due reminder (index seek on fire_at). It
+    stays in the queue until its email is sent: a claim left by a crashed
+    run expires after `lease` and the reminder is picked up again.
+    """
+    now = now or datetime.now(timezone.utc)
+    return get_reminder_collection().find_one_and_update(
+        {
+            "fire_at": {"$lte": now},
+            "$or": [{"claimed_until": {"$exists": False}}, {"claimed_until": {"$lt": now}}]
+        },
+        {"$set": {"claimed_until": now + lease}},
+        sort=[("fire_at", ASCENDING)]
     )
 
-def send_reminder_email(task, task_id, reminder_type):
-    """Send reminder email to task owner"""
-    time_left = "48 hours" if reminder_type == "48h" else "30 minutes"
-    subject = f"Task Reminder: '{task['title']}' due in {time_left}"
-    body = f"""
-    Reminder: Your task is due soon!
-    
-    Task: {task['title']}
-    Due: {task['due_date'].strftime('%Y-%m-%d %H:%M')}
-    Time left: {time_left}
-    
-    Description: {task.get('description', 'No description')}
+def process_due_reminders(batch_size=500):
     """
-    send_email(task["user_id"], subject, body)
-
-def send_admin_notification(task, task_id):
-    """Send notification to admin when task is due"""
-    subject = f"Task Due Now: {task['title']}"
-    body = f"""
-    Task Deadline Reached:
-    
-    Title: {task['title']}
-    User ID: {task['user_id']}
-    Due Date: {task['due_date'].strftime('%Y-%m-%d %H:%M')}
-    Status: {task.get('status', 'pending')}
-    
-    Description: {task.get('description', 'No description')}
+    Collect every reminder whose time has come, oldest first, into one
+    digest per recipient. Reminders are removed from the queue once their
+    recipient's email went out; the others are retried on the next run.
     """
-    send_email("admin", subject, body)
\ No newline at end of file
+    now = datetime.now(timezone.utc)
+    reminders = get_reminder_collection()
+    todos = get_todo_collection()
+    digest = AlertDigest("Task Reminders")
+    by_recipient = {}
+    skipped = []
+
+    for _ in range(batch_size):
+        reminder = claim_due_reminder(now)
+        if reminder is None:
+            break
+
+        task = todos.find_one(
+            {"_id": reminder["task_id"]},
+            {"title": 1, "description": 1, "due_date": 1, "status": 1, "user_id": 1}
+        )
+        if not task or task.get("status") == "done":
+            skipped.append(reminder["_id"])
+            continue
+
+        due = task['due_date'].strftime('%Y-%m-%d %H:%M')
+        if reminder["kind"] == "due":
+            recipient = current_app.config.get("ADMIN_EMAIL")
+            section, line = "Deadline reached", f"'{task['title']}' was due {due} (status: {task.get('status', 'pending')})"
+        else:
+            time_left = "48 hours" if reminder["kind"] == "48h" else "30 minutes"
+            recipient = _task_recipient(task)
+            section, line = f"Due in {time_left}", f"'{task['title']}' due {due}"
+        if recipient:
+            digest.add(recipient, section, line)
+            by_recipient.setdefault(recipient, []).append(reminder["_id"])
+        else:
+            skipped.append(reminder["_id"])
+
+    sent = digest.send()
+    done = skipped + [i for recipient in digest.delivered for i in by_recipient[recipient]]
+    retry = [i for recipient, ids in by_recipient.items() if recipient not in digest.delivered for i in ids]
+    if done:
+        reminders.delete_many({"_id": {"$in": done}})
+    if retry:
+        reminders.update_many({"_id": {"$in": retry}}, {"$unset": {"claimed_until": ""}})
+    return sent
+
+def _task_recipient(task):
+    if task.get("user_id"):
+        user = get_db().users.find_one({"_id": task["user_id"]}, {"email": 1})
+        if user and user.get("email"):
+            return user["email"]
+    return current_app.config.get("ADMIN_EMAIL")
+
+def backfill_task_reminders():
+    """Queue reminders for open tasks created before the queue existed"""
+    queued = set(get_reminder_collection().distinct("task_id"))
+    count = 0
+    for task in get_todo_collection().find({"status": {"$ne": "done"}}, {"due_date": 1, "status": 1}):
+        if task["_id"] not in queued:
+            schedule_task_reminder(task, task["_id"])
+            count += 1
+    return count
+
+def ensure_reminder_indexes(db):
+    db.reminders.create_index([("fire_at", ASCENDING)])
+    db.reminders.create_index([("task_id", ASCENDING), ("kind", ASCENDING)])
+    db.todos.create_index([("status", ASCENDING), ("due_date", ASCENDING)])
@@ -1,6 +1,7 @@
 from flask import current_app
 from flask_mail import Message, Mail
 from datetime import datetime
+from .metrics import timed, SMTP_SEND_LATENCY
 
 def send_admin_leave_notification(leave_request, employee_info):
     """Envoyer une notification par email à l'administrateur concernant une nouvelle demande de congé"""
@@ -59,7 +60,8 @@ def send_admin_leave_notification(leave_request, employee_info):
             body=body,
             sender=current_app.config.get('MAIL_DEFAULT_SENDER')
         )
-        mail.send(msg)
+        with timed(SMTP_SEND_LATENCY):
+            mail.send(msg)
         return True
     except Exception as e:
         current_app.logger.error(f"Échec de l'envoi de la notification admin: {str(e)}")
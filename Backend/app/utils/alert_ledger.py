@@ -0,0 +1,62 @@
+from datetime import datetime
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from .mongo import get_alert_ledger_collection
+
+# Days-before-expiry thresholds: an expiring item is alerted once when it
+# enters each window (10 days, then 3, then the last day)
+EXPIRY_THRESHOLDS = (10, 3, 1)
+
+# Ledger entries are only needed while the alert could still repeat
+LEDGER_RETENTION_DAYS = 400
+
+
+def expiry_threshold(days_until_expiry, expiry_date):
+    """
+    Smallest threshold window the item is in, tagged with its expiry date
+    so that a renewed document or license is alerted again. None when the
+    item is not within any window yet.
+    """
+    window = next((t for t in sorted(EXPIRY_THRESHOLDS) if days_until_expiry <= t), None)
+    if window is None:
+        return None
+    if isinstance(expiry_date, datetime):
+        expiry_date = expiry_date.strftime("%Y-%m-%d")
+    return f"{window}d@{expiry_date}"
+
+
+def claim_alert(entity, kind, threshold, recipient):
+    """
+    Record that an alert is being sent. Returns False if this exact alert
+    (entity, kind, threshold, recipient) already went out, in which case
+    the caller must not send it again.
+    """
+    try:
+        get_alert_ledger_collection().insert_one({
+            "entity": entity,
+            "kind": kind,
+            "threshold": threshold,
+            "recipient": recipient,
+            "sent_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def release_alert(entity, kind, threshold, recipient):
+    """Forget a claimed alert whose email failed, so the next run retries it"""
+    get_alert_ledger_collection().delete_one({
+        "entity": entity,
+        "kind": kind,
+        "threshold": threshold,
+        "recipient": recipient
+    })
+
+
+def ensure_alert_indexes(db):
+    db.alert_ledger.create_index(
+        [("entity", ASCENDING), ("kind", ASCENDING), ("threshold", ASCENDING), ("recipient", ASCENDING)],
+        unique=True
+    )
+    db.alert_ledger.create_index("sent_at", expireAfterSeconds=LEDGER_RETENTION_DAYS * 86400)
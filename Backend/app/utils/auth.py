@@ -0,0 +1,123 @@
+import time
+from functools import wraps
+import jwt
+from bson import ObjectId
+from bson.errors import InvalidId
+from threading import Lock
+from flask import g, request, jsonify, current_app
+from .cache import ResponseCache
+from .mongo import get_user_collection
+
+# Token -> Principal, shared by the requests of this process. Kept apart from
+# the response caches: not listed in their stats, not cleared with them.
+_principal_cache = None
+_principal_cache_lock = Lock()
+
+
+class Principal:
+    """The verified caller: user id and roles at the time the token was resolved"""
+
+    __slots__ = ("user_id", "email", "roles", "expires_at")
+
+    def __init__(self, user_id, email, roles, expires_at):
+        self.user_id = user_id
+        self.email = email
+        self.roles = frozenset(roles)
+        self.expires_at = expires_at
+
+    def has_role(self, *roles):
+        return bool(self.roles.intersection(roles))
+
+
+def _principals():
+    global _principal_cache
+    with _principal_cache_lock:
+        if _principal_cache is None:
+            _principal_cache = ResponseCache(current_app.config.get("AUTH_CACHE_SIZE", 10000))
+        return _principal_cache
+
+
+def resolve_token(token):
+    """
+    Verify a JWT and load the user's roles; cached per token for at most
+    AUTH_CACHE_TTL seconds (and never past the token's expiry).
+    Raises jwt.InvalidTokenError when the token or its user is not valid.
+    """
+    cache = _principals()
+    principal = cache.get(token)
+    if principal is not None:
+        return principal
+
+    generation = cache.generation
+    claims = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    try:
+        user_id = ObjectId(claims["user_id"])
+    except (KeyError, TypeError, InvalidId):
+        raise jwt.InvalidTokenError("Token has no valid user_id")
+
+    user = get_user_collection().find_one({"_id": user_id}, {"email": 1, "roles": 1})
+    if user is None:
+        raise jwt.InvalidTokenError("Unknown user")
+
+    expires_at = claims.get("exp", time.time() + current_app.config.get("AUTH_CACHE_TTL", 60))
+    principal = Principal(user_id, user.get("email"), user.get("roles", []), expires_at)
+    ttl = min(current_app.config.get("AUTH_CACHE_TTL", 60), expires_at - time.time())
+    if ttl > 0:
+        cache.set(token, principal, ttl, generation)
+    return principal
+
+
+def forget_user(user_id):
+    """Drop the cached principals of a user, e.g. after their roles changed"""
+    user_id = ObjectId(user_id)
+    _principals().discard(lambda principal: principal.user_id == user_id)
+
+
+def current_user_id():
+    """Id of the verified caller, or None"""
+    principal = g.get("principal")
+    return principal.user_id if principal else None
+
+
+def _authenticate():
+    # Routes decide whether a principal is required: a stale token sent by the
+    # frontend must not block public routes such as login
+    g.principal = None
+    g.auth_error = None
+    header = request.headers.get("Authorization", "")
+    if request.method == "OPTIONS" or not header.startswith("Bearer "):
+        return
+    try:
+        g.principal = resolve_token(header[len("Bearer "):].strip())
+    except jwt.ExpiredSignatureError:
+        g.auth_error = "Token expired"
+    except jwt.InvalidTokenError as e:
+        g.auth_error = f"Invalid token: {str(e)}"
+
+
+def login_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if g.get("principal") is None:
+            return jsonify({"error": g.get("auth_error") or "Authentication required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def roles_required(*roles):
+    """Allow callers holding any of `roles`"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            principal = g.get("principal")
+            if principal is None:
+                return jsonify({"error": g.get("auth_error") or "Authentication required"}), 401
+            if not principal.has_role(*roles):
+                return jsonify({"error": "Forbidden"}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_auth(app):
+    app.before_request(_authenticate)
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+import time
+from flask import request, current_app, g
+
+_caches = {}
+_caches_lock = Lock()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache whose entries each carry their own expiry"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, generation=None):
+        with self._lock:
+            # Skip results computed before an invalidation landed
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate):
+        """Drop the entries whose value matches `predicate`"""
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+            self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+def _get_cache(namespace, maxsize):
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = _caches[namespace] = ResponseCache(maxsize)
+        return cache
+
+
+def cached(namespace, ttl=60, maxsize=128):
+    """
+    Cache successful GET responses of a view in-process.
+    Entries are keyed by path, query args and the version of the data: the
+    ETag of an enclosing @conditional, else the namespace's version stamp.
+    A write from another process bumps the shared stamp, so this process
+    stops serving its old entry at once; `invalidate(namespace)` from the
+    local write paths also frees the memory.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            cache = _get_cache(namespace, maxsize)
+            validator = g.get("response_validator")
+            if validator is None:
+                from .versioning import get_versions
+                validator = get_versions(namespace)[namespace][0]
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), validator)
+
+            entry = cache.get(key)
+            if entry is not None:
+                body, status, mimetype = entry
+                return current_app.response_class(body, status=status, mimetype=mimetype)
+
+            generation = cache.generation
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, (response.get_data(), response.status_code, response.mimetype), ttl, generation)
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces):
+    """Drop every cached response in the given namespaces"""
+    for namespace in namespaces:
+        cache = _caches.get(namespace)
+        if cache is not None:
+            cache.clear()
+
+
+def cache_stats():
+    """Hit/miss counters for every namespace"""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {namespace: cache.stats() for namespace, cache in caches.items()}
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from flask_mail import Message
+from .mongo import get_user_collection
+from .alert_ledger import release_alert
+from .metrics import timed, SMTP_SEND_LATENCY
+
+
+def get_alert_recipients():
+    """Emails of every admin user, falling back to ADMIN_EMAIL when there are none"""
+    admins = get_user_collection().find(
+        {"$or": [{"role": "admin"}, {"roles": "admin"}], "email": {"$exists": True}},
+        {"email": 1}
+    )
+    emails = sorted({admin["email"] for admin in admins if admin.get("email")})
+    if not emails and current_app.config.get("ADMIN_EMAIL"):
+        emails = [current_app.config["ADMIN_EMAIL"]]
+    return emails
+
+
+class AlertDigest:
+    """
+    Collects the alerts of one run and sends a single email per recipient,
+    all over one SMTP connection.
+
+    Items are grouped by section (vehicle documents, licenses, tasks...) in
+    the body. Each item can carry its alert ledger key, which is released
+    if the recipient's email fails so the next run retries it.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        # recipient -> section -> [(line, alert)]
+        self.items = defaultdict(lambda: defaultdict(list))
+        # Recipients whose email went out in the last send()
+        self.delivered = set()
+
+    def add(self, recipient, section, line, alert=None):
+        self.items[recipient][section].append((line, alert))
+
+    def __len__(self):
+        return sum(len(lines) for sections in self.items.values() for lines in sections.values())
+
+    def render(self, recipient):
+        sections = self.items[recipient]
+        count = sum(len(lines) for lines in sections.values())
+        subject = f"{self.title} - {datetime.utcnow().strftime('%Y-%m-%d')} ({count} alert{'s' if count > 1 else ''})"
+
+        body = ["Bonjour,", ""]
+        for section in sorted(sections):
+            body.append(f"{section} ({len(sections[section])})")
+            body.extend(f"  - {line}" for line, _ in sections[section])
+            body.append("")
+        body += ["Cordialement,", "Dynamix services"]
+        return subject, "\n".join(body)
+
+    def _release(self, recipient):
+        for lines in self.items[recipient].values():
+            for _, alert in lines:
+                if alert:
+                    release_alert(*alert)
+
+    def send(self):
+        """Send every digest; returns the number of emails sent"""
+        if not self.items:
+            return 0
+
+        mail = current_app.extensions.get("mail")
+        if not mail:
+            current_app.logger.error("❌ Mail not initialized")
+            for recipient in self.items:
+                self._release(recipient)
+            return 0
+
+        delivered = self.delivered = set()
+        try:
+            with mail.connect() as connection:
+                for recipient in self.items:
+                    subject, body = self.render(recipient)
+                    try:
+                        with timed(SMTP_SEND_LATENCY):
+                            connection.send(Message(subject=subject, recipients=[recipient], body=body))
+                        delivered.add(recipient)
+                    except Exception as e:
+                        current_app.logger.error(f"❌ Failed to send digest to {recipient}: {e}")
+        except Exception as e:
+            current_app.logger.error(f"❌ SMTP connection failed: {e}")
+
+        for recipient in self.items:
+            if recipient not in delivered:
+                self._release(recipient)
+
+        sent = len(delivered)
+        current_app.logger.info(f"📧 {self.title}: {sent} digest(s) sent for {len(self)} alert(s)")
+        return sent
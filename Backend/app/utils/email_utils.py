@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
 from flask_mail import Message
-from datetime import datetime, timedelta, timezone
 from flask import current_app
-from .mongo import get_todo_collection
+from pymongo import ASCENDING, ReturnDocument
+from .mongo import get_db, get_mail_outbox_collection
+from .metrics import timed, SMTP_SEND_LATENCY
 
 def send_email(to, subject, body):
     """Send an email using Flask-Mail with error logging"""
@@ -12,67 +16,122 @@ def send_email(to, subject, body):
 
     try:
         msg = Message(subject=subject, recipients=[to], body=body)
-        mail.send(msg)
+        with timed(SMTP_SEND_LATENCY):
+            mail.send(msg)
         current_app.logger.info(f"📧 Email sent to {to} | subject: {subject}")
         return True
     except Exception as e:
         current_app.logger.error(f"❌ Failed to send email: {e}")
         return False
 
-def check_due_tasks(app):
-    """Vérifie les tâches bientôt dues ou en retard et envoie des notifications"""
+_mail_executor = None
+_mail_executor_lock = Lock()
+
+
+def _record_outcome(message, status):
+    """Mirror the delivery status on the document the mail is about, if any"""
+    if not message.get("ref_collection"):
+        return
+    from .versioning import bump_version
+
+    get_db()[message["ref_collection"]].update_one(
+        {"_id": message["ref_id"]},
+        {"$set": {"email_status": status, "email_status_at": datetime.utcnow()}}
+    )
+    bump_version(message["ref_collection"])
+
+
+def _claim(message_id=None):
+    """
+    Take the next message due for an attempt: pending ones, and ones left
+    "sending" by a worker that died before finishing (their claim expired)
+    """
+    now = datetime.utcnow()
+    query = {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": now}}
+    if message_id is not None:
+        query["_id"] = message_id
+    return get_mail_outbox_collection().find_one_and_update(
+        query,
+        {
+            "$set": {"status": "sending", "next_attempt_at": now + timedelta(minutes=5)},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _deliver(message):
+    config = current_app.config
+    now = datetime.utcnow()
+    if send_email(message["to"], message["subject"], message["body"]):
+        update, status = {"status": "sent", "sent_at": now}, "sent"
+    elif message["attempts"] >= config.get("MAIL_MAX_ATTEMPTS", 5):
+        update, status = {"status": "failed", "failed_at": now}, "failed"
+    else:
+        # 1, 2, 4, 8... times MAIL_RETRY_SECONDS
+        delay = config.get("MAIL_RETRY_SECONDS", 60) * 2 ** (message["attempts"] - 1)
+        update, status = {"status": "pending", "next_attempt_at": now + timedelta(seconds=delay)}, "retrying"
+    get_mail_outbox_collection().update_one({"_id": message["_id"]}, {"$set": update})
+    _record_outcome(message, status)
+    return status == "sent"
+
+
+def _send_in_context(app, message_id):
     with app.app_context():
-        now = datetime.now(timezone.utc)
-        soon_24h = now + timedelta(hours=24)
-
-        current_app.logger.info(f"🔍 Vérification des tâches : maintenant={now}, bientôt_24h={soon_24h}")
-
-        # Requête pour les tâches bientôt dues ou en retard
-        query = {
-            "$or": [
-                {"due_date": {"$lte": soon_24h, "$gte": now}, "status": "pending"},
-                {"due_date": {"$lt": now}, "status": "pending"}
-            ]
-        }
-
-        tasks = list(get_todo_collection().find(query))
-        current_app.logger.info(f"📋 {len(tasks)} tâche(s) trouvée(s) bientôt dues ou en retard")
-
-        for i, task in enumerate(tasks):
-            due_date = task.get("due_date")
-
-            # Convertir en UTC si datetime naïf
-            if due_date.tzinfo is None:
-                due_date = due_date.replace(tzinfo=timezone.utc)
-
-            status = "EN RETARD" if due_date < now else "À ÉCHÉANCE BIENTÔT"
-            current_app.logger.info(f"   Tâche {i+1}: '{task['title']}' - {status} - échéance {due_date}")
-
-        # Envoi des emails
-        for task in tasks:
-            recipient = app.config.get("ADMIN_EMAIL", "admin@example.com")
-            due_date = task.get("due_date")
-            if due_date.tzinfo is None:
-                due_date = due_date.replace(tzinfo=timezone.utc)
-
-            if due_date < now:
-                subject = f"URGENT : La tâche '{task['title']}' est EN RETARD !"
-                time_status = f"devait être terminée le {due_date.strftime('%Y-%m-%d %H:%M')} (EN RETARD)"
-            else:
-                subject = f"Rappel : La tâche '{task['title']}' est bientôt à échéance"
-                time_status = f"est à rendre le {due_date.strftime('%Y-%m-%d %H:%M')}"
-
-            body = (
-                f"Bonjour,\n\n"
-                f"Votre tâche '{task['title']}' {time_status}.\n"
-                f"Merci de la compléter dès que possible.\n\n"
-                f"Cordialement"
-            )
-
-            current_app.logger.info(f"📨 Tentative d'envoi de notification pour : {task['title']}")
-            success = send_email(recipient, subject, body)
-
-            if success:
-                current_app.logger.info(f"✅ Notification envoyée pour : {task['title']}")
-            else:
-                current_app.logger.error(f"❌ Échec d'envoi de la notification pour : {task['title']}")
+        try:
+            message = _claim(message_id)
+            if message is not None:
+                return _deliver(message)
+        except Exception as e:
+            # The outbox keeps the message: process_mail_outbox retries it
+            current_app.logger.error(f"❌ Mail outbox delivery failed: {e}")
+        return False
+
+
+def queue_email(to, subject, body, ref=None):
+    """
+    Store the message in the mail_outbox collection, then send it in the
+    background (MAIL_SEND_WORKERS threads) so the request does not wait on
+    SMTP. Failed sends, and the ones lost with a recycled worker, are
+    retried by process_mail_outbox up to MAIL_MAX_ATTEMPTS times.
+    `ref` = (collection, _id) gets the outcome in its email_status field
+    (queued, sent, retrying, failed). Returns the outbox id.
+    """
+    global _mail_executor
+    app = current_app._get_current_object()
+    now = datetime.utcnow()
+    message = {
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "ref_collection": ref[0] if ref else None,
+        "ref_id": ref[1] if ref else None,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    }
+    message["_id"] = get_mail_outbox_collection().insert_one(message).inserted_id
+    _record_outcome(message, "queued")
+
+    with _mail_executor_lock:
+        if _mail_executor is None:
+            _mail_executor = ThreadPoolExecutor(app.config.get("MAIL_SEND_WORKERS", 4), thread_name_prefix="mail")
+    _mail_executor.submit(_send_in_context, app, message["_id"])
+    return message["_id"]
+
+
+def process_mail_outbox(batch_size=100):
+    """Retry the queued messages whose next attempt is due; returns how many were sent"""
+    sent = 0
+    for _ in range(batch_size):
+        message = _claim()
+        if message is None:
+            break
+        sent += _deliver(message)
+    return sent
+
+
+def ensure_mail_indexes(db):
+    db.mail_outbox.create_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)])
@@ -0,0 +1,49 @@
+from datetime import date
+from decimal import Decimal
+import orjson
+from bson import ObjectId, Decimal128
+from flask.json.provider import JSONProvider
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Types orjson doesn't encode natively (datetimes, dicts and lists are)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    # Decimals are amounts: as strings, so no digit is lost to a binary float
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+def dumps(obj):
+    return dumps_bytes(obj).decode("utf-8")
+
+
+class MongoJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson. Encodes Mongo documents as they
+    come out of pymongo (ObjectId, datetime, Decimal128 as a string, nested
+    documents) in a single pass, so routes can return them without converting first.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype="application/json")
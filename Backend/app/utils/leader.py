@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from threading import Thread, Event
+import logging
+import os
+import socket
+import uuid
+from pymongo.errors import DuplicateKeyError
+from .mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    """
+    Mongo-backed lease electing a single leader among every process that
+    shares the database (gunicorn workers, other nodes).
+
+    The holder renews the lease every `ttl / 3` seconds. If it dies or loses
+    contact with Mongo, the lease expires after `ttl` seconds and another
+    process takes over on its next heartbeat.
+    """
+
+    def __init__(self, name, ttl=30, on_elected=None, on_demoted=None):
+        self.name = name
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._stop = Event()
+        self._thread = None
+
+    @property
+    def collection(self):
+        return get_db()["leases"]
+
+    def try_acquire(self):
+        """Take or renew the lease; returns True if this process holds it"""
+        now = datetime.utcnow()
+        try:
+            self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"holder": self.holder_id},
+                        {"expires_at": {"$lt": now}}
+                    ]
+                },
+                {"$set": {
+                    "holder": self.holder_id,
+                    "expires_at": now + timedelta(seconds=self.ttl),
+                    "heartbeat_at": now
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # No match and the upsert collided: the lease is held by someone else
+            return False
+        return True
+
+    def release(self):
+        try:
+            self.collection.delete_one({"_id": self.name, "holder": self.holder_id})
+        except Exception as e:
+            logger.error(f"Failed to release lease {self.name}: {str(e)}")
+        self._set_leader(False)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._heartbeat, name=f"lease-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            self.release()
+
+    def _set_leader(self, leader):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        callback = self.on_elected if leader else self.on_demoted
+        logger.info(f"{self.holder_id} {'acquired' if leader else 'lost'} lease {self.name}")
+        if callback:
+            callback()
+
+    def _heartbeat(self):
+        while not self._stop.is_set():
+            try:
+                self._set_leader(self.try_acquire())
+            except Exception as e:
+                # Can't reach Mongo: step down, someone else may already lead
+                logger.error(f"Lease heartbeat for {self.name} failed: {str(e)}")
+                self._set_leader(False)
+            self._stop.wait(self.ttl / 3)
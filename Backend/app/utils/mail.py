@@ -2,6 +2,7 @@ from flask_mail import Message
 from flask import current_app
 from threading import Thread
 from app import mail
+from .metrics import timed, SMTP_SEND_LATENCY
 import smtplib
 
 # -------------------------------
@@ -14,7 +15,8 @@ def send_async_email(app, msg):
     with app.app_context():
         try:
             print(f"📧 Sending email to: {msg.recipients}")
-            mail.send(msg)
+            with timed(SMTP_SEND_LATENCY):
+                mail.send(msg)
             print(f"✅ Email sent successfully to {msg.recipients}")
         except smtplib.SMTPAuthenticationError as e:
             print(f"❌ SMTP Authentication failed: {e}")
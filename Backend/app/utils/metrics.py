@@ -0,0 +1,104 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess
+)
+
+# Prometheus series exposed on /metrics. Under gunicorn, set
+# PROMETHEUS_MULTIPROC_DIR to an empty directory so every worker's samples
+# are aggregated (see gunicorn.conf.py).
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency per route",
+    ["blueprint", "endpoint", "method"]
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total", "Responses per route and status code",
+    ["blueprint", "endpoint", "method", "status"]
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency per collection",
+    ["collection", "command", "outcome"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+)
+SMTP_SEND_LATENCY = Histogram(
+    "smtp_send_duration_seconds", "Time to hand an email to the SMTP server",
+    ["outcome"],
+    buckets=(.1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+OCR_STAGE_LATENCY = Histogram(
+    "ocr_stage_duration_seconds", "OCR pipeline time per stage",
+    ["stage", "outcome"],
+    buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "Password hashing and verification time",
+    ["operation", "outcome"],
+    buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+SCHEDULER_JOB_LATENCY = Histogram(
+    "scheduler_job_duration_seconds", "Scheduled job run time per outcome",
+    ["job", "outcome"],
+    buckets=(.1, .5, 1, 5, 15, 30, 60, 300, 900)
+)
+SCHEDULER_JOB_MISSED = Counter(
+    "scheduler_job_missed_total", "Scheduled runs skipped past their grace time",
+    ["job"]
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the block, labelled outcome=success|error"""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+def timed_job(func):
+    """Record a scheduler job's duration and outcome under its function name"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(SCHEDULER_JOB_LATENCY, job=func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+def _record_request(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        # Label by endpoint, never by raw path, to keep cardinality bounded
+        blueprint = request.blueprint or ""
+        endpoint = request.endpoint or "unmatched"
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(blueprint, endpoint, request.method, response.status_code).inc()
+    return response
+
+
+def metrics_view():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -1,16 +1,69 @@
-from pymongo import MongoClient
+import time
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
 from flask import current_app
+from .mongo_monitoring import pool_stats, command_metrics
+from .query_budget import query_tracker
 
 client = None
 db = None
 
+def client_options(config):
+    """MongoClient keyword arguments built from the MONGO_* settings in Config"""
+    options = {
+        "maxPoolSize": config.get("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": config.get("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": config.get("MONGO_MAX_IDLE_TIME_MS"),
+        "waitQueueTimeoutMS": config.get("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        "serverSelectionTimeoutMS": config.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": config.get("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": config.get("MONGO_SOCKET_TIMEOUT_MS"),
+        "retryWrites": config.get("MONGO_RETRY_WRITES", True),
+        "appname": config.get("MONGO_APPNAME", "erp-backend"),
+    }
+    if config.get("MONGO_COMPRESSORS"):
+        options["compressors"] = config["MONGO_COMPRESSORS"]
+    # Unset values keep the driver defaults
+    return {key: value for key, value in options.items() if value is not None}
+
 def init_mongo(app):
     global client, db
     uri = app.config.get("MONGO_URI")
-    client = MongoClient(uri)
-    db = client[app.config.get("MONGO_DBNAME", "invoice_db")]
+    # Defer connecting until the first operation so app startup never blocks on Mongo
+    client = MongoClient(
+        uri,
+        connect=False,
+        event_listeners=[pool_stats, command_metrics, query_tracker],
+        **client_options(app.config)
+    )
+
+    write_concern = None
+    if app.config.get("MONGO_WRITE_CONCERN"):
+        w = app.config["MONGO_WRITE_CONCERN"]
+        write_concern = WriteConcern(
+            w=int(w) if w.isdigit() else w,
+            j=app.config.get("MONGO_JOURNAL")
+        )
+    read_concern = ReadConcern(app.config["MONGO_READ_CONCERN"]) if app.config.get("MONGO_READ_CONCERN") else None
+
+    db = client.get_database(
+        app.config.get("MONGO_DBNAME", "invoice_db"),
+        write_concern=write_concern,
+        read_concern=read_concern
+    )
     app.mongo_client = client
 
+def warmup_mongo():
+    """
+    Select a server and open a connection ahead of the first request (bounded
+    by serverSelectionTimeoutMS). The driver's background pool maintenance then
+    keeps minPoolSize connections open. Returns the round trip in milliseconds.
+    """
+    start = time.perf_counter()
+    get_db().command("ping")
+    return (time.perf_counter() - start) * 1000
+
 def get_db():
     if db is None:
         raise RuntimeError("MongoDB not initialized")
@@ -40,6 +93,24 @@ def get_archive_collection():
 def get_todo_collection():
     return get_db()["todos"]
 
+def get_counters_collection():
+    return get_db()["counters"]
+
+def get_tombstone_collection():
+    return get_db()["tombstones"]
+
+def get_reminder_collection():
+    return get_db()["reminders"]
+
+def get_alert_ledger_collection():
+    return get_db()["alert_ledger"]
+
+def get_holiday_collection():
+    return get_db()["holidays"]
+
+def get_mail_outbox_collection():
+    return get_db()["mail_outbox"]
+
 
 
 # -------------------------------
@@ -51,4 +122,24 @@ def get_admin_users():
     """
     db = get_db()
     admins = db.users.find({"role": "admin", "email": {"$exists": True}})
-    return [admin for admin in admins if admin.get("email")]
\ No newline at end of file
+    return [admin for admin in admins if admin.get("email")]
+
+
+# -------------------------------
+# Indexes for the routes' hot queries (checked by benchmarks/check_query_plans.py)
+# -------------------------------
+def ensure_query_indexes(db):
+    db.users.create_index([("email", ASCENDING)])
+    db.users.create_index([("roles", ASCENDING)])
+    # Overlap check, balances and per-employee history
+    db.leave_requests.create_index([("employee_id", ASCENDING), ("status", ASCENDING), ("start_date", ASCENDING)])
+    db.leave_requests.create_index([("employee_id", ASCENDING), ("created_at", DESCENDING)])
+    db.leave_requests.create_index([("created_at", DESCENDING)])
+    # Calendar window: requests still running at the window start
+    db.leave_requests.create_index([("status", ASCENDING), ("end_date", ASCENDING), ("start_date", ASCENDING)])
+    db.vehicle_documents.create_index([("created_at", DESCENDING)])
+    db.invoices.create_index([("invoice_date", DESCENDING)])
+    db.invoices.create_index([("status", ASCENDING), ("invoice_date", DESCENDING)])
+    db.licenses.create_index([("expiry_date", ASCENDING)])
+    db.licenses.create_index([("status", ASCENDING), ("expiry_date", ASCENDING)])
+    db.documents.create_index([("status", ASCENDING), ("archived_at", DESCENDING)])
@@ -0,0 +1,105 @@
+from collections import Counter
+from threading import Lock
+from pymongo import monitoring
+from .metrics import MONGO_COMMAND_LATENCY
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Live connection pool figures of this process's MongoClient, per server:
+    open connections, connections in use, threads waiting for one, and
+    checkout failures (e.g. waitQueueTimeoutMS reached).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._stats = {}
+
+    def _server(self, event):
+        address = "%s:%s" % event.address
+        if address not in self._stats:
+            self._stats[address] = Counter()
+        return self._stats[address]
+
+    def _add(self, event, **deltas):
+        with self._lock:
+            self._server(event).update(deltas)
+
+    def pool_created(self, event):
+        self._add(event, pools_created=1)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(event, pools_cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(event, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(event, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(event, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(event, waiting=-1, in_use=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._add(event, in_use=-1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                address: {
+                    key: stats[key]
+                    for key in ("open", "in_use", "waiting", "created", "checkouts",
+                                "checkout_failures", "pools_cleared")
+                }
+                for address, stats in self._stats.items()
+            }
+
+
+def command_collection(event):
+    """Collection a command targets ('' for admin and database commands)"""
+    if event.command_name == "getMore":
+        return event.command.get("collection", "")
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Feeds every command's duration into mongo_command_duration_seconds"""
+
+    def __init__(self):
+        # (connection, request id) -> collection; the finished events don't carry it
+        self._pending = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+    def _observe(self, event, outcome):
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_LATENCY.labels(
+            collection=collection, command=event.command_name, outcome=outcome
+        ).observe(event.duration_micros / 1e6)
+
+
+pool_stats = PoolStats()
+command_metrics = CommandMetrics()
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 from flask import current_app
 from flask_mail import Message, Mail
+from .alert_ledger import claim_alert, expiry_threshold
+from .metrics import timed, SMTP_SEND_LATENCY
 
 
 def parse_date(date_str):
@@ -18,84 +20,64 @@ def parse_date(date_str):
     return None
 
 
-def check_expiring_documents(app):
+def check_expiring_documents(app, digest=None):
+    """
+    Add every vehicle document expiring within 10 days to the admins' digest
+    (or to a digest sent at the end of the check, even when it fails half
+    way, so that no claimed alert is left unsent), once per threshold.
+    """
+    from .digest import AlertDigest, get_alert_recipients
+
+    own_digest = digest is None
     with app.app_context():
+        if own_digest:
+            digest = AlertDigest("Vehicle Document Expiration Alert")
         try:
             print("🔍 Starting expiration check...")
-            from .mongo import get_vehicle_collection
-            vehicle_collection = get_vehicle_collection()
-            
-            # Get current date (ignore the year, we care about relative dates)
-            current_date = datetime.utcnow()
-            warning_date = current_date + timedelta(days=10)
-            
-            print(f"📅 Today's date: {current_date.strftime('%Y-%m-%d')}")
-            print(f"📅 Warning threshold: {warning_date.strftime('%Y-%m-%d')}")
-            print("🔍 Looking for documents expiring within the next 10 days...")
-            
-            # Find all vehicles with documents
-            all_vehicles = list(vehicle_collection.find({}))
-            print(f"🚗 Found {len(all_vehicles)} vehicles total")
-            
-            expiring_vehicles = []
-            
-            for vehicle in all_vehicles:
-                plate = vehicle.get('plate_number', 'N/A')
-                print(f"🔎 Checking vehicle: {plate}")
-                
-                for doc_type in ['insurance', 'vignette', 'vesite']:
-                    expiry_date_str = vehicle.get('documents', {}).get(doc_type, {}).get('expiry_date', '')
-                    
-                    if expiry_date_str:
-                        expiry_date = parse_date(expiry_date_str)
-                        
-                        if expiry_date:
-                            print(f"   📋 {doc_type}: {expiry_date.strftime('%Y-%m-%d')}")
-                            
-                            # Check if expiry date is within the next 10 days
-                            if current_date <= expiry_date <= warning_date:
-                                days_until_expiry = (expiry_date - current_date).days
-                                print(f"   ⚠️  EXPIRING: {doc_type} in {days_until_expiry} days")
-                                
-                                expiring_vehicles.append({
-                                    'plate_number': plate,
-                                    'owner_name': vehicle.get('owner_name', 'N/A'),
-                                    'document_type': doc_type.capitalize(),
-                                    'expiry_date': expiry_date.strftime('%Y-%m-%d'),
-                                    'days_until_expiry': days_until_expiry
-                                })
-                            else:
-                                if expiry_date < current_date:
-                                    print(f"   ✅ {doc_type}: Already expired on {expiry_date.strftime('%Y-%m-%d')}")
-                                else:
-                                    days_until = (expiry_date - current_date).days
-                                    print(f"   ✅ {doc_type}: Expires in {days_until} days (not soon enough)")
-                        else:
-                            print(f"   ❌ {doc_type}: Could not parse date: {expiry_date_str}")
-                    else:
-                        print(f"   ❌ {doc_type}: No expiry date")
-            
-            # Send email if there are expiring documents
-            if expiring_vehicles:
-                print(f"📧 Found {len(expiring_vehicles)} expiring documents. Sending email...")
-                send_expiration_notification(expiring_vehicles)
-            else:
+            expiring_documents = get_upcoming_expirations()
+            if not expiring_documents:
                 print("✅ No expiring documents found within the next 10 days.")
-                
+                return
+
+            recipients = get_alert_recipients()
+            queued = 0
+            for doc in expiring_documents:
+                threshold = expiry_threshold(doc['days_until_expiry'], doc['expiry_date'])
+                line = (
+                    f"{doc['plate_number']} ({doc['owner_name']}) - {doc['document_type']} "
+                    f"expire le {doc['expiry_date']} (dans {doc['days_until_expiry']} jours)"
+                )
+                for recipient in recipients:
+                    alert = (
+                        f"vehicles:{doc['vehicle_id']}:{doc['document_type'].lower()}",
+                        "document_expiry",
+                        threshold,
+                        recipient
+                    )
+                    if claim_alert(*alert):
+                        digest.add(recipient, "Documents de véhicules", line, alert)
+                        queued += 1
+
+            print(f"📧 {len(expiring_documents)} expiring document(s), {queued} new alert(s) for {len(recipients)} recipient(s)")
+
         except Exception as e:
             current_app.logger.error(f"Error checking expiring documents: {str(e)}")
             print(f"❌ Error: {str(e)}")
             import traceback
             traceback.print_exc()
+        finally:
+            if own_digest:
+                digest.send()
 
 
-def send_expiration_notification(expiring_vehicles):
-    """Send email notification about expiring documents."""
+def send_expiration_notification(expiring_vehicles, recipients=None):
+    """Send email notification about expiring documents (to the admins by default). Returns True on success."""
+    from .digest import get_alert_recipients
     try:
         # Initialize Flask-Mail with current app
         mail = Mail(current_app._get_current_object())
+        recipients = recipients or get_alert_recipients()
         
-        recipient = "zineeddinelouati02@gmail.com"
         subject = f"Vehicle Document Expiration Alert - {datetime.utcnow().strftime('%Y-%m-%d')}"
 
         html_body = """
@@ -124,14 +106,17 @@ def send_expiration_notification(expiring_vehicles):
             """
         html_body += "</table></body></html>"
 
-        msg = Message(subject=subject, recipients=[recipient], html=html_body)
-        mail.send(msg)
-        print(f"✅ Email sent successfully to {recipient}")
+        msg = Message(subject=subject, recipients=recipients, html=html_body)
+        with timed(SMTP_SEND_LATENCY):
+            mail.send(msg)
+        print(f"✅ Email sent successfully to {recipients}")
+        return True
 
     except Exception as e:
         current_app.logger.error(f"❌ Email sending failed: {str(e)}")
         import traceback
         traceback.print_exc()
+        return False
 
 
 def get_upcoming_expirations():
@@ -144,7 +129,13 @@ def get_upcoming_expirations():
         
         expiring_documents = []
         
-        all_vehicles = list(vehicle_collection.find({}))
+        all_vehicles = vehicle_collection.find({}, {
+            'plate_number': 1,
+            'owner_name': 1,
+            'documents.insurance.expiry_date': 1,
+            'documents.vignette.expiry_date': 1,
+            'documents.vesite.expiry_date': 1
+        })
         for vehicle in all_vehicles:
             for doc_type in ['insurance', 'vignette', 'vesite']:
                 expiry_date_str = vehicle.get('documents', {}).get(doc_type, {}).get('expiry_date', '')
@@ -0,0 +1,115 @@
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock, Thread
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from .metrics import PASSWORD_HASH_LATENCY, timed
+
+logger = logging.getLogger(__name__)
+
+# hashlib releases the GIL while deriving keys, so a few threads use a few
+# cores; the semaphore bounds the work waiting for them. Under the gevent
+# worker, threads are greenlets: hash in gevent's native thread pool instead
+# so a login does not stall every other request of the worker.
+_executor = None
+_slots = None
+_init_lock = Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing slot is taken: the caller should retry later"""
+
+
+def _pool():
+    global _executor, _slots
+    with _init_lock:
+        if _executor is None:
+            workers = current_app.config.get("PASSWORD_HASH_WORKERS", 2)
+            _slots = BoundedSemaphore(workers + current_app.config.get("PASSWORD_HASH_QUEUE", 32))
+            if _gevent_patched():
+                from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+                _executor = NativeThreadPoolExecutor(workers)
+            else:
+                _executor = ThreadPoolExecutor(workers, thread_name_prefix="password-hash")
+    return _executor, _slots
+
+
+def _gevent_patched():
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def _run(fn, *args):
+    """Run `fn` in the pool and wait for it, holding one of the bounded slots"""
+    executor, slots = _pool()
+    if not slots.acquire(timeout=current_app.config.get("PASSWORD_HASH_TIMEOUT", 10)):
+        raise PasswordHasherBusy("Password hashing queue is full")
+    # Released here rather than from the pool thread, which may not share
+    # the gevent hub of the request
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def _method():
+    return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+@lru_cache(maxsize=8)
+def _hash_prefix(method):
+    # What werkzeug stores before the salt for `method`, defaults filled in
+    # (e.g. "pbkdf2:sha256" -> "pbkdf2:sha256:600000")
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def needs_rehash(stored_hash):
+    """True when the stored hash was made with another method or cost than configured"""
+    return stored_hash.split("$", 1)[0] != _hash_prefix(_method())
+
+
+def _timed_hash(password, method):
+    with timed(PASSWORD_HASH_LATENCY, operation="hash"):
+        return generate_password_hash(password, method=method)
+
+
+def _timed_check(stored_hash, password):
+    with timed(PASSWORD_HASH_LATENCY, operation="verify"):
+        return check_password_hash(stored_hash, password)
+
+
+def hash_password(password):
+    """Hash with PASSWORD_HASH_METHOD in the hashing pool"""
+    return _run(_timed_hash, password, _method())
+
+
+def verify_password(stored_hash, password):
+    """Check a password against its stored hash in the hashing pool"""
+    return _run(_timed_check, stored_hash, password)
+
+
+def _rehash(app, collection, user_id, stored_hash, password):
+    with app.app_context():
+        try:
+            new_hash = _run(_timed_hash, password, _method())
+            # Only replace the hash that was verified, never a newer one
+            collection.update_one(
+                {"_id": user_id, "password": stored_hash},
+                {"$set": {"password": new_hash}}
+            )
+        except PasswordHasherBusy:
+            pass  # the next login retries
+        except Exception as e:
+            logger.error(f"Failed to upgrade password hash of {user_id}: {str(e)}")
+
+
+def upgrade_hash(collection, user_id, stored_hash, password):
+    """
+    After a successful login, re-hash in the background when the method or
+    cost changed, so the login response does not wait for it.
+    """
+    if needs_rehash(stored_hash):
+        app = current_app._get_current_object()
+        Thread(target=_rehash, args=(app, collection, user_id, stored_hash, password), daemon=True).start()
@@ -0,0 +1,111 @@
+"""
+Projection profiles: the fields each kind of view actually emits, applied
+at the Mongo query level so unused fields (password hashes, document paths,
+embedded file payloads) never leave the database.
+"""
+
+VEHICLE_FILES_EXCLUDED = {
+    "documents.insurance.file": 0,
+    "documents.vignette.file": 0,
+    "documents.vesite.file": 0
+}
+
+PROFILES = {
+    "users": {
+        "list": {
+            "name": 1,
+            "email": 1,
+            "roles": 1,
+            "created_at": 1,
+            "contract_type": 1,
+            "contract_expiry": 1,
+            "department": 1
+        },
+        "auth": {
+            "name": 1,
+            "email": 1,
+            "password": 1,
+            "roles": 1,
+            "contract_type": 1,
+            "contract_expiry": 1
+        },
+        "balance": {
+            "created_at": 1,
+            "hire_date": 1
+        },
+        "contact": {
+            "name": 1,
+            "email": 1,
+            "leave_balance": 1,
+            "department": 1
+        }
+    },
+    "leave": {
+        "list": {
+            "employee_id": 1,
+            "start_date": 1,
+            "end_date": 1,
+            "leave_type": 1,
+            "status": 1,
+            "leave_days": 1,
+            "rejection_reason": 1,
+            "created_at": 1,
+            "updated_at": 1
+        },
+        # Personal view shows reason and attached document
+        "detail": None
+    },
+    "vehicles": {
+        "list": VEHICLE_FILES_EXCLUDED,
+        "detail": VEHICLE_FILES_EXCLUDED
+    },
+    "todos": {
+        "list": {
+            "title": 1,
+            "description": 1,
+            "due_date": 1,
+            "status": 1,
+            "created_at": 1
+        }
+    },
+    "invoices": {
+        "list": {
+            "invoice_number": 1,
+            "client_email": 1,
+            "telephone": 1,
+            "total_amount": 1,
+            "invoice_date": 1,
+            "payment_date": 1,
+            "status": 1,
+            "email_status": 1
+        }
+    },
+    "licenses": {
+        "list": {
+            "license_name": 1,
+            "license_key": 1,
+            "purchase_date": 1,
+            "expiry_date": 1,
+            "status": 1,
+            "days_until_expiry": 1
+        }
+    },
+    # The route renames _id to id itself: "id": "$_id" here would need MongoDB 4.4+
+    "archive": {
+        "list": {
+            "title": 1,
+            "original_filename": 1,
+            "archived_at": 1,
+            "content_type": 1,
+            "department": 1,
+            "tags": 1,
+            "description": 1
+        }
+    }
+}
+
+
+def get_projection(collection, view):
+    """Projection for `view` of `collection`; None means the full document"""
+    profile = PROFILES[collection][view]
+    return dict(profile) if profile is not None else None
@@ -0,0 +1,179 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Query log of the request (or tracked block) running in this context
+_current_log = ContextVar("query_log", default=None)
+
+# Where each command keeps its filter, to derive the query shape
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+}
+
+
+def _shape(value):
+    """Keep the structure (keys, operators), drop the values"""
+    if isinstance(value, dict):
+        return {key: _shape(value[key]) for key in sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return [_shape(value[0])] if value else []
+    return "?"
+
+
+def query_shape(command_name, command):
+    """
+    Identify queries that differ only by their values, e.g. the same
+    find on users by _id issued once per row of a list (an N+1).
+    """
+    collection = command.get(command_name)
+    if command_name == "getMore":
+        collection = command.get("collection")
+    if command_name in _FILTER_FIELDS:
+        query = command.get(_FILTER_FIELDS[command_name], {})
+    elif command_name == "aggregate":
+        query = [_shape(stage) for stage in command.get("pipeline", [])]
+    elif command_name in ("update", "delete"):
+        statements = command.get(f"{command_name}s") or [{}]
+        query = statements[0].get("q", {})
+    else:
+        query = {}
+    return f"{command_name} {collection if isinstance(collection, str) else ''} {_shape(query)}"
+
+
+class QueryLog:
+    """
+    Commands issued by one request: count, total time and count per shape.
+    Logs nest: a request log opened inside track_queries() also reports to
+    the enclosing log. With keep_commands, the first command of each shape
+    is kept (e.g. to explain() it).
+    """
+
+    def __init__(self, parent=None, keep_commands=False):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.commands = {} if keep_commands else None
+        self._started = {}
+
+    def start(self, event):
+        shape = query_shape(event.command_name, event.command)
+        self._started[event.request_id] = shape
+        if self.commands is not None and shape not in self.commands:
+            self.commands[shape] = (event.database_name, dict(event.command))
+        if self.parent is not None:
+            self.parent.start(event)
+
+    def finish(self, event):
+        if self.parent is not None:
+            self.parent.finish(event)
+        shape = self._started.pop(event.request_id, None)
+        if shape is None:
+            return
+        self.count += 1
+        self.duration += event.duration_micros / 1e6
+        self.shapes[shape] += 1
+
+    def repeated(self, threshold):
+        """Shapes issued at least `threshold` times, most frequent first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryTracker(monitoring.CommandListener):
+    """Routes command events to the query log of the current context, if any"""
+
+    def started(self, event):
+        log = _current_log.get()
+        if log is not None:
+            log.start(event)
+
+    def succeeded(self, event):
+        log = _current_log.get()
+        if log is not None:
+            log.finish(event)
+
+    def failed(self, event):
+        log = _current_log.get()
+        if log is not None:
+            log.finish(event)
+
+
+query_tracker = QueryTracker()
+
+
+@contextmanager
+def track_queries(keep_commands=False):
+    """Count the Mongo commands issued by the block (in this thread)"""
+    log = QueryLog(parent=_current_log.get(), keep_commands=keep_commands)
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+@contextmanager
+def expect_queries(max_queries=None, max_repeats=None):
+    """
+    Fail (AssertionError) when the block issues more than `max_queries`
+    commands or the same query shape more than `max_repeats` times.
+    Run it against small and large seeded data: a route whose count grows
+    with the data has an N+1.
+
+        with expect_queries(max_queries=3, max_repeats=1):
+            client.get("/api/users/")
+    """
+    with track_queries() as log:
+        yield log
+    if max_queries is not None and log.count > max_queries:
+        raise AssertionError(f"{log.count} queries issued, budget is {max_queries}: {dict(log.shapes)}")
+    if max_repeats is not None and log.repeated(max_repeats + 1):
+        raise AssertionError(f"Repeated query shapes: {log.repeated(max_repeats + 1)}")
+
+
+def _start_request_log():
+    log = QueryLog(parent=_current_log.get())
+    g.query_log = log
+    g.query_log_token = _current_log.set(log)
+
+
+def _check_request_log(app):
+    def check(response):
+        log = g.get("query_log")
+        if log is None:
+            return response
+
+        if app.config.get("QUERY_COUNT_HEADER"):
+            response.headers["X-Query-Count"] = str(log.count)
+            response.headers["X-Query-Time"] = f"{log.duration * 1000:.1f}ms"
+
+        budget = app.config.get("QUERY_BUDGET", 25)
+        if log.count > budget:
+            logger.warning(
+                f"{request.method} {request.path} issued {log.count} Mongo queries "
+                f"(budget {budget}, {log.duration * 1000:.1f}ms)"
+            )
+        for shape, n in log.repeated(app.config.get("QUERY_REPEAT_THRESHOLD", 5)):
+            logger.warning(f"Possible N+1 on {request.method} {request.path}: {n} x {shape}")
+        return response
+    return check
+
+
+def _end_request_log(exc=None):
+    token = g.pop("query_log_token", None)
+    if token is not None:
+        _current_log.reset(token)
+
+
+def init_query_budget(app):
+    app.before_request(_start_request_log)
+    app.after_request(_check_request_log(app))
+    app.teardown_request(_end_request_log)
@@ -1,4 +1,197 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.mongodb import MongoDBJobStore
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.events import EVENT_JOB_MISSED
+from threading import Lock, Thread
+import atexit
+import logging
+from .metrics import timed_job, SCHEDULER_JOB_MISSED
 
-scheduler = BackgroundScheduler()
-scheduler.start()
+logger = logging.getLogger(__name__)
+
+# The single scheduler of this process (see init_scheduler)
+scheduler = None
+scheduler_lease = None
+_app = None
+# Orders resume (after the index build) against pause (on demotion)
+_leadership_lock = Lock()
+
+JOB_DEFAULTS = {
+    # Run a job once after downtime rather than once per missed slot
+    "coalesce": True,
+    "max_instances": 1,
+    # A daily job that missed its slot by < 1h (restart, failover) still runs
+    "misfire_grace_time": 3600
+}
+
+
+# -------------------------------
+# Jobs (module-level so the Mongo jobstore can reference them)
+# -------------------------------
+@timed_job
+def license_status_job():
+    from ..services.licence_service import update_license_status
+    with _app.app_context():
+        update_license_status()
+
+@timed_job
+def daily_alerts_job():
+    """
+    Vehicle documents and licenses, batched per ALERT_DIGEST_GROUPING.
+    Task deadlines are sent by todo_reminders_job from the reminders queue.
+    """
+    from .notifications import check_expiring_documents
+    from .digest import AlertDigest
+    from ..services.license_notifications import notify_admins_about_expiring_licenses
+
+    checks = (check_expiring_documents, notify_admins_about_expiring_licenses)
+    with _app.app_context():
+        if _app.config.get("ALERT_DIGEST_GROUPING", "daily") == "source":
+            for check in checks:
+                check(_app)
+        else:
+            digest = AlertDigest("Daily Alerts")
+            try:
+                for check in checks:
+                    check(_app, digest)
+            finally:
+                # A failing check must not strand the alerts already claimed
+                digest.send()
+
+@timed_job
+def dashboard_reconcile_job():
+    from ..services.dashboard_service import reconcile_counters
+    with _app.app_context():
+        reconcile_counters()
+
+@timed_job
+def mail_outbox_job():
+    from .email_utils import process_mail_outbox
+    with _app.app_context():
+        process_mail_outbox()
+
+@timed_job
+def todo_reminders_job():
+    from ..services.reminder_service import process_due_reminders
+    with _app.app_context():
+        process_due_reminders()
+
+
+# Explicit registry: id -> (function, trigger, trigger args).
+# Daily jobs are staggered so they don't all hit Mongo and SMTP at once.
+# Jobs dropped from this registry are removed from the jobstore on startup.
+JOBS = {
+    "license_status_update": (license_status_job, "cron", {"hour": 0, "minute": 5}),
+    "daily_alerts": (daily_alerts_job, "cron", {"hour": 8, "minute": 0}),
+    "dashboard_counters_reconcile": (dashboard_reconcile_job, "interval", {"minutes": 30, "jitter": 60}),
+    "todo_reminders": (todo_reminders_job, "interval", {"minutes": 1}),
+    "mail_outbox": (mail_outbox_job, "interval", {"minutes": 1}),
+}
+
+
+def _job_signature(job_id, func, trigger, trigger_args):
+    # Stored as the job's name, to tell whether its definition changed
+    return f"{job_id}: {func.__name__} {trigger} {sorted(trigger_args.items())}"
+
+
+def register_jobs(target):
+    """
+    Sync the jobstore with JOBS. Jobs whose definition did not change are
+    left alone, so they keep their next_run_time across restarts and
+    elections; only the lease holder may call this (one scheduler at a
+    time per jobstore).
+    """
+    existing = {}
+    for job in target.get_jobs():
+        if job.id not in JOBS:
+            job.remove()
+        else:
+            existing[job.id] = job
+    for job_id, (func, trigger, trigger_args) in JOBS.items():
+        name = _job_signature(job_id, func, trigger, trigger_args)
+        job = existing.get(job_id)
+        if job is not None and job.name == name:
+            continue
+        target.add_job(func, trigger, id=job_id, name=name, replace_existing=True, **trigger_args)
+
+
+def _build_indexes_then_resume():
+    from .. import ensure_indexes
+    try:
+        ensure_indexes(_app)
+    except Exception as e:
+        logger.error(f"Index build failed: {str(e)}")
+    with _leadership_lock:
+        # Demoted during the build: the next leader runs the jobs
+        if scheduler_lease is None or not scheduler_lease.is_leader:
+            return
+        # Non-leaders never touch the shared jobstore: the scheduler is
+        # started (and the jobs synced) on the first election only
+        if not scheduler.running:
+            scheduler.start(paused=True)
+        register_jobs(scheduler)
+        scheduler.resume()
+
+
+def on_elected():
+    """
+    Leader duties: build indexes (kept off worker startup), then run jobs.
+    The build gets its own thread: on a large collection it can outlast the
+    lease, which the heartbeat thread must keep renewing meanwhile.
+    """
+    Thread(target=_build_indexes_then_resume, name="ensure-indexes", daemon=True).start()
+
+
+def on_demoted():
+    with _leadership_lock:
+        if scheduler.running:
+            scheduler.pause()
+
+
+def get_scheduler():
+    if scheduler is None:
+        raise RuntimeError("Scheduler not initialized")
+    return scheduler
+
+
+def init_scheduler(app):
+    """
+    Build this process's scheduler on a Mongo jobstore. It is started, and
+    resumed, only while this process holds the scheduler lease, so each job
+    fires once across all workers and nodes, and jobs survive restarts.
+    Per-task reminders are not jobs: they live in the reminders queue
+    drained by todo_reminders_job.
+    """
+    global scheduler, scheduler_lease, _app
+    from .leader import LeaderLease
+
+    if scheduler is not None:
+        return scheduler
+
+    _app = app
+    scheduler = BackgroundScheduler(
+        jobstores={
+            "default": MongoDBJobStore(
+                database=app.config.get("MONGO_DBNAME", "invoice_db"),
+                collection="scheduler_jobs",
+                client=app.mongo_client
+            )
+        },
+        executors={"default": ThreadPoolExecutor(app.config.get("SCHEDULER_THREADS", 4))},
+        job_defaults=JOB_DEFAULTS,
+        timezone=app.config.get("SCHEDULER_TIMEZONE", "Africa/Tunis")
+    )
+    scheduler.add_listener(lambda event: SCHEDULER_JOB_MISSED.labels(event.job_id).inc(), EVENT_JOB_MISSED)
+
+    scheduler_lease = LeaderLease(
+        "scheduler",
+        ttl=app.config.get("SCHEDULER_LEASE_SECONDS", 30),
+        on_elected=on_elected,
+        on_demoted=on_demoted
+    )
+    scheduler_lease.start()
+    logger.info("Scheduler initialized with jobs: %s (waiting for leadership)", ", ".join(JOBS))
+
+    # Hand the lease over immediately and shut down scheduler when app exits
+    atexit.register(lambda: (scheduler_lease.stop(), scheduler.running and scheduler.shutdown(wait=False)))
+    return scheduler
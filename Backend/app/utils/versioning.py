@@ -0,0 +1,96 @@
+from datetime import datetime, time as dt_time
+from functools import wraps
+import hashlib
+from flask import request, current_app, g
+from pymongo import ReturnDocument
+from .mongo import get_db
+from .cache import invalidate
+
+
+def get_versions_collection():
+    return get_db()["collection_versions"]
+
+
+def bump_version(*names):
+    """
+    Record a change to each named collection: increments its version stamp
+    and drops the matching response cache namespace. Returns the new version
+    of the last name given.
+    """
+    now = datetime.utcnow()
+    version = None
+    for name in names:
+        stamp = get_versions_collection().find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"updated_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        version = stamp["version"]
+    invalidate(*names)
+    return version
+
+
+def get_versions(*names):
+    """Current (version, updated_at) for each name, in a single query"""
+    stamps = {
+        stamp["_id"]: stamp
+        for stamp in get_versions_collection().find({"_id": {"$in": list(names)}})
+    }
+    return {
+        name: (stamps.get(name, {}).get("version", 0), stamps.get(name, {}).get("updated_at"))
+        for name in names
+    }
+
+
+def conditional(*names):
+    """
+    Emit ETag/Last-Modified for a GET view and answer 304 Not Modified
+    before the view runs when the client copy is still current.
+
+    The validator covers the version stamps of `names`, the request path and
+    query args, and the current UTC day (several views derive fields such as
+    days_until_expiry from today's date).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            versions = get_versions(*names)
+            today = datetime.utcnow().date()
+            fingerprint = "|".join(
+                [request.full_path, today.isoformat()]
+                + [f"{name}:{versions[name][0]}" for name in names]
+            )
+            etag = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+            last_modified = datetime.combine(today, dt_time.min)
+            for _, updated_at in versions.values():
+                if updated_at and updated_at > last_modified:
+                    last_modified = updated_at
+            last_modified = last_modified.replace(microsecond=0)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since:
+                not_modified = request.if_modified_since.replace(tzinfo=None) >= last_modified
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                # @cached views below key their entries on it (see cache.cached)
+                g.response_validator = etag
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
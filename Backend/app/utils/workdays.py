@@ -0,0 +1,131 @@
+"""
+Working-day calendar for leave accounting: configurable weekend days,
+Tunisian public holidays and custom dates (LEAVE_EXTRA_HOLIDAYS and the
+`holidays` collection), compiled once into a numpy.busdaycalendar and
+cached in memory for HOLIDAY_CACHE_TTL seconds.
+
+numpy is imported on use: the leave and user routes import this module at
+app load.
+"""
+from datetime import date, datetime
+from threading import Lock
+import time
+from flask import current_app
+from .mongo import get_holiday_collection
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Fixed-date national holidays in Tunisia (month, day)
+TN_FIXED_HOLIDAYS = [
+    (1, 1),    # Jour de l'an
+    (3, 20),   # Fête de l'indépendance
+    (4, 9),    # Journée des martyrs
+    (5, 1),    # Fête du travail
+    (7, 25),   # Fête de la République
+    (8, 13),   # Fête de la femme
+    (10, 15),  # Fête de l'évacuation
+]
+
+# Religious holidays follow the lunar calendar: expected dates, the official
+# announcement can move them by a day (correct them in the holidays collection)
+TN_RELIGIOUS_HOLIDAYS = [
+    # Aïd el-Fitr (2 jours), Aïd el-Idha (2 jours), Ras el-Am el-Hijri, Mouled
+    "2023-04-21", "2023-04-22", "2023-06-28", "2023-06-29", "2023-07-19", "2023-09-27",
+    "2024-04-10", "2024-04-11", "2024-06-16", "2024-06-17", "2024-07-07", "2024-09-15",
+    "2025-03-30", "2025-03-31", "2025-06-06", "2025-06-07", "2025-06-26", "2025-09-04",
+    "2026-03-20", "2026-03-21", "2026-05-27", "2026-05-28", "2026-06-16", "2026-08-25",
+    "2027-03-09", "2027-03-10", "2027-05-16", "2027-05-17", "2027-06-06", "2027-08-14",
+]
+
+HOLIDAY_YEARS = range(2015, 2036)
+
+_calendar = None
+_expires_at = 0
+_lock = Lock()
+
+
+def tunisian_holidays(years=HOLIDAY_YEARS):
+    days = [date(year, month, day) for year in years for month, day in TN_FIXED_HOLIDAYS]
+    # Fête de la Révolution: 14 janvier until 2020, 17 décembre since 2021
+    days += [date(year, 1, 14) if year <= 2020 else date(year, 12, 17) for year in years]
+    days += [date.fromisoformat(day) for day in TN_RELIGIOUS_HOLIDAYS]
+    return days
+
+
+def _weekmask(weekend):
+    off = {day.strip().capitalize()[:3] for day in weekend.split(",") if day.strip()}
+    return [day not in off for day in WEEKDAYS]
+
+
+def _custom_holidays(config):
+    days = [date.fromisoformat(d.strip()) for d in config.get("LEAVE_EXTRA_HOLIDAYS", "").split(",") if d.strip()]
+    for holiday in get_holiday_collection().find({}, {"date": 1}):
+        value = holiday.get("date")
+        days.append(value.date() if isinstance(value, datetime) else date.fromisoformat(str(value)))
+    return days
+
+
+def compile_calendar(weekend, holidays):
+    """numpy.busdaycalendar with the `weekend` days ("Sat,Sun") and `holidays` off"""
+    import numpy as np
+
+    return np.busdaycalendar(weekmask=_weekmask(weekend), holidays=np.array(holidays, dtype="datetime64[D]"))
+
+
+def work_calendar():
+    """The cached numpy.busdaycalendar, rebuilt after HOLIDAY_CACHE_TTL seconds"""
+    global _calendar, _expires_at
+    with _lock:
+        if _calendar is None or time.monotonic() >= _expires_at:
+            config = current_app.config
+            holidays = _custom_holidays(config)
+            if config.get("LEAVE_HOLIDAY_COUNTRY", "TN") == "TN":
+                holidays += tunisian_holidays()
+            _calendar = compile_calendar(config.get("LEAVE_WEEKEND", "Sat,Sun"), holidays)
+            _expires_at = time.monotonic() + config.get("HOLIDAY_CACHE_TTL", 3600)
+        return _calendar
+
+
+def _days(values):
+    import numpy as np
+
+    # Keep the calendar day of each datetime (leave dates are stored as naive UTC midnights)
+    return np.array(
+        [value.date() if isinstance(value, datetime) else value for value in values],
+        dtype="datetime64[D]"
+    )
+
+
+def business_days_many(starts, ends, calendar=None):
+    """
+    Working days in each inclusive [start, end] range, as an int array
+    (0 when end is before start); `calendar` defaults to work_calendar()
+    """
+    import numpy as np
+
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if calendar is None:
+        calendar = work_calendar()
+    counts = np.busday_count(_days(starts), _days(ends) + np.timedelta64(1, "D"), busdaycal=calendar)
+    return np.maximum(counts, 0)
+
+
+def business_days(start, end, calendar=None):
+    """Working days in the inclusive range [start, end]"""
+    return int(business_days_many([start], [end], calendar)[0])
+
+
+def leave_days_by_employee(requests):
+    """Sum of working days per employee_id over leave request documents"""
+    import numpy as np
+
+    requests = list(requests)
+    counts = business_days_many([r["start_date"] for r in requests], [r["end_date"] for r in requests])
+    index_of = {}
+    rows = np.fromiter(
+        (index_of.setdefault(r["employee_id"], len(index_of)) for r in requests),
+        dtype=np.int64, count=len(requests)
+    )
+    totals = np.bincount(rows, weights=counts, minlength=len(index_of))
+    return dict(zip(index_of, totals.astype(np.int64).tolist()))
@@ -0,0 +1,279 @@
+"""
+Endpoint benchmark: seeds a local mongod with the data generator in
+benchmarks.seed, then drives the hot routes through the Flask test client
+and over concurrent HTTP, and prints p50/p95/p99 latency and throughput per
+endpoint as JSON so runs can be compared over time.
+
+    python -m benchmarks.bench_endpoints --scale 0.01 --requests 200 --concurrency 8 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+from statistics import mean, quantiles
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import jwt
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.seed import add_size_arguments, distributions_from_args, seed, sizes_from_args  # noqa: E402
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 16 * 1024
+
+
+class Call:
+    """One request: method, path, and a form/multipart or JSON body for POSTs"""
+
+    def __init__(self, method, path, form=None, files=None, headers=None, json=None):
+        self.method = method
+        self.path = path
+        self.form = form
+        self.files = files
+        self.headers = headers or {}
+        self.json = json
+
+
+class Fixtures:
+    """Ids sampled from the seeded data, consumed by the write scenarios"""
+
+    def __init__(self, db, rng, secret_key):
+        self.rng = rng
+        self.user_ids = [str(u["_id"]) for u in db.users.find({}, {"_id": 1}).limit(1000)]
+        self.admin_id = str(db.users.find_one({"roles": "admin"}, {"_id": 1})["_id"])
+        self.admin_token = jwt.encode({
+            "user_id": self.admin_id,
+            "exp": datetime.utcnow() + timedelta(days=1)
+        }, secret_key, algorithm="HS256")
+        self.pending_leaves = [str(r["_id"]) for r in db.leave_requests.find({"status": "pending"}, {"_id": 1}).limit(20000)]
+        self.document_ids = [str(d["_id"]) for d in db.documents.find({}, {"_id": 1}).limit(1000)]
+        self.plates = [v["plate_number"][:5] for v in db.vehicle_documents.find({}, {"plate_number": 1}).limit(100)]
+        self.clients = [i["client_email"].split("@")[0] for i in db.invoices.find({}, {"client_email": 1}).limit(100)]
+        self._lock = threading.Lock()
+        self._leave_slot = 0
+
+    def next_leave_dates(self):
+        # Far-future, per-call disjoint ranges so submissions never overlap
+        with self._lock:
+            self._leave_slot += 1
+            slot = self._leave_slot
+        start = datetime(2100, 1, 1) + timedelta(days=slot * 3)
+        return start.strftime("%Y-%m-%d"), (start + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def pop_pending_leave(self):
+        with self._lock:
+            return self.pending_leaves.pop() if self.pending_leaves else None
+
+
+def scenarios(fx):
+    """name -> function(fixtures) returning the next Call"""
+    def leave_submit(fx):
+        start, end = fx.next_leave_dates()
+        return Call("POST", "/api/leave/request", form={
+            "employee_id": fx.rng.choice(fx.user_ids),
+            "start_date": start,
+            "end_date": end,
+            "leave_type": "paid",
+            "reason": "benchmark",
+        })
+
+    def leave_approve(fx):
+        # Once the pending requests run out this measures the 404 path
+        request_id = fx.pop_pending_leave() or str(ObjectId())
+        return Call("POST", f"/api/leave/approve/{request_id}", headers={"Authorization": f"Bearer {fx.admin_token}"})
+
+    def archive_upload(fx):
+        return Call("POST", "/api/archive/documents", form={"title": "benchmark", "department": "it"},
+                    files={"file": ("benchmark.pdf", PDF_BYTES, "application/pdf")})
+
+    return {
+        "users_list": lambda fx: Call("GET", "/api/users/"),
+        "leave_all": lambda fx: Call("GET", "/api/leave/all"),
+        "leave_calendar": lambda fx: Call("GET", f"/api/leave/calendar?year={fx.rng.randint(2022, 2024)}"),
+        "leave_submit": leave_submit,
+        "leave_approve": leave_approve,
+        "invoices_list": lambda fx: Call("GET", "/api/invoices/list"),
+        "invoices_search": lambda fx: Call("GET", "/api/invoices/list?" + urlencode({"search": fx.rng.choice(fx.clients)})),
+        "vehicles_list": lambda fx: Call("GET", f"/api/vehicles/?page={fx.rng.randint(1, 50)}&per_page=20"),
+        "vehicles_search": lambda fx: Call("GET", "/api/vehicles/?" + urlencode({"search": fx.rng.choice(fx.plates)})),
+        "vehicles_expirations": lambda fx: Call("GET", "/api/vehicles/expirations/upcoming"),
+        "licenses_list": lambda fx: Call("GET", "/api/licenses/"),
+        "licenses_alerts": lambda fx: Call("GET", "/api/licenses/alerts"),
+        "archive_upload": archive_upload,
+        "archive_download": lambda fx: Call("GET", f"/api/archive/documents/{fx.rng.choice(fx.document_ids)}/download"),
+    }
+
+
+def summarize(timings, errors, wall_seconds):
+    ordered = sorted(timings)
+    cuts = quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "mean_ms": round(mean(ordered), 2),
+        "max_ms": round(ordered[-1], 2),
+        "throughput_rps": round(len(timings) / wall_seconds, 1) if wall_seconds else None,
+    }
+
+
+# -------------------------------
+# Flask test client (in-process, sequential)
+# -------------------------------
+def run_test_client(app, fx, make_call, count):
+    client = app.test_client()
+    timings, errors = [], 0
+    wall = time.perf_counter()
+    for _ in range(count):
+        call = make_call(fx)
+        data = dict(call.form or {})
+        for field, (filename, content, mimetype) in (call.files or {}).items():
+            data[field] = (BytesIO(content), filename, mimetype)
+        start = time.perf_counter()
+        response = client.open(call.path, method=call.method, data=data or None, json=call.json, headers=call.headers)
+        response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        errors += response.status_code >= 500
+    return summarize(timings, errors, time.perf_counter() - wall)
+
+
+# -------------------------------
+# Concurrent HTTP against a local threaded server
+# -------------------------------
+def encode_body(call):
+    if call.files:
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in (call.form or {}).items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, content, mimetype) in call.files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {mimetype}\r\n\r\n'.encode() + content + b"\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n".encode())
+        return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+    if call.json is not None:
+        return json.dumps(call.json).encode(), "application/json"
+    if call.form is not None:
+        return urlencode(call.form).encode(), "application/x-www-form-urlencoded"
+    return None, None
+
+
+def http_request(base_url, call):
+    body, content_type = encode_body(call)
+    headers = dict(call.headers)
+    if content_type:
+        headers["Content-Type"] = content_type
+    start = time.perf_counter()
+    try:
+        with urlopen(Request(base_url + call.path, data=body, method=call.method, headers=headers)) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        e.read()
+        status = e.code
+    return (time.perf_counter() - start) * 1000, status
+
+
+def run_http(base_url, fx, make_call, count, concurrency):
+    calls = [make_call(fx) for _ in range(count)]
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda call: http_request(base_url, call), calls))
+    wall = time.perf_counter() - wall
+    return summarize([r[0] for r in results], sum(r[1] >= 500 for r in results), wall)
+
+
+def start_server(app):
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint latency benchmark")
+    add_size_arguments(parser)
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in --db")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["test-client", "http", "both"], default="both")
+    parser.add_argument("--only", nargs="*", help="Endpoint names to run (default: all)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # The app reads its settings at import: point it at the benchmark database
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ["MONGO_DBNAME"] = args.db
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["QUERY_COUNT_HEADER"] = "False"
+    # Measure the routes, not the SMTP server
+    os.environ["MAIL_SUPPRESS_SEND"] = "True"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    from app import create_app, ensure_indexes
+    from app.utils.mongo import get_db
+    from app.services.dashboard_service import reconcile_counters
+
+    app = create_app()
+    sizes = sizes_from_args(args)
+    with app.app_context():
+        db = get_db()
+        counts = None
+        if not args.no_seed:
+            counts = seed(db, sizes, args.seed, distributions=distributions_from_args(args))
+        ensure_indexes(app)
+        reconcile_counters()
+        fx = Fixtures(db, random.Random(args.seed), app.config["SECRET_KEY"])
+
+    results = {}
+    server, base_url = start_server(app) if args.mode in ("http", "both") else (None, None)
+    for name, make_call in scenarios(fx).items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = {}
+        if args.mode in ("test-client", "both"):
+            results[name]["test_client"] = run_test_client(app, fx, make_call, args.requests)
+        if server:
+            results[name]["http"] = run_http(base_url, fx, make_call, args.requests, args.concurrency)
+    if server:
+        server.shutdown()
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "db": args.db,
+        "sizes": counts or sizes,
+        "requests_per_endpoint": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
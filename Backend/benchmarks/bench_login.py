@@ -0,0 +1,108 @@
+"""
+Login throughput per password hashing setting: for each --method, stores
+users hashed with it, then fires concurrent logins over HTTP at a local
+threaded server and reports p50/p95/p99 latency and logins per second.
+
+    python -m benchmarks.bench_login --methods pbkdf2:sha256:600000 scrypt:32768:8:1 --workers 4 --requests 400
+
+The hashing pool size (--workers) is fixed per run: compare it with the
+number of CPU cores and the request concurrency.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_endpoints import Call, git_revision, run_http, start_server  # noqa: E402
+
+PASSWORD = "benchmark-password"
+DEFAULT_METHODS = ["pbkdf2:sha256:100000", "pbkdf2:sha256:600000", "scrypt:16384:8:1", "scrypt:32768:8:1"]
+
+
+def create_users(db, method, count):
+    """`count` users whose password was hashed with `method`; returns their emails"""
+    from werkzeug.security import generate_password_hash
+
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    emails = [f"login-bench-{i}@example.com" for i in range(count)]
+    db.users.delete_many({"email": {"$in": emails}})
+    db.users.insert_many([{
+        "name": f"Login Bench {i}",
+        "email": email,
+        # Same salt for every user: the cost per login is what is measured
+        "password": password_hash,
+        "contract_type": "CDI",
+        "contract_expiry": datetime.utcnow() + timedelta(days=365),
+        "created_at": datetime.utcnow(),
+        "roles": ["user"],
+    } for i, email in enumerate(emails)])
+    return emails
+
+
+class LoginCalls:
+    def __init__(self, emails):
+        self.emails = emails
+        self.i = 0
+
+    def __call__(self, fx):
+        self.i += 1
+        return Call("POST", "/api/auth/login", json={"email": self.emails[self.i % len(self.emails)], "password": PASSWORD})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput per password hashing method")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DBNAME", "erp_bench"))
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS, help="werkzeug method strings")
+    parser.add_argument("--workers", type=int, default=2, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Logins per method")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ["MONGO_DBNAME"] = args.db
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["QUERY_COUNT_HEADER"] = "False"
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_QUEUE"] = str(args.concurrency)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    from app import create_app, ensure_indexes
+    from app.utils.mongo import get_db
+
+    app = create_app()
+    server, base_url = start_server(app)
+    results = {}
+    for method in args.methods:
+        # The configured method matches the stored hashes: no rehash during the run
+        app.config["PASSWORD_HASH_METHOD"] = method
+        with app.app_context():
+            ensure_indexes(app)
+            emails = create_users(get_db(), method, args.users)
+        results[method] = run_http(base_url, None, LoginCalls(emails), args.requests, args.concurrency)
+    server.shutdown()
+    with app.app_context():
+        get_db().users.delete_many({"email": {"$regex": "^login-bench-"}})
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "hash_workers": args.workers,
+        "requests_per_method": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Serialization microbenchmark: per-route conversion loop + stdlib json
+(what the routes used to do) versus MongoJSONProvider on 10k-row responses.
+
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from statistics import median
+
+from bson import ObjectId, Decimal128
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.json_provider import dumps_bytes  # noqa: E402
+
+
+def make_rows(count):
+    now = datetime.utcnow()
+    return [{
+        "_id": ObjectId(),
+        "employee_id": ObjectId(),
+        "start_date": now + timedelta(days=i % 300),
+        "end_date": now + timedelta(days=i % 300 + 3),
+        "leave_type": "vacation",
+        "reason": "Family trip",
+        "status": "pending",
+        "created_at": now,
+        "updated_at": now,
+        "leave_days": 4,
+        "amount": Decimal128("1250.50"),
+        "meta": {"tags": ["a", "b"], "processed_by": ObjectId()}
+    } for i in range(count)]
+
+
+def legacy_serialize(rows):
+    def convert(value):
+        if isinstance(value, ObjectId):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Decimal128):
+            return float(value.to_decimal())
+        if isinstance(value, dict):
+            return {k: convert(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [convert(v) for v in value]
+        return value
+    return json.dumps([convert(row) for row in rows]).encode("utf-8")
+
+
+def provider_serialize(rows):
+    return dumps_bytes(rows)
+
+
+def measure(func, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(median(timings), 2), "min_ms": round(min(timings), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {
+        "rows": args.rows,
+        "legacy": measure(legacy_serialize, rows, args.repeat),
+        "provider": measure(provider_serialize, rows, args.repeat)
+    }
+    results["speedup"] = round(results["legacy"]["median_ms"] / results["provider"]["median_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
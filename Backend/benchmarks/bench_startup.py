@@ -0,0 +1,131 @@
+"""
+Startup benchmark: import time of the `app` package (python -X importtime),
+time from interpreter start to the first served request, and a check that
+importing every module starts no threads, and that building the app loads
+none of the heavy optional dependencies. Exits non-zero when a budget is
+exceeded; tests/test_startup.py runs the same checks under pytest.
+
+    python -m benchmarks.bench_startup --import-budget-ms 600 --first-request-budget-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST_SCRIPT = """
+import time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+response = app.test_client().get("/api/health/live")
+assert response.status_code == 200, response.status_code
+print((time.perf_counter() - start) * 1000)
+"""
+
+NO_THREADS_SCRIPT = """
+import importlib, pkgutil, sys, threading
+import app
+for module in pkgutil.walk_packages(app.__path__, "app."):
+    try:
+        importlib.import_module(module.name)
+    except ImportError as e:
+        print(f"skipped {module.name}: {e}", file=sys.stderr)
+print(threading.active_count())
+"""
+
+
+# Imported on use only (OCR, reports, leave calendars): never at app load
+HEAVY_MODULES = ("numpy", "pandas", "cv2", "pytesseract", "PIL", "langchain", "langchain_groq")
+
+HEAVY_MODULES_SCRIPT = """
+import sys
+from app import create_app
+create_app()
+print(",".join(sorted(name for name in %r if name in sys.modules)))
+""" % (HEAVY_MODULES,)
+
+
+def run_python(args, env=None):
+    return subprocess.run(
+        [sys.executable] + args,
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def measure_import_ms():
+    """Cumulative import time of `app` as reported by -X importtime"""
+    result = run_python(["-X", "importtime", "-c", "import app"])
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "app":
+            return int(parts[1]) / 1000
+    raise RuntimeError("app not found in -X importtime output")
+
+
+def measure_first_request_ms():
+    # No scheduler: time-to-first-request of a plain web worker
+    start = time.perf_counter()
+    result = run_python(["-c", FIRST_REQUEST_SCRIPT], env={"SCHEDULER_ENABLED": "False"})
+    in_process = float(result.stdout.strip().splitlines()[-1])
+    return in_process, (time.perf_counter() - start) * 1000
+
+
+def count_import_threads():
+    result = run_python(["-c", NO_THREADS_SCRIPT])
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def heavy_modules_loaded():
+    """HEAVY_MODULES present in sys.modules once the app is built"""
+    result = run_python(["-c", HEAVY_MODULES_SCRIPT], env={"SCHEDULER_ENABLED": "False"})
+    loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    return [name for name in loaded.split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--import-budget-ms", type=float, default=600)
+    parser.add_argument("--first-request-budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    import_ms = min(measure_import_ms() for _ in range(args.runs))
+    first_request = [measure_first_request_ms() for _ in range(args.runs)]
+    threads = count_import_threads()
+    heavy = heavy_modules_loaded()
+
+    results = {
+        "import_ms": round(import_ms, 1),
+        "first_request_in_process_ms": round(min(r[0] for r in first_request), 1),
+        "first_request_wall_ms": round(min(r[1] for r in first_request), 1),
+        "threads_after_import": threads,
+        "heavy_modules_loaded": heavy
+    }
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import took {import_ms:.0f}ms (budget {args.import_budget_ms:.0f}ms)")
+    if results["first_request_wall_ms"] > args.first_request_budget_ms:
+        failures.append(
+            f"first request after {results['first_request_wall_ms']:.0f}ms "
+            f"(budget {args.first_request_budget_ms:.0f}ms)"
+        )
+    if threads != 1:
+        failures.append(f"importing the app started {threads - 1} thread(s)")
+    if heavy:
+        failures.append(f"building the app imported {', '.join(heavy)}")
+
+    results["failures"] = failures
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
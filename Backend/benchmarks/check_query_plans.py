@@ -0,0 +1,257 @@
+"""
+Query-plan regression check: seeds a local mongod with benchmarks.seed,
+drives the hot routes and the scheduler jobs while recording every Mongo
+command they issue, then explains each distinct query shape and fails
+(exit code 1) when one regresses to a collection scan with a filter, a
+blocking in-memory sort, or examines far more documents than it returns.
+
+    python -m benchmarks.check_query_plans --scale 0.02 --output plans.json
+
+Run it against both a small and a large --scale: plans that look fine on a
+few hundred documents can still change as the data grows.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_endpoints import Call, Fixtures, git_revision, run_test_client, scenarios  # noqa: E402
+from benchmarks.seed import add_size_arguments, distributions_from_args, seed, sizes_from_args  # noqa: E402
+
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Fields the driver adds to a command that explain() does not accept
+SESSION_FIELDS = {"$db", "lsid", "$clusterTime", "txnNumber", "autocommit", "startTransaction",
+                  "$readPreference", "readConcern", "writeConcern"}
+
+# Known plans, allowed on purpose: substring of the query shape -> reason
+ALLOWED = {
+    "'$regex'": "case-insensitive substring search (invoices, vehicles) cannot use a B-tree index",
+}
+
+
+def explain_command(command_name, command):
+    """The recorded command, ready to be wrapped in explain"""
+    command = {key: value for key, value in command.items() if key not in SESSION_FIELDS}
+    if command_name in ("update", "delete"):
+        # explain accepts a single statement
+        key = f"{command_name}s"
+        command[key] = command[key][:1]
+    return command
+
+
+def _find(doc, key):
+    """Every value stored under `key`, at any depth"""
+    if isinstance(doc, dict):
+        for name, value in doc.items():
+            if name == key:
+                yield value
+            yield from _find(value, key)
+    elif isinstance(doc, list):
+        for item in doc:
+            yield from _find(item, key)
+
+
+def _stages(plan):
+    """(stage, filter) for every stage of a winning plan"""
+    for node in [plan, *_find(plan, "inputStage"), *(s for stages in _find(plan, "inputStages") for s in stages)]:
+        if isinstance(node, dict) and "stage" in node:
+            yield node["stage"], node.get("filter")
+
+
+def analyze(explain, max_ratio, min_examined):
+    """Problems found in one explain() output, plus the stats they were judged on"""
+    problems = []
+    stages = []
+    for plan in _find(explain, "winningPlan"):
+        # Slot-based engine nests the classic-looking tree under queryPlan
+        stages.extend(_stages(plan.get("queryPlan", plan)))
+    names = [name for name, _ in stages]
+
+    for name, stage_filter in stages:
+        if name == "COLLSCAN" and stage_filter:
+            problems.append("COLLSCAN with a filter")
+        if name == "SORT":
+            problems.append("blocking in-memory SORT")
+
+    examined = returned = 0
+    for stats in _find(explain, "executionStats"):
+        examined += stats.get("totalDocsExamined", 0)
+        returned += stats.get("nReturned", 0)
+    ratio = examined / max(returned, 1)
+    if examined >= min_examined and ratio > max_ratio:
+        problems.append(f"examined {examined} docs for {returned} returned")
+
+    return {
+        "stages": names,
+        "docs_examined": examined,
+        "returned": returned,
+        "problems": sorted(set(problems)),
+    }
+
+
+# -------------------------------
+# Workload
+# -------------------------------
+def route_calls(fx, db):
+    """One call per hot route (the write scenarios included)"""
+    employee_id = fx.rng.choice(fx.user_ids)
+    user = db.users.find_one({}, {"email": 1})
+    calls = {name: make_call(fx) for name, make_call in scenarios(fx).items()}
+    calls.update({
+        "leave_balance": Call("GET", f"/api/leave/balance/{employee_id}"),
+        "leave_employee": Call("GET", f"/api/leave/employee/{employee_id}"),
+        "licenses_expiring": Call("GET", "/api/licenses/expiring"),
+        "archive_list": Call("GET", "/api/archive/documents/archived"),
+        "todos_list": Call("GET", "/api/todos/"),
+        "notifications_list": Call("GET", "/api/notifications/"),
+        "notifications_unread": Call("GET", "/api/notifications/unread-count"),
+        "dashboard_summary": Call("GET", "/api/dashboard/summary"),
+        "auth_login": Call("POST", "/api/auth/login", json={"email": user["email"], "password": "benchmark"}),
+    })
+    return calls
+
+
+def job_calls(app):
+    """The scheduler jobs, feeding an unsent digest so nothing is mailed"""
+    from app.services.dashboard_service import reconcile_counters
+    from app.services.licence_service import update_license_status
+    from app.services.license_notifications import notify_admins_about_expiring_licenses
+    from app.services.reminder_service import process_due_reminders
+    from app.utils.digest import AlertDigest
+    from app.utils.email_utils import process_mail_outbox
+    from app.utils.notifications import check_expiring_documents
+
+    digest = AlertDigest("Query plan check")
+    return {
+        "job_license_status": update_license_status,
+        "job_expiring_documents": lambda: check_expiring_documents(app, digest),
+        "job_expiring_licenses": lambda: notify_admins_about_expiring_licenses(app, digest),
+        "job_reminders": process_due_reminders,
+        "job_mail_outbox": process_mail_outbox,
+        "job_reconcile_counters": reconcile_counters,
+    }
+
+
+def record(app, fx, db):
+    """Query shape -> (sources, database, command) over the whole workload"""
+    from app.utils.query_budget import track_queries
+
+    recorded = {}
+
+    def keep(source, log):
+        for shape, (database, command) in log.commands.items():
+            entry = recorded.setdefault(shape, {"sources": [], "database": database, "command": command})
+            entry["sources"].append(source)
+
+    for name, call in route_calls(fx, db).items():
+        with track_queries(keep_commands=True) as log:
+            run_test_client(app, fx, lambda fx, call=call: call, 1)
+        keep(name, log)
+    with app.app_context():
+        for name, job in job_calls(app).items():
+            with track_queries(keep_commands=True) as log:
+                try:
+                    job()
+                except Exception as e:
+                    print(f"{name} failed: {e}", file=sys.stderr)
+            keep(name, log)
+    return recorded
+
+
+def check(client, recorded, max_ratio, min_examined, allowed):
+    results = {}
+    for shape, entry in sorted(recorded.items()):
+        command_name = shape.split(" ", 1)[0]
+        if command_name not in EXPLAINABLE:
+            continue
+        command = explain_command(command_name, entry["command"])
+        try:
+            explain = client[entry["database"]].command("explain", command, verbosity="executionStats")
+        except Exception as e:
+            results[shape] = {"sources": entry["sources"], "problems": [f"explain failed: {e}"]}
+            continue
+        result = analyze(explain, max_ratio, min_examined)
+        result["sources"] = entry["sources"]
+        reason = next((why for pattern, why in allowed.items() if pattern in shape), None)
+        if result["problems"] and reason:
+            result["allowed"] = reason
+        results[shape] = result
+    return results
+
+
+def run_checks(app, sizes, seed_value=42, distributions=None, reseed=True,
+               max_ratio=10, min_examined=1000, allowed=ALLOWED):
+    """
+    Seed (unless reseed is False), record the workload and explain it.
+    Returns (results per query shape, shapes that regressed).
+    """
+    from app import ensure_indexes
+    from app.utils.mongo import get_db
+    from app.services.dashboard_service import reconcile_counters
+
+    with app.app_context():
+        db = get_db()
+        if reseed:
+            seed(db, sizes, seed_value, distributions=distributions)
+        ensure_indexes(app)
+        reconcile_counters()
+        fx = Fixtures(db, random.Random(seed_value), app.config["SECRET_KEY"])
+        # A due reminder, so the queue's pop query runs too
+        db.reminders.insert_one({"fire_at": datetime.utcnow(), "task_id": ObjectId(), "kind": "due"})
+
+    results = check(app.mongo_client, record(app, fx, db), max_ratio, min_examined, allowed)
+    failures = [shape for shape, result in results.items() if result["problems"] and not result.get("allowed")]
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that hot queries use indexes")
+    add_size_arguments(parser)
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in --db")
+    parser.add_argument("--max-ratio", type=float, default=10, help="Max documents examined per document returned")
+    parser.add_argument("--min-examined", type=int, default=1000, help="Ignore the ratio below this many documents examined")
+    parser.add_argument("--allow", action="append", default=[], metavar="SHAPE",
+                        help="Also accept problems on query shapes containing SHAPE")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ["MONGO_URI"] = args.mongo_uri
+    os.environ["MONGO_DBNAME"] = args.db
+    os.environ["SCHEDULER_ENABLED"] = "False"
+    os.environ["MAIL_SUPPRESS_SEND"] = "True"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    from app import create_app
+
+    app = create_app()
+    sizes = sizes_from_args(args)
+    allowed = {**ALLOWED, **{pattern: "--allow" for pattern in args.allow}}
+    results, failures = run_checks(
+        app, sizes, args.seed, distributions_from_args(args), reseed=not args.no_seed,
+        max_ratio=args.max_ratio, min_examined=args.min_examined, allowed=allowed
+    )
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "db": args.db,
+        "sizes": sizes,
+        "max_ratio": args.max_ratio,
+        "min_examined": args.min_examined,
+        "failures": failures,
+        "queries": results,
+    }
+    print(json.dumps(report, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Synthetic data generator for every ERP collection, shaped like what the
+routes write. Deterministic for a given --seed (ids included), streamed in
+bulk inserts so it scales to millions of rows.
+
+    python -m benchmarks.seed --db erp_bench --scale 0.01
+    python -m benchmarks.seed --db erp_load --scale 10 --set vehicle_expiring_share=0.2
+    python -m benchmarks.seed --db erp_bench --only todos licenses --append --config dist.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+# Row counts at --scale 1
+DEFAULT_SIZES = {
+    "users": 5000,
+    "leave_requests": 500000,
+    "vehicles": 50000,
+    "invoices": 100000,
+    "licenses": 2000,
+    "todos": 20000,
+    "documents": 20000,
+}
+
+# Shape of the data; override with --config file.json and/or --set key=value.
+# Weights need not sum to 1.
+DEFAULT_DISTRIBUTIONS = {
+    "admin_share": 0.01,
+    "contract_types": {"CDI": 60, "CDD": 30, "SIVP": 10},
+    "contract_expiring_share": 0.05,      # contract ends within 30 days
+    "leave_statuses": {"approved": 70, "pending": 15, "rejected": 10, "cancelled": 5},
+    "leave_types": {"paid": 50, "vacation": 20, "sick": 20, "unpaid": 10},
+    "leave_max_days": 5,
+    "vehicle_expiring_share": 0.05,       # document expires within 10 days
+    "vehicle_expired_share": 0.05,
+    "vehicle_missing_date_share": 0.02,
+    # Formats seen in stored expiry strings (all accepted by utils.notifications.parse_date)
+    "vehicle_date_formats": {"%Y-%m-%d": 70, "%d/%m/%Y": 15, "%m/%d/%Y": 5, "%d-%m-%Y": 5, "%Y-%m-%dT%H:%M:%S": 5},
+    "invoice_statuses": {"paid": 60, "pending": 30, "overdue": 10},
+    "license_expiring_share": 0.05,       # within 30 days (about_to_expire)
+    "license_expired_share": 0.05,
+    "todo_statuses": {"pending": 60, "in_progress": 15, "done": 25},
+    "todo_overdue_share": 0.1,
+    "document_statuses": {"archived": 80, "active": 20},
+    "departments": {"general": 40, "hr": 20, "finance": 20, "it": 20},
+    "blob_count": 50,                     # distinct GridFS files shared by the documents
+    "blob_kb": 64,
+}
+
+BATCH_SIZE = 5000
+# Fixed clock for historical data. Expiry-style fields are relative to today
+# (or --today) so the alert windows (10/30 days) are populated whenever the
+# data is loaded; pin --today for byte-identical output.
+EPOCH = datetime(2025, 1, 1)
+
+
+class Generator:
+    """Seeded source of ids, choices and dates"""
+
+    def __init__(self, seed_value, distributions, today=None):
+        self.rng = random.Random(seed_value)
+        self.dist = distributions
+        self.today = (today or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def object_id(self, when):
+        # Timestamp of `when` + seeded bytes: reproducible and sorted like real inserts
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return ObjectId(int(when.timestamp()).to_bytes(4, "big") + self.rng.getrandbits(64).to_bytes(8, "big"))
+
+    def weighted(self, name):
+        options = self.dist[name]
+        return self.rng.choices(list(options), list(options.values()))[0]
+
+    def chance(self, name):
+        return self.rng.random() < self.dist[name]
+
+    def days_ahead(self, expiring_share, expired_share, soon=10, horizon=400):
+        """Days until expiry: `expiring_share` within `soon` days, `expired_share` in the past"""
+        roll = self.rng.random()
+        if roll < expired_share:
+            return -self.rng.randint(1, 90)
+        if roll < expired_share + expiring_share:
+            return self.rng.randint(0, soon)
+        return self.rng.randint(soon + 1, horizon)
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert(collection, rows, batch_size=BATCH_SIZE):
+    count = 0
+    for batch in batched(rows, batch_size):
+        collection.insert_many(batch, ordered=False, bypass_document_validation=True)
+        count += len(batch)
+    return count
+
+
+# -------------------------------
+# Collections
+# -------------------------------
+def gen_users(gen, count):
+    for i in range(count):
+        created_at = EPOCH - timedelta(days=gen.rng.randint(30, 3000), seconds=gen.rng.randint(0, 86399))
+        if gen.chance("contract_expiring_share"):
+            contract_expiry = gen.today + timedelta(days=gen.rng.randint(0, 30))
+        else:
+            contract_expiry = gen.today + timedelta(days=gen.rng.randint(31, 1500))
+        yield {
+            "_id": gen.object_id(created_at),
+            "name": f"Employee {i}",
+            "email": f"employee{i}@example.com",
+            "password": "pbkdf2:sha256:600000$bench$0",
+            "contract_type": gen.weighted("contract_types"),
+            "contract_expiry": contract_expiry,
+            "created_at": created_at,
+            # The first user is always an admin so admin-only paths have a recipient
+            "roles": ["admin"] if i == 0 or gen.chance("admin_share") else ["user"],
+            "department": gen.weighted("departments"),
+        }
+
+
+def gen_leave_requests(gen, user_ids, count):
+    """Non-overlapping ranges per employee, oldest first"""
+    if not user_ids:
+        return
+    per_user, extra = divmod(count, len(user_ids))
+    max_days = gen.dist["leave_max_days"]
+    for index, employee_id in enumerate(user_ids):
+        n = per_user + (index < extra)
+        start = EPOCH - timedelta(days=n * (max_days + 8))
+        for _ in range(n):
+            start += timedelta(days=gen.rng.randint(2, 8))
+            end = start + timedelta(days=gen.rng.randint(0, max_days - 1))
+            created_at = start - timedelta(days=gen.rng.randint(1, 30))
+            yield {
+                "_id": gen.object_id(created_at),
+                "employee_id": employee_id,
+                "start_date": start,
+                "end_date": end,
+                "leave_type": gen.weighted("leave_types"),
+                "reason": "",
+                "document_path": None,
+                "status": gen.weighted("leave_statuses"),
+                "created_at": created_at,
+                "updated_at": created_at + timedelta(days=1),
+                "leave_days": (end - start).days + 1,
+                "_rev": 0,
+            }
+            start = end + timedelta(days=1)
+
+
+def gen_vehicles(gen, count):
+    def expiry():
+        if gen.chance("vehicle_missing_date_share"):
+            return ""
+        days = gen.days_ahead(gen.dist["vehicle_expiring_share"], gen.dist["vehicle_expired_share"], soon=10)
+        return (gen.today + timedelta(days=days)).strftime(gen.weighted("vehicle_date_formats"))
+
+    for i in range(count):
+        created_at = EPOCH - timedelta(minutes=i)
+        yield {
+            "_id": gen.object_id(created_at),
+            "plate_number": f"{gen.rng.randint(100, 250)}TU{i:04d}",
+            "owner_name": f"Owner {i % 3000}",
+            "vehicle_type": gen.rng.choice(["Private", "Utility", "Truck"]),
+            "documents": {
+                doc_type: {"expiry_date": expiry(), "file": ""}
+                for doc_type in ("insurance", "vignette", "vesite")
+            },
+            "visits": {"count": gen.rng.randint(0, 10), "last_visit": ""},
+            "notes": "",
+            "created_at": created_at,
+        }
+
+
+def gen_invoices(gen, count):
+    for i in range(count):
+        invoice_date = EPOCH - timedelta(days=gen.rng.randint(0, 730))
+        yield {
+            "_id": gen.object_id(invoice_date),
+            "invoice_number": f"INV-{i:07d}",
+            "client_email": f"client{i % 5000}@example.com",
+            "telephone": f"+216{gen.rng.randint(20000000, 99999999)}",
+            "total_amount": round(gen.rng.uniform(50, 20000), 2),
+            "invoice_date": invoice_date.strftime("%Y-%m-%d"),
+            "status": gen.weighted("invoice_statuses"),
+        }
+
+
+def gen_licenses(gen, count):
+    today = gen.today.replace(tzinfo=timezone.utc)
+    for i in range(count):
+        days_left = gen.days_ahead(gen.dist["license_expiring_share"], gen.dist["license_expired_share"], soon=30)
+        status = "expired" if days_left < 0 else "about_to_expire" if days_left <= 30 else "active"
+        created_at = today - timedelta(days=gen.rng.randint(30, 700))
+        yield {
+            "_id": gen.object_id(created_at),
+            "license_name": f"License {i}",
+            "license_key": f"KEY-{i:06d}",
+            "purchase_date": created_at,
+            "expiry_date": today + timedelta(days=days_left),
+            "status": status,
+            "days_until_expiry": days_left,
+            "created_at": created_at,
+            "last_updated": today,
+            "_rev": 0,
+        }
+
+
+def gen_todos(gen, count):
+    now = gen.today.replace(tzinfo=timezone.utc)
+    for i in range(count):
+        status = gen.weighted("todo_statuses")
+        if status != "done" and gen.chance("todo_overdue_share"):
+            due_date = now - timedelta(hours=gen.rng.randint(1, 24 * 30))
+        else:
+            due_date = now + timedelta(hours=gen.rng.randint(1, 24 * 60))
+        created_at = min(now, due_date) - timedelta(days=gen.rng.randint(1, 60))
+        yield {
+            "_id": gen.object_id(created_at),
+            "title": f"Task {i}",
+            "description": "",
+            "due_date": due_date,
+            "status": status,
+            "created_at": created_at,
+            "_rev": 0,
+        }
+
+
+def put_blobs(db, gen):
+    from gridfs import GridFS
+    fs = GridFS(db)
+    size = gen.dist["blob_kb"] * 1024
+    return [
+        fs.put(b"%PDF-1.4\n" + gen.rng.randbytes(size), filename=f"document_{i}.pdf")
+        for i in range(max(int(gen.dist["blob_count"]), 1))
+    ]
+
+
+def gen_documents(gen, count, file_ids):
+    for i in range(count):
+        archived_at = EPOCH - timedelta(days=gen.rng.randint(0, 1000))
+        file_id = file_ids[i % len(file_ids)]
+        yield {
+            "_id": gen.object_id(archived_at),
+            "title": f"Document {i}",
+            "description": "",
+            "file_id": str(file_id),
+            "original_filename": f"document_{i}.pdf",
+            "content_type": "application/pdf",
+            "status": gen.weighted("document_statuses"),
+            "archived_at": archived_at,
+            "archived_by": "system",
+            "tags": [],
+            "department": gen.weighted("departments"),
+            "retention_until": None,
+            "meta": {},
+        }
+
+
+# Generator name -> collection the app reads
+COLLECTIONS = {"vehicles": "vehicle_documents"}
+
+
+def seed(db, sizes, seed_value=42, drop=True, distributions=None, only=None, batch_size=BATCH_SIZE, today=None):
+    """
+    Fill `db` with `sizes` rows per collection; returns the inserted counts.
+    `only` restricts generation to some collections (leave requests then
+    attach to the users already in the database).
+    """
+    gen = Generator(seed_value, {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}, today)
+    wanted = [name for name in DEFAULT_SIZES if not only or name in only]
+    if drop:
+        for name in wanted + (["fs.files", "fs.chunks"] if "documents" in wanted else []):
+            db.drop_collection(COLLECTIONS.get(name, name))
+
+    counts = {}
+    for name in wanted:
+        if name == "users":
+            rows = gen_users(gen, sizes["users"])
+        elif name == "leave_requests":
+            user_ids = [user["_id"] for user in db.users.find({}, {"_id": 1}).sort("_id", 1)]
+            rows = gen_leave_requests(gen, user_ids, sizes["leave_requests"])
+        elif name == "documents":
+            rows = gen_documents(gen, sizes["documents"], put_blobs(db, gen))
+        else:
+            rows = globals()[f"gen_{name}"](gen, sizes[name])
+        counts[name] = insert(db[COLLECTIONS.get(name, name)], rows, batch_size)
+    return counts
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def sizes_from_args(args):
+    return {
+        name: max(int((getattr(args, name) or default) * args.scale), 1)
+        for name, default in DEFAULT_SIZES.items()
+    }
+
+
+def distributions_from_args(args):
+    distributions = {}
+    if getattr(args, "config", None):
+        with open(args.config) as f:
+            distributions.update(json.load(f))
+    for item in getattr(args, "set", None) or []:
+        key, _, value = item.partition("=")
+        if key not in DEFAULT_DISTRIBUTIONS:
+            raise SystemExit(f"Unknown distribution '{key}' (one of {', '.join(DEFAULT_DISTRIBUTIONS)})")
+        distributions[key] = json.loads(value)
+    return distributions
+
+
+def add_size_arguments(parser):
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DBNAME", "erp_bench"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier applied to every size")
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=None,
+                            help=f"rows at scale 1 (default {default})")
+    parser.add_argument("--config", help="JSON file overriding DEFAULT_DISTRIBUTIONS")
+    parser.add_argument("--set", action="append", metavar="KEY=JSON",
+                        help="Override one distribution, e.g. --set todo_overdue_share=0.3")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic ERP data")
+    add_size_arguments(parser)
+    parser.add_argument("--only", nargs="*", choices=list(DEFAULT_SIZES), help="Collections to generate")
+    parser.add_argument("--append", action="store_true", help="Keep existing documents")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--today", type=datetime.fromisoformat, help="Pin the clock (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    sizes = sizes_from_args(args)
+    distributions = distributions_from_args(args)
+    db = MongoClient(args.mongo_uri)[args.db]
+    start = time.perf_counter()
+    counts = seed(db, sizes, args.seed, drop=not args.append, distributions=distributions,
+                  only=args.only, batch_size=args.batch_size, today=args.today)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        "db": args.db,
+        "seed": args.seed,
+        "counts": counts,
+        "distributions": distributions,
+        "seconds": round(seconds, 1),
+        "rows_per_second": round(sum(counts.values()) / seconds) if seconds else None
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+
+# Each worker builds its own app (and Mongo client) after fork; the
+# scheduler lease makes sure only one of them runs the cron jobs.
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# gthread: THREADS requests in flight per worker. gevent: up to
+# WORKER_CONNECTIONS per worker on greenlets; pymongo, smtplib and the
+# notification stream yield while waiting on the network, so one process
+# serves hundreds of concurrent requests (bounded by MONGO_MAX_POOL_SIZE
+# for the ones that need Mongo at the same moment). A notification stream
+# holds a gthread thread while open: NOTIFICATION_MAX_STREAMS caps them.
+worker_class = os.getenv("WORKER_CLASS", "gthread")
+threads = int(os.getenv("THREADS", 4))
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", 1000))
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+preload_app = False
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", 2000))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Open this worker's first Mongo connection before it accepts requests"""
+    from app.utils.mongo import warmup_mongo
+    try:
+        worker.log.info("Mongo warmup: %.1f ms", warmup_mongo())
+    except Exception as e:
+        # Don't kill the worker: requests will retry and /api/health/ready reports it
+        worker.log.warning("Mongo warmup failed: %s", e)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the shared Prometheus directory"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,98 @@
+"""
+Shared fixtures. Tests that need the app run against a throwaway database
+on MONGO_URI (TEST_MONGO_DBNAME, default "erp_test") and are skipped when
+Flask or MongoDB is not available.
+"""
+import os
+import pytest
+
+TEST_DBNAME = os.getenv("TEST_MONGO_DBNAME", "erp_test")
+
+
+def mongo_available(uri):
+    try:
+        from pymongo import MongoClient
+        from pymongo.errors import PyMongoError
+    except ImportError:
+        return False
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+@pytest.fixture(scope="session")
+def mongo_uri():
+    uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+    if not mongo_available(uri):
+        pytest.skip("MongoDB is not reachable on MONGO_URI")
+    return uri
+
+
+@pytest.fixture(scope="session")
+def app(mongo_uri):
+    pytest.importorskip("flask")
+    # Config reads the environment when app.config is first imported
+    os.environ.update({
+        "MONGO_URI": mongo_uri,
+        "MONGO_DBNAME": TEST_DBNAME,
+        "SCHEDULER_ENABLED": "False",
+        "MAIL_SUPPRESS_SEND": "True",
+    })
+    os.environ.setdefault("SECRET_KEY", "test-secret")
+    from app import create_app, ensure_indexes
+
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        ensure_indexes(app)
+    yield app
+    from app.utils.mongo import client
+    client.drop_database(TEST_DBNAME)
+
+
+@pytest.fixture
+def db(app):
+    """
+    The test database inside an app context, emptied after each test
+    (indexes kept) along with the in-process response caches
+    """
+    from app.utils.cache import cache_stats, invalidate
+    from app.utils.mongo import get_db
+
+    with app.app_context():
+        database = get_db()
+        yield database
+        for name in database.list_collection_names():
+            database[name].delete_many({})
+        invalidate(*cache_stats())
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget(app):
+    """
+    expect_queries() for route tests: fails the test when the block issues
+    more Mongo commands, or repeats a query shape more often, than allowed.
+
+        with query_budget(max_queries=3, max_repeats=1) as log:
+            client.get("/api/users/")
+    """
+    from app.utils.query_budget import expect_queries
+    return expect_queries
+
+
+@pytest.fixture
+def tracked_queries(app):
+    """
+    QueryLog of every Mongo command issued during the test, keeping the
+    first command of each shape (track_queries(keep_commands=True))
+    """
+    from app.utils.query_budget import track_queries
+    with track_queries(keep_commands=True) as log:
+        yield log
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("flask")
+
+from app.services.absence_index import (  # noqa: E402
+    MaxAddTree, DepartmentAbsences, AbsenceLimitExceeded
+)
+
+
+def test_max_add_tree_range_add_and_max():
+    tree = MaxAddTree(0, 99)
+    assert tree.max(0, 99) == 0
+    tree.add(10, 20, 1)
+    tree.add(15, 30, 2)
+    assert tree.max(0, 9) == 0
+    assert tree.max(10, 14) == 1
+    assert tree.max(0, 99) == 3
+    assert tree.max(21, 30) == 2
+    tree.add(15, 30, -2)
+    assert tree.max(0, 99) == 1
+    # Ranges are clipped to the tree's bounds
+    tree.add(-5, 200, 1)
+    assert tree.max(-100, 1000) == 2
+    assert tree.max(50, 40) == 0
+
+
+def test_max_add_tree_matches_brute_force():
+    rng = random.Random(7)
+    lo, hi = 1000, 1400
+    tree, days = MaxAddTree(lo, hi), [0] * (hi - lo + 1)
+    for _ in range(500):
+        first = rng.randint(lo, hi)
+        last = rng.randint(first, hi)
+        if rng.random() < 0.6:
+            value = rng.choice([1, 1, -1, 3])
+            tree.add(first, last, value)
+            for day in range(first, last + 1):
+                days[day - lo] += value
+        else:
+            assert tree.max(first, last) == max(days[first - lo:last - lo + 1])
+
+
+def test_sync_keeps_the_version_only_after_its_own_change():
+    index = DepartmentAbsences()
+    index.sync(4)
+    assert index.version is None  # never built
+    index.version = 4
+    index.sync(5)
+    assert index.version == 5
+    # Another process bumped in between: rebuild on next use
+    index.sync(7)
+    assert index.version is None
+
+
+def test_release_only_counts_down_once():
+    index = DepartmentAbsences()
+    index.horizon = (0, 100)
+    index._insert("a", "it", 10, 12)
+    index._insert("a", "it", 10, 12)  # already counted
+    index._insert("b", "it", 12, 14)
+    assert index._tree("it").max(0, 100) == 2
+    index.release("a")
+    index.release("a")
+    assert index._tree("it").max(0, 100) == 1
+    assert index._tree("it").max(10, 11) == 0
+
+
+@pytest.fixture
+def capped(app, monkeypatch):
+    monkeypatch.setitem(app.config, "DEPARTMENT_ABSENCE_CAPS", "it:1")
+    monkeypatch.setitem(app.config, "DEFAULT_ABSENCE_CAP", 0)
+
+
+def submit(index, db, employee_id, start, days):
+    """What submit_leave_request does under the reservation"""
+    from bson import ObjectId
+    from app.utils.versioning import bump_version
+
+    request_id = ObjectId()
+    end = start + timedelta(days=days)
+    with index.reserve(request_id, "it", start, end):
+        db.leave_requests.insert_one({
+            "_id": request_id, "employee_id": employee_id, "status": "pending",
+            "start_date": start, "end_date": end,
+        })
+        index.sync(bump_version("leave"))
+    return request_id
+
+
+def test_reserve_enforces_the_cap_across_processes(db, capped):
+    start = datetime.combine(datetime.utcnow().date() + timedelta(days=10), datetime.min.time())
+    alice = db.users.insert_one({"name": "Alice", "department": "it"}).inserted_id
+    bob = db.users.insert_one({"name": "Bob", "department": "it"}).inserted_id
+    carol = db.users.insert_one({"name": "Carol", "department": "it"}).inserted_id
+
+    first_process, second_process = DepartmentAbsences(), DepartmentAbsences()
+    # The second process builds its index before Alice's request exists
+    submit(second_process, db, carol, start + timedelta(days=30), 1)
+    submit(first_process, db, alice, start, 2)
+    with pytest.raises(AbsenceLimitExceeded):
+        submit(second_process, db, bob, start + timedelta(days=1), 3)
+    submit(second_process, db, bob, start + timedelta(days=3), 3)
+    assert db.leave_requests.count_documents({}) == 3
+
+
+def test_failed_insert_releases_the_reservation(db, capped):
+    from bson import ObjectId
+
+    start = datetime.combine(datetime.utcnow().date() + timedelta(days=10), datetime.min.time())
+    index = DepartmentAbsences()
+    with pytest.raises(RuntimeError):
+        with index.reserve(ObjectId(), "it", start, start):
+            raise RuntimeError("insert failed")
+    assert db.leases.count_documents({}) == 0
+    employee = db.users.insert_one({"name": "Alice", "department": "it"}).inserted_id
+    submit(index, db, employee, start, 0)
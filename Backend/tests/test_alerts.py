@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("flask")
+
+from app.utils import notifications  # noqa: E402
+from app.utils.digest import AlertDigest  # noqa: E402
+
+
+def expiring(plate, days):
+    expiry = datetime.utcnow() + timedelta(days=days)
+    return {
+        "vehicle_id": plate, "plate_number": plate, "owner_name": "Alice", "document_type": "Insurance",
+        "expiry_date": expiry.strftime("%Y-%m-%d"), "days_until_expiry": days,
+    }
+
+
+def test_alerts_claimed_before_a_failure_are_still_sent(app, db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(AlertDigest, "send", lambda digest: sent.append(dict(digest.items)) or len(digest.items))
+    monkeypatch.setattr(notifications, "get_upcoming_expirations", lambda: [expiring("A-1", 5), None])
+    monkeypatch.setattr("app.utils.digest.get_alert_recipients", lambda: ["admin@example.com"])
+
+    # The second document breaks the check after the first alert was claimed
+    notifications.check_expiring_documents(app)
+
+    assert db.alert_ledger.count_documents({}) == 1
+    assert [list(items) for items in sent] == [["admin@example.com"]]
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("flask")
+
+from app.services import dashboard_service  # noqa: E402
+from app.services.dashboard_service import (  # noqa: E402
+    increment_counter, get_dashboard_summary, reconcile_counters
+)
+
+
+def test_reconcile_recounts_without_losing_a_concurrent_increment(db, monkeypatch):
+    db.todos.insert_many([{"title": "a", "status": "pending"}, {"title": "b", "status": "done"}])
+    reconcile_counters()
+    assert get_dashboard_summary()["todos"] == {"pending": 1, "done": 1, "total": 2}
+
+    recount = dashboard_service._recount
+    calls = []
+
+    def recount_with_a_write_in_between():
+        summary = recount()
+        if not calls:
+            # A task is created while the first recount runs
+            db.todos.insert_one({"title": "c", "status": "pending"})
+            increment_counter("todos", "pending")
+        calls.append(summary)
+        return summary
+
+    monkeypatch.setattr(dashboard_service, "_recount", recount_with_a_write_in_between)
+    reconcile_counters()
+    assert len(calls) == 2
+    assert get_dashboard_summary()["todos"] == {"pending": 2, "done": 1, "total": 3}
+
+
+def test_reconcile_creates_the_counters_document(db):
+    db.invoices.insert_one({"invoice_number": "F-1", "status": "paid"})
+    reconcile_counters()
+    increment_counter("invoices", "pending")
+    summary = get_dashboard_summary()
+    assert summary["invoices"] == {"paid": 1, "pending": 1, "total": 2}
+    assert "seq" not in summary
+
+
+def test_reconcile_and_cache_stats_are_admin_only(client):
+    assert client.post("/api/dashboard/reconcile").status_code == 401
+    assert client.get("/api/dashboard/cache").status_code == 401
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+from decimal import Decimal
+import json
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("orjson")
+
+from bson import ObjectId, Decimal128  # noqa: E402
+from app.utils.json_provider import dumps  # noqa: E402
+
+
+def test_mongo_types():
+    object_id = ObjectId()
+    encoded = json.loads(dumps({
+        "_id": object_id,
+        "created_at": datetime(2025, 3, 17, 8, 30),
+        "day": date(2025, 3, 17),
+        "tags": {"a"},
+        1: "int key",
+    }))
+    assert encoded == {
+        "_id": str(object_id),
+        "created_at": "2025-03-17T08:30:00",
+        "day": "2025-03-17",
+        "tags": ["a"],
+        "1": "int key",
+    }
+
+
+def test_decimals_keep_every_digit():
+    encoded = json.loads(dumps({
+        "amount": Decimal128("1250.10"),
+        "big": Decimal128("12345678901234567.89"),
+        "rate": Decimal("0.1"),
+    }))
+    assert encoded == {"amount": "1250.10", "big": "12345678901234567.89", "rate": "0.1"}
+
+
+def test_unknown_types_raise():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,23 @@
+from datetime import datetime
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+from app.services.leave_calendar import DEFAULT_DEPARTMENT, build_calendar  # noqa: E402
+
+
+def test_missing_or_null_department_falls_back_to_the_default(db):
+    alice = db.users.insert_one({"name": "Alice", "department": "it"}).inserted_id
+    bob = db.users.insert_one({"name": "Bob", "department": None}).inserted_id
+    carol = db.users.insert_one({"name": "Carol"}).inserted_id
+    db.leave_requests.insert_many([{
+        "employee_id": employee_id, "status": "approved",
+        "start_date": datetime(2025, 3, 17), "end_date": datetime(2025, 3, 18),
+    } for employee_id in (alice, bob, carol)])
+
+    calendar = build_calendar(datetime(2025, 3, 17), datetime(2025, 3, 18))
+    assert calendar["departments"] == {DEFAULT_DEPARTMENT: [2, 2], "it": [1, 1]}
+
+    calendar = build_calendar(datetime(2025, 3, 17), datetime(2025, 3, 18), department=DEFAULT_DEPARTMENT)
+    assert sorted(employee["name"] for employee in calendar["employees"]) == ["Bob", "Carol"]
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("flask")
+
+from app.utils import email_utils  # noqa: E402
+from app.utils.email_utils import queue_email, process_mail_outbox  # noqa: E402
+
+
+class HeldExecutor:
+    """Keeps the immediate attempts instead of running them, like a worker recycled before sending"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+@pytest.fixture
+def held(monkeypatch):
+    executor = HeldExecutor()
+    monkeypatch.setattr(email_utils, "_mail_executor", executor)
+    return executor
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """send_email replacement: answers from `results`, True once they run out"""
+    calls = []
+    results = []
+
+    def send(to, subject, body):
+        calls.append(to)
+        return results.pop(0) if results else True
+
+    monkeypatch.setattr(email_utils, "send_email", send)
+    return calls, results
+
+
+def make_due(db):
+    db.mail_outbox.update_many({}, {"$set": {"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_message_lost_with_its_worker_is_sent_by_the_outbox(db, held, smtp):
+    calls, _ = smtp
+    invoice_id = db.invoices.insert_one({"invoice_number": "F-1", "status": "pending"}).inserted_id
+    message_id = queue_email("client@example.com", "Rappel", "...", ref=("invoices", invoice_id))
+    assert len(held.submitted) == 1
+    assert db.invoices.find_one({"_id": invoice_id})["email_status"] == "queued"
+
+    assert process_mail_outbox() == 1
+    assert calls == ["client@example.com"]
+    assert db.mail_outbox.find_one({"_id": message_id})["status"] == "sent"
+    assert db.invoices.find_one({"_id": invoice_id})["email_status"] == "sent"
+    assert process_mail_outbox() == 0
+
+
+def test_failures_are_retried_with_backoff_then_given_up(app, db, held, smtp, monkeypatch):
+    calls, results = smtp
+    monkeypatch.setitem(app.config, "MAIL_MAX_ATTEMPTS", 3)
+    results.extend([False, False, False])
+    invoice_id = db.invoices.insert_one({"invoice_number": "F-2", "status": "pending"}).inserted_id
+    message_id = queue_email("client@example.com", "Rappel", "...", ref=("invoices", invoice_id))
+
+    process_mail_outbox()
+    message = db.mail_outbox.find_one({"_id": message_id})
+    assert (message["status"], message["attempts"]) == ("pending", 1)
+    assert message["next_attempt_at"] > datetime.utcnow()
+    assert db.invoices.find_one({"_id": invoice_id})["email_status"] == "retrying"
+    # Not due yet
+    assert process_mail_outbox() == 0
+    assert len(calls) == 1
+
+    make_due(db)
+    process_mail_outbox()
+    make_due(db)
+    process_mail_outbox()
+    assert len(calls) == 3
+    assert db.mail_outbox.find_one({"_id": message_id})["status"] == "failed"
+    assert db.invoices.find_one({"_id": invoice_id})["email_status"] == "failed"
+    make_due(db)
+    assert process_mail_outbox() == 0
+
+
+def test_send_interrupted_mid_way_is_claimed_again(db, held, smtp):
+    message_id = queue_email("admin@example.com", "Test", "...")
+    message = email_utils._claim(message_id)
+    assert message["status"] == "sending"
+    # The claim is held until it expires
+    assert process_mail_outbox() == 0
+    make_due(db)
+    assert process_mail_outbox() == 1
+    assert db.mail_outbox.find_one({"_id": message_id})["attempts"] == 2
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("pymongo")
+
+from app.services.notification_broker import NotificationBroker, StreamLimitReached  # noqa: E402
+from app.utils.sync import next_revision  # noqa: E402
+
+
+def test_late_insert_with_lower_seq_is_published_once(db):
+    broker = NotificationBroker()
+    subscriber = broker.subscribe()
+    late = next_revision("notifications")
+    db.notifications.insert_one({"message": "early", "seq": next_revision("notifications")})
+    broker._poll(db.notifications)
+
+    db.notifications.insert_one({"message": "late", "seq": late})
+    broker._poll(db.notifications)
+    broker._poll(db.notifications)
+
+    received = [subscriber.get_nowait()["message"] for _ in range(subscriber.qsize())]
+    assert received == ["early", "late"]
+
+
+def test_subscribe_enforces_the_stream_limit(db):
+    broker = NotificationBroker()
+    first = broker.subscribe(limit=1)
+    with pytest.raises(StreamLimitReached):
+        broker.subscribe(limit=1)
+    broker.unsubscribe(first)
+    broker.subscribe(limit=1)
+
+
+def test_stream_does_not_repeat_replayed_notifications(client, db, monkeypatch):
+    from queue import Queue
+    from app.routes import notification_routes
+
+    db.notifications.insert_many([{"message": "missed", "seq": 1}, {"message": "missed too", "seq": 2}])
+    # The broker publishes seq 2 again: it was polled after the stream subscribed
+    live = Queue()
+    live.put({"message": "missed too", "seq": 2})
+    live.put({"message": "new", "seq": 3})
+
+    class Broker:
+        def subscribe(self, limit=None):
+            return live
+
+        def unsubscribe(self, subscriber):
+            pass
+
+    monkeypatch.setattr(notification_routes, "broker", Broker())
+    response = client.get("/api/notifications/stream", headers={"Last-Event-ID": "0"}, buffered=False)
+    ids = []
+    for chunk in response.response:
+        ids += [line[4:] for line in chunk.decode().splitlines() if line.startswith("id: ")]
+        if "3" in ids:
+            break
+    response.close()
+    assert ids == ["1", "2", "3"]
@@ -0,0 +1,155 @@
+"""
+The list and detail routes fetch exactly what they serialize: each route is
+called on a seeded document, and the projection of the `find` it sends is
+compared with the fields of its JSON response.
+"""
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+from bson import ObjectId  # noqa: E402
+
+from app.utils.projections import PROFILES, get_projection  # noqa: E402
+
+NOW = datetime.utcnow().replace(microsecond=0)
+SCAN = "data:image/png;base64,iVBORw0KGgo="
+
+
+def user_document():
+    return {
+        "name": "Alice", "email": "alice@example.com", "password": "not-a-hash",
+        "roles": ["user"], "created_at": NOW - timedelta(days=400), "hire_date": NOW - timedelta(days=400),
+        "contract_type": "CDI", "contract_expiry": NOW + timedelta(days=365),
+        "department": "it", "leave_balance": 12,
+    }
+
+
+def leave_document():
+    return {
+        "employee_id": ObjectId(), "start_date": NOW, "end_date": NOW + timedelta(days=2),
+        "leave_type": "paid", "status": "pending", "leave_days": 3, "reason": "Family",
+        "document_path": "uploads/certificate.pdf", "rejection_reason": None,
+        "created_at": NOW, "updated_at": NOW,
+    }
+
+
+def vehicle_document():
+    return {
+        "plate_number": "123TU4567", "owner_name": "Alice", "created_at": NOW,
+        "documents": {
+            kind: {"expiry_date": NOW + timedelta(days=30), "file": SCAN}
+            for kind in ("insurance", "vignette", "vesite")
+        },
+    }
+
+
+def todo_document():
+    return {
+        "title": "Renew insurance", "description": "Before the end of the month",
+        "due_date": NOW + timedelta(days=3), "status": "pending", "created_at": NOW,
+        "user_id": ObjectId(),
+    }
+
+
+def invoice_document():
+    return {
+        "invoice_number": "INV-001", "client_email": "client@example.com", "telephone": "+21600000000",
+        "total_amount": "120.000", "invoice_date": NOW, "payment_date": None, "status": "unpaid",
+        "email_status": "sent", "notes": "Internal notes",
+    }
+
+
+def license_document():
+    return {
+        "license_name": "Office", "license_key": "XXXX-YYYY", "purchase_date": NOW - timedelta(days=350),
+        "expiry_date": NOW + timedelta(days=15), "status": "about_to_expire", "days_until_expiry": 15,
+        "last_updated": NOW,
+    }
+
+
+def archive_document():
+    return {
+        "title": "Contract", "original_filename": "contract.pdf", "archived_at": NOW,
+        "content_type": "application/pdf", "department": "hr", "tags": ["contract"],
+        "description": "Signed contract", "status": "archived", "file_id": ObjectId(),
+        "archived_by": "admin", "meta": {"pages": 3},
+    }
+
+
+# name -> (collection, seeded document, url ({id} is the seeded _id), items of the response,
+#          response key -> document field it renames, keys the route computes)
+ROUTES = {
+    "users_list": ("users", user_document, "/api/users/", lambda body: body,
+                   {"id": "_id", "join_date": "created_at"}, {"leave_balance"}),
+    "leave_list": ("leave_requests", leave_document, "/api/leave/all", lambda body: body["data"], {}, set()),
+    "vehicles_list": ("vehicle_documents", vehicle_document, "/api/vehicles/", lambda body: body["data"], {}, set()),
+    "vehicles_detail": ("vehicle_documents", vehicle_document, "/api/vehicles/{id}", lambda body: [body], {}, set()),
+    "todos_list": ("todos", todo_document, "/api/todos/", lambda body: body, {}, set()),
+    "invoices_list": ("invoices", invoice_document, "/api/invoices/list", lambda body: body["invoices"], {}, set()),
+    "licenses_list": ("licenses", license_document, "/api/licenses/", lambda body: body, {}, set()),
+    "licenses_alerts": ("licenses", license_document, "/api/licenses/alerts", lambda body: body, {}, set()),
+    "archive_list": ("documents", archive_document, "/api/archive/documents/archived", lambda body: body,
+                     {"id": "_id"}, set()),
+}
+
+
+def leaf_paths(document, prefix=""):
+    paths = set()
+    for key, value in document.items():
+        if isinstance(value, dict) and value:
+            paths |= leaf_paths(value, f"{prefix}{key}.")
+        else:
+            paths.add(prefix + key)
+    return paths
+
+
+def projected_paths(projection, document):
+    """Leaf paths of `document` that `projection` lets out of Mongo"""
+    paths = leaf_paths(document)
+    if projection is None:
+        return paths
+    inclusion = any(value not in (0, False) for field, value in projection.items() if field != "_id")
+    kept = [field for field, value in projection.items() if value not in (0, False)]
+    if inclusion and projection.get("_id", 1):
+        kept.append("_id")
+    covered = [
+        path for path in paths
+        if any(path == field or path.startswith(f"{field}.") for field in (kept if inclusion else projection))
+    ]
+    return set(covered) if inclusion else paths - set(covered)
+
+
+def sent_projection(log, collection):
+    """Projection of the first `find` the request sent to `collection`"""
+    for shape, (_, command) in log.commands.items():
+        if shape.startswith(f"find {collection} "):
+            return command.get("projection")
+    raise AssertionError(f"no find on {collection}: {list(log.shapes)}")
+
+
+def test_get_projection_returns_a_copy():
+    projection = get_projection("users", "list")
+    projection["password"] = 1
+    assert "password" not in PROFILES["users"]["list"]
+
+
+@pytest.mark.parametrize("route", ROUTES)
+def test_route_fetches_what_it_serializes(route, client, db, tracked_queries):
+    collection, make_document, url, items, renamed, computed = ROUTES[route]
+    document = make_document()
+    document_id = db[collection].insert_one(dict(document)).inserted_id
+    document["_id"] = document_id
+
+    response = client.get(url.format(id=document_id))
+
+    assert response.status_code == 200, response.get_json()
+    [item] = items(response.get_json())
+    projection = sent_projection(tracked_queries, collection)
+    serialized = {
+        path for path in leaf_paths({renamed.get(key, key): value for key, value in item.items()})
+        if path not in computed
+    }
+    # Nothing fetched goes unused, nothing serialized was left out of the projection
+    assert serialized == projected_paths(projection, document)
@@ -0,0 +1,19 @@
+"""
+benchmarks/check_query_plans.py on a small seed: every query shape issued
+by the hot routes and the scheduler jobs must keep an index-backed plan.
+"""
+import pytest
+
+pytest.importorskip("flask")
+
+from benchmarks.check_query_plans import run_checks  # noqa: E402
+from benchmarks.seed import DEFAULT_SIZES  # noqa: E402
+
+SCALE = 0.002
+
+
+def test_hot_queries_use_indexes(app, db):
+    sizes = {name: max(int(count * SCALE), 1) for name, count in DEFAULT_SIZES.items()}
+    results, failures = run_checks(app, sizes)
+    assert results, "no query was recorded"
+    assert failures == [], {shape: results[shape]["problems"] for shape in failures}
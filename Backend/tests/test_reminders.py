@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("flask")
+
+from app.services import reminder_service  # noqa: E402
+from app.services.reminder_service import process_due_reminders, claim_due_reminder  # noqa: E402
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """AlertDigest.send replacement delivering only to the recipients in `up`"""
+    up = set()
+
+    def send(digest):
+        digest.delivered = {recipient for recipient in digest.items if recipient in up}
+        return len(digest.delivered)
+
+    monkeypatch.setattr(reminder_service.AlertDigest, "send", send)
+    return up
+
+
+def queue(db, title, email):
+    user_id = db.users.insert_one({"email": email}).inserted_id
+    task_id = db.todos.insert_one({
+        "title": title, "status": "pending", "user_id": user_id,
+        "due_date": datetime.utcnow() + timedelta(hours=47),
+    }).inserted_id
+    db.reminders.insert_one({"fire_at": datetime.utcnow() - timedelta(minutes=1), "task_id": task_id, "kind": "48h"})
+    return task_id
+
+
+def test_reminders_stay_queued_until_their_email_is_sent(db, smtp):
+    queue(db, "a", "a@example.com")
+    queue(db, "b", "b@example.com")
+    smtp.add("a@example.com")
+
+    assert process_due_reminders() == 1
+    left = list(db.reminders.find())
+    assert len(left) == 1 and "claimed_until" not in left[0]
+
+    smtp.add("b@example.com")
+    assert process_due_reminders() == 1
+    assert db.reminders.count_documents({}) == 0
+
+
+def test_claim_of_a_crashed_run_expires(db, smtp):
+    queue(db, "a", "a@example.com")
+    assert claim_due_reminder() is not None  # the run dies before sending
+    smtp.add("a@example.com")
+    assert process_due_reminders() == 0
+    later = datetime.now(timezone.utc) + reminder_service.CLAIM_LEASE + timedelta(seconds=1)
+    assert claim_due_reminder(later) is not None
+
+
+def test_reminders_of_done_tasks_are_dropped(db, smtp):
+    task_id = queue(db, "a", "a@example.com")
+    db.todos.update_one({"_id": task_id}, {"$set": {"status": "done"}})
+    assert process_due_reminders() == 0
+    assert db.reminders.count_documents({}) == 0
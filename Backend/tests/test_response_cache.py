@@ -0,0 +1,28 @@
+from datetime import datetime
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+
+def test_cached_list_follows_a_version_bump_from_another_process(client, db):
+    db.users.insert_one({"name": "Alice", "email": "alice@example.com", "created_at": datetime.utcnow()})
+    first = client.get("/api/users/")
+    assert [user["name"] for user in first.get_json()] == ["Alice"]
+    # Served from this process's cache while nothing changed
+    again = client.get("/api/users/")
+    assert again.get_data() == first.get_data() and again.headers["ETag"] == first.headers["ETag"]
+
+    # Another worker writes and bumps the shared stamp; this process's cache is not told
+    db.users.insert_one({"name": "Bob", "email": "bob@example.com", "created_at": datetime.utcnow()})
+    db.collection_versions.update_one({"_id": "users"}, {"$inc": {"version": 1}}, upsert=True)
+
+    fresh = client.get("/api/users/")
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != first.headers["ETag"]
+    assert sorted(user["name"] for user in fresh.get_json()) == ["Alice", "Bob"]
+
+    # A client holding the old copy is sent the new one, not a 304
+    revalidated = client.get("/api/users/", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 200
+    assert revalidated.get_data() == fresh.get_data()
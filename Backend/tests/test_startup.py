@@ -0,0 +1,33 @@
+"""
+Startup gates from benchmarks/bench_startup.py: import time, time to the
+first request, no threads started at import and no heavy dependency
+loaded by create_app(). Budgets can be raised on slow CI machines with
+STARTUP_IMPORT_BUDGET_MS and STARTUP_FIRST_REQUEST_BUDGET_MS.
+"""
+import os
+import pytest
+
+pytest.importorskip("flask")
+
+from benchmarks import bench_startup  # noqa: E402
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 600))
+FIRST_REQUEST_BUDGET_MS = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", 1500))
+
+
+def test_app_import_within_budget():
+    import_ms = min(bench_startup.measure_import_ms() for _ in range(3))
+    assert import_ms <= IMPORT_BUDGET_MS
+
+
+def test_first_request_within_budget(mongo_uri):
+    wall_ms = min(bench_startup.measure_first_request_ms()[1] for _ in range(3))
+    assert wall_ms <= FIRST_REQUEST_BUDGET_MS
+
+
+def test_import_starts_no_threads():
+    assert bench_startup.count_import_threads() == 1
+
+
+def test_create_app_loads_no_heavy_module():
+    assert bench_startup.heavy_modules_loaded() == []
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("pymongo")
+
+from app.utils.mongo import get_todo_collection
+from app.utils.projections import get_projection
+from app.utils.sync import next_revision, record_deletion, changes_since, list_token
+
+
+def titles(documents):
+    return sorted(doc["title"] for doc in documents)
+
+
+def test_revision_committed_after_a_later_one_is_not_missed(db):
+    todos = get_todo_collection()
+    # Revision allocated by a writer that has not inserted its document yet
+    late = next_revision("todos")
+    todos.insert_one({"title": "early", "_rev": next_revision("todos")})
+
+    changed, _, token = changes_since("todos", todos, "0")
+    assert titles(changed) == ["early"]
+    assert token == str(late + 1)
+
+    todos.insert_one({"title": "late", "_rev": late})
+    changed, _, next_token = changes_since("todos", todos, token)
+    assert "late" in titles(changed)
+    assert next_token == token
+
+
+def test_full_list_token_is_the_highest_revision_read(db):
+    todos = get_todo_collection()
+    late = next_revision("todos")
+    todos.insert_one({"title": "early", "_rev": next_revision("todos")})
+
+    tasks = list(todos.find({}))
+    token = list_token(tasks)
+    assert token == str(late + 1)
+
+    todos.insert_one({"title": "late", "_rev": late})
+    changed, _, _ = changes_since("todos", todos, token)
+    assert titles(changed) == ["early", "late"]
+
+
+def test_token_advances_with_list_projection_and_deletions(db):
+    todos = get_todo_collection()
+    todos.insert_one({"title": "kept", "_rev": next_revision("todos")})
+    removed = todos.insert_one({"title": "removed", "_rev": next_revision("todos")}).inserted_id
+    todos.delete_one({"_id": removed})
+    record_deletion("todos", removed)
+
+    changed, deleted, token = changes_since("todos", todos, "0", get_projection("todos", "list"))
+    assert titles(changed) == ["kept"]
+    assert deleted == [removed]
+    assert token == "3"
+
+
+def test_token_without_new_writes_stays(db):
+    todos = get_todo_collection()
+    assert changes_since("todos", todos, "7")[2] == "7"
+    assert list_token([]) == "0"
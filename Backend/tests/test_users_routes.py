@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("numpy")
+
+
+def seed_users(db, count):
+    now = datetime.utcnow()
+    user_ids = db.users.insert_many([{
+        "name": f"User {i}",
+        "email": f"user{i}@example.com",
+        "password": "not-a-hash",
+        "roles": ["user"],
+        "department": "it",
+        "created_at": now - timedelta(days=400),
+    } for i in range(count)]).inserted_ids
+    db.leave_requests.insert_many([{
+        "employee_id": user_id,
+        "status": "approved",
+        "leave_type": "paid",
+        "start_date": datetime(2025, 3, 17),
+        "end_date": datetime(2025, 3, 21),
+    } for user_id in user_ids])
+
+
+@pytest.mark.parametrize("count", [3, 40])
+def test_list_users_query_count_does_not_grow_with_users(client, db, query_budget, count):
+    from app.utils.workdays import work_calendar
+
+    seed_users(db, count)
+    work_calendar()  # built once per HOLIDAY_CACHE_TTL, not per request
+
+    with query_budget(max_queries=4, max_repeats=1) as log:
+        response = client.get("/api/users/")
+
+    assert response.status_code == 200
+    users = response.get_json()
+    assert len(users) == count
+    assert all("password" not in user for user in users)
+    assert log.count <= 4
+
+
+def test_query_count_headers_are_off_by_default(client, db):
+    response = client.get("/api/users/", headers={"Origin": "http://localhost:5173"})
+    assert "X-Query-Count" not in response.headers
+    assert "X-Query-Count" not in response.headers.get("Access-Control-Expose-Headers", "")
@@ -0,0 +1,69 @@
+from datetime import date, datetime
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("flask")
+pytest.importorskip("pymongo")
+
+from app.utils import workdays  # noqa: E402
+from app.utils.workdays import (  # noqa: E402
+    business_days, business_days_many, compile_calendar, tunisian_holidays, _weekmask
+)
+
+TN = compile_calendar("Sat,Sun", tunisian_holidays())
+
+
+def test_weekmask_parsing():
+    assert _weekmask("Sat,Sun") == [True] * 5 + [False, False]
+    assert _weekmask(" friday, SAT ") == [True] * 4 + [False, False, True]
+    assert _weekmask("") == [True] * 7
+
+
+@pytest.mark.parametrize("weekend,expected", [
+    ("Sat,Sun", 5),
+    ("Fri,Sat", 5),
+    ("Sun", 6),
+    ("Fri,Sat,Sun", 4),
+])
+def test_weekend_masks(weekend, expected):
+    # Monday 2024-01-08 to Sunday 2024-01-14, no holiday that week
+    calendar = compile_calendar(weekend, [])
+    assert business_days(date(2024, 1, 8), date(2024, 1, 14), calendar) == expected
+
+
+def test_tunisian_holiday_table():
+    holidays = set(tunisian_holidays())
+    assert date(2024, 3, 20) in holidays  # Fête de l'indépendance
+    assert date(2030, 8, 13) in holidays  # Fête de la femme
+    # Fête de la Révolution moved from 14 January to 17 December in 2021
+    assert date(2020, 1, 14) in holidays and date(2020, 12, 17) not in holidays
+    assert date(2021, 12, 17) in holidays and date(2021, 1, 14) not in holidays
+    assert date(2025, 3, 31) in holidays  # Aïd el-Fitr
+
+
+def test_ranges_spanning_holidays():
+    # Monday 17 to Friday 21 March 2025: Thursday 20 is Independence Day
+    assert business_days(date(2025, 3, 17), date(2025, 3, 21), TN) == 4
+    # 30 and 31 March 2025 (Aïd el-Fitr) fall on Sunday and Monday
+    assert business_days(date(2025, 3, 28), date(2025, 4, 1), TN) == 2
+    assert business_days(date(2025, 3, 20), date(2025, 3, 20), TN) == 0
+    assert business_days(date(2025, 3, 19), date(2025, 3, 19), TN) == 1
+
+
+def test_datetimes_count_by_calendar_day():
+    assert business_days(datetime(2025, 3, 17), datetime(2025, 3, 21, 23, 59), TN) == 4
+
+
+def test_start_after_end_counts_nothing():
+    assert business_days(date(2025, 3, 21), date(2025, 3, 17), TN) == 0
+    counts = business_days_many(
+        [date(2025, 3, 17), date(2025, 3, 21)], [date(2025, 3, 21), date(2025, 3, 17)], TN
+    )
+    assert counts.tolist() == [4, 0]
+
+
+def test_work_calendar_includes_configured_and_stored_holidays(app, db, monkeypatch):
+    monkeypatch.setitem(app.config, "LEAVE_EXTRA_HOLIDAYS", "2025-03-18")
+    monkeypatch.setattr(workdays, "_calendar", None)
+    db.holidays.insert_one({"date": datetime(2025, 3, 19)})
+    assert business_days(date(2025, 3, 17), date(2025, 3, 21)) == 2